@@ -0,0 +1,354 @@
+"""
+HTTP API for the scrapers, for internal systems that should not drive the Streamlit UI
+
+Long operations are submitted as jobs and run on a shared worker pool:
+    POST /companies          {"location", "domain", "num_companies"}
+    POST /hr-profiles        {"company_name", "num_profiles", "designation", "country", "state"}
+    POST /job-search         {"job_title", "location", "search_types", "limit", "platforms", "combined"}
+    GET  /jobs/<id>          poll status and result
+    GET  /jobs/<id>/stream   newline-delimited JSON events as results arrive
+    DELETE /jobs/<id>        cancel a queued or running job, keeping its partial result
+Every job accepts an optional "timeout" in seconds; jobs cut short finish with "complete": false.
+Cheap operations answer directly:
+    POST /email-predictions  {"profile_urls", "company_domain"}
+    GET  /health
+
+Identical submissions are coalesced onto the running job, and finished jobs are
+served from cache for API_CACHE_TTL seconds. The server also runs the off-peak
+cache warmer, whose state is reported under /health.
+
+Run with: python api_server.py --port 8600
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pandas as pd
+
+from companies_details_extraction.browser_scheduler import PRIORITY_NORMAL, scheduler, scheduling_context
+from companies_details_extraction.cache_warmer import start_warmer, warmer
+from companies_details_extraction.cancellation import CancelToken, ScrapeResult, cancellation_scope
+from companies_details_extraction.company_scraper import get_linkedin_company_links, extract_company_name_from_url
+from companies_details_extraction.driver_manager import get_driver_stats
+from companies_details_extraction.egress_pool import egress
+from companies_details_extraction.email_predictor import predict_emails_from_profiles
+from companies_details_extraction.hr_scraper import get_hr_profiles
+from companies_details_extraction.job_dedup import dedupe_jobs
+from companies_details_extraction.job_search import iter_platform_results
+from companies_details_extraction.scrape_logging import request_scope
+
+API_WORKERS = int(os.environ.get("API_WORKERS", 8))
+API_CACHE_TTL = int(os.environ.get("API_CACHE_TTL", 600))
+# Finished jobs are forgotten after this many seconds
+JOB_RETENTION = int(os.environ.get("API_JOB_RETENTION", 3600))
+
+JOB_ROUTE = re.compile(r'^/jobs/(?P<job_id>[0-9a-f]+)(?P<stream>/stream)?$')
+
+
+class Job:
+    def __init__(self, kind, params, key):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.key = key
+        self.status = "queued"
+        self.events = []
+        self.result = None
+        self.error = None
+        self.complete = None
+        self.cancel_token = CancelToken()
+        self.created_at = time.time()
+        self.finished_at = None
+        self._condition = threading.Condition()
+
+    def emit(self, event):
+        with self._condition:
+            self.events.append(event)
+            self._condition.notify_all()
+
+    def finish(self, status, result=None, error=None):
+        with self._condition:
+            self.status = status
+            self.result = result
+            self.error = error
+            self.complete = getattr(result, "complete", status == "done")
+            self.finished_at = time.time()
+            self._condition.notify_all()
+
+    @property
+    def done(self):
+        return self.status in ("done", "failed")
+
+    def wait_events(self, start, timeout=15.0):
+        """Return events from index start, blocking until there are new ones or the job ends"""
+        with self._condition:
+            if len(self.events) <= start and not self.done:
+                self._condition.wait(timeout)
+            return self.events[start:], self.done
+
+    def to_dict(self, include_result=True):
+        data = {
+            "id": self.id,
+            "kind": self.kind,
+            "params": self.params,
+            "status": self.status,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "events": len(self.events)
+        }
+        if include_result:
+            data["result"] = self.result
+            data["error"] = self.error
+            data["complete"] = self.complete
+        return data
+
+
+def run_companies(job, params):
+    links = get_linkedin_company_links(params["location"], params["domain"], int(params.get("num_companies", 10)))
+    return ScrapeResult(
+        [{"name": extract_company_name_from_url(link), "url": link} for link in links],
+        links.complete, links.reason
+    )
+
+
+def run_hr_profiles(job, params):
+    return get_hr_profiles(
+        params["company_name"],
+        int(params.get("num_profiles", 10)),
+        designation=params.get("designation", "HR OR Recruiter"),
+        country=params.get("country", "India"),
+        state=params.get("state", "Gujarat")
+    )
+
+
+def run_job_search(job, params):
+    search_types = [kind == "internships" for kind in params.get("search_types", ["jobs"])]
+    all_results = ScrapeResult()
+    for platform, is_internship, results in iter_platform_results(
+        params["job_title"],
+        params["location"],
+        search_types,
+        int(params.get("limit", 10)),
+        params.get("platforms"),
+        bool(params.get("combined", False))
+    ):
+        result_type = "Internship" if is_internship else "Job"
+        rows = [dict(result, Type=result_type) for result in results]
+        all_results.extend(rows)
+        all_results.complete = all_results.complete and results.complete
+        job.emit({"platform": platform, "type": result_type, "results": rows})
+    # Streamed events carry every listing; the final result merges postings found more than once
+    if all_results:
+        all_results[:] = dedupe_jobs(pd.DataFrame(all_results)).to_dict("records")
+    return all_results
+
+
+JOB_KINDS = {
+    "companies": (run_companies, ["location", "domain"]),
+    "hr-profiles": (run_hr_profiles, ["company_name"]),
+    "job-search": (run_job_search, ["job_title", "location"])
+}
+
+
+class JobManager:
+    """Worker pool with request coalescing and a short-lived response cache"""
+
+    def __init__(self, workers=API_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api-worker")
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._by_key = {}
+
+    @staticmethod
+    def job_key(kind, params):
+        canonical = json.dumps([kind, params], sort_keys=True)
+        return hashlib.sha1(canonical.encode()).hexdigest()
+
+    def submit(self, kind, params, client):
+        """Return (job, reused) where reused is True if an identical job was coalesced or cached"""
+        key = self.job_key(kind, params)
+        with self._lock:
+            self._expire()
+            existing = self._by_key.get(key)
+            if existing and (not existing.done or (existing.status == "done" and existing.complete and time.time() - existing.finished_at < API_CACHE_TTL)):
+                return existing, True
+            job = Job(kind, params, key)
+            self._jobs[job.id] = job
+            self._by_key[key] = job
+        self._executor.submit(self._run, job, client)
+        return job, False
+
+    def _run(self, job, client):
+        run, _ = JOB_KINDS[job.kind]
+        job.status = "running"
+        timeout = job.params.get("timeout")
+        try:
+            with scheduling_context(session_id=f"api:{client}", priority=PRIORITY_NORMAL), \
+                    cancellation_scope(float(timeout) if timeout else None, job.cancel_token), \
+                    request_scope(job.id):
+                result = run(job, job.params)
+            job.finish("done", result=result)
+        except Exception as e:
+            print(f"API job {job.id} failed: {e}")
+            job.finish("failed", error=str(e))
+
+    def _expire(self):
+        now = time.time()
+        for job_id, job in list(self._jobs.items()):
+            if job.done and now - job.finished_at > JOB_RETENTION:
+                del self._jobs[job_id]
+                if self._by_key.get(job.key) is job:
+                    del self._by_key[job.key]
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """Cancel a job and stop coalescing new submissions onto it; returns the job or None"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job and self._by_key.get(job.key) is job and not job.done:
+                del self._by_key[job.key]
+        if job:
+            job.cancel_token.cancel("cancelled by client")
+        return job
+
+    def get_stats(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return {status: sum(job.status == status for job in jobs) for status in ("queued", "running", "done", "failed")}
+
+
+jobs = JobManager()
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    server_version = "HirvanaAPI/1.0"
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        return json.loads(self.rfile.read(length))
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {
+                "status": "ok",
+                "browsers": scheduler.get_stats(),
+                "drivers": {k: v for k, v in get_driver_stats().items() if k != "drivers"},
+                "egress": egress.get_stats(),
+                "jobs": jobs.get_stats(),
+                "cache_warmer": warmer.get_stats()
+            })
+            return
+
+        match = JOB_ROUTE.match(self.path)
+        job = jobs.get(match.group("job_id")) if match else None
+        if not job:
+            self._send_json(404, {"error": "not found"})
+        elif match.group("stream"):
+            self._stream(job)
+        else:
+            self._send_json(200, job.to_dict())
+
+    def _stream(self, job):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        sent = 0
+        try:
+            while True:
+                events, done = job.wait_events(sent)
+                for event in events:
+                    self.wfile.write((json.dumps({"event": "result", "data": event}) + "\n").encode("utf-8"))
+                sent += len(events)
+                if done and not events:
+                    break
+                self.wfile.flush()
+            self.wfile.write((json.dumps({"event": "end", "data": job.to_dict()}) + "\n").encode("utf-8"))
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def do_POST(self):
+        try:
+            params = self._read_json()
+        except ValueError:
+            self._send_json(400, {"error": "invalid JSON body"})
+            return
+
+        kind = self.path.strip("/")
+        if kind == "email-predictions":
+            self._email_predictions(params)
+            return
+        if kind not in JOB_KINDS:
+            self._send_json(404, {"error": "not found"})
+            return
+
+        missing = [field for field in JOB_KINDS[kind][1] if not params.get(field)]
+        if missing:
+            self._send_json(400, {"error": f"missing fields: {', '.join(missing)}"})
+            return
+
+        job, reused = jobs.submit(kind, params, self.client_address[0])
+        self._send_json(200 if reused else 202, {
+            "job": job.to_dict(include_result=job.done),
+            "coalesced": reused,
+            "poll": f"/jobs/{job.id}",
+            "stream": f"/jobs/{job.id}/stream"
+        })
+
+    def do_DELETE(self):
+        match = JOB_ROUTE.match(self.path)
+        job = jobs.cancel(match.group("job_id")) if match and not match.group("stream") else None
+        if not job:
+            self._send_json(404, {"error": "not found"})
+        else:
+            self._send_json(202 if not job.done else 200, job.to_dict(include_result=job.done))
+
+    def _email_predictions(self, params):
+        if not params.get("profile_urls") or not params.get("company_domain"):
+            self._send_json(400, {"error": "missing fields: profile_urls, company_domain"})
+            return
+        email_df = predict_emails_from_profiles(params["profile_urls"], params["company_domain"])
+        self._send_json(200, {"predictions": email_df.to_dict(orient="records")})
+
+    def log_message(self, format, *args):
+        print(f"{self.client_address[0]} - {format % args}")
+
+
+def serve(host="127.0.0.1", port=8600):
+    server = ThreadingHTTPServer((host, port), ApiHandler)
+    server.daemon_threads = True
+    start_warmer()
+    print(f"🚀 API listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HTTP API for the LinkedIn scrapers")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    args = parser.parse_args()
+    serve(args.host, args.port)
@@ -16,6 +16,9 @@ from companies_details_extraction.hr_scraper import get_hr_profiles
 from companies_details_extraction.email_predictor import extract_company_domain, predict_emails_from_profiles
 from companies_details_extraction.job_search import search_all_platforms
 from modules.job_search import render_job_search
+from modules.session_utils import render_browser_stats, start_script_run
+from companies_details_extraction.saved_searches import start_watcher
+from companies_details_extraction.cache_warmer import start_warmer
 
 # Initialize session state
 if 'companies' not in st.session_state:
@@ -40,6 +43,10 @@ if 'form_state' not in st.session_state:
 
 st.set_page_config(page_title="LinkedIn HR Scraper", layout="centered")
 st.title("HIRVANA prototype")
+start_script_run()
+start_watcher()
+start_warmer()
+render_browser_stats()
 
 # Single tab navigation
 search_mode = st.tabs([
@@ -0,0 +1,165 @@
+import os
+import shutil
+import threading
+import time
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: slots are only coordinated within this process
+    fcntl = None
+
+PROFILE_ROOT = os.environ.get(
+    "BROWSER_PROFILE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "hirvana", "browser_profiles")
+)
+# Caches are cleared once a profile grows past this size; Chrome's own disk cache is capped below it
+PROFILE_MAX_MB = int(os.environ.get("BROWSER_PROFILE_MAX_MB", 300))
+DISK_CACHE_MB = max(16, PROFILE_MAX_MB // 2)
+# Profiles not used for this many days are deleted
+PROFILE_MAX_AGE_DAYS = int(os.environ.get("BROWSER_PROFILE_MAX_AGE_DAYS", 14))
+
+# Profile subdirectories that only hold re-downloadable cache data
+CACHE_DIRS = [
+    os.path.join("Default", "Cache"),
+    os.path.join("Default", "Code Cache"),
+    os.path.join("Default", "GPUCache"),
+    os.path.join("Default", "Service Worker", "CacheStorage"),
+    "ShaderCache",
+    "GrShaderCache"
+]
+# Left behind by Chrome processes that did not shut down cleanly
+CHROME_LOCK_FILES = ["SingletonLock", "SingletonCookie", "SingletonSocket"]
+
+
+def _dir_size_mb(path) -> float:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total / (1024 * 1024)
+
+
+class ProfileSlot:
+    """A reusable Chrome user-data directory held exclusively by one driver"""
+
+    def __init__(self, index, path, lock_file):
+        self.index = index
+        self.path = path
+        self._lock_file = lock_file
+
+    def chrome_arguments(self):
+        return [
+            f"--user-data-dir={self.path}",
+            f"--disk-cache-size={DISK_CACHE_MB * 1024 * 1024}"
+        ]
+
+
+class ProfileManager:
+    """
+    Hands out persistent user-data directories, one per live driver
+    Reusing a directory keeps Chrome's HTTP cache, cookies and consent state between
+    queries. Slots are locked with flock so several app processes never share a profile.
+    """
+
+    def __init__(self, root: str = PROFILE_ROOT):
+        self.root = root
+        self._lock = threading.Lock()
+        self._held = set()
+
+    def _slot_path(self, index):
+        return os.path.join(self.root, f"slot-{index}")
+
+    def _try_lock(self, index):
+        lock_file = open(os.path.join(self.root, f"slot-{index}.lock"), "a+")
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                return None
+        return lock_file
+
+    def acquire(self) -> Optional[ProfileSlot]:
+        """Lock the lowest free profile slot, or return None if profiles cannot be created"""
+        try:
+            os.makedirs(self.root, exist_ok=True)
+        except OSError as e:
+            print(f"Browser profiles disabled: {e}")
+            return None
+        with self._lock:
+            index = 0
+            while True:
+                if index not in self._held:
+                    lock_file = self._try_lock(index)
+                    if lock_file is not None:
+                        self._held.add(index)
+                        break
+                index += 1
+
+        path = self._slot_path(index)
+        os.makedirs(path, exist_ok=True)
+        for name in CHROME_LOCK_FILES:
+            try:
+                os.remove(os.path.join(path, name))
+            except OSError:
+                pass
+        self.enforce_size_limit(path)
+        os.utime(path)
+        return ProfileSlot(index, path, lock_file)
+
+    def release(self, slot: ProfileSlot):
+        """Unlock a slot once its browser has exited"""
+        if slot is None:
+            return
+        self.enforce_size_limit(slot.path)
+        try:
+            slot._lock_file.close()
+        except OSError:
+            pass
+        with self._lock:
+            self._held.discard(slot.index)
+
+    @staticmethod
+    def enforce_size_limit(path):
+        """Clear cache directories, and as a last resort the whole profile, when over PROFILE_MAX_MB"""
+        if _dir_size_mb(path) <= PROFILE_MAX_MB:
+            return
+        for cache_dir in CACHE_DIRS:
+            shutil.rmtree(os.path.join(path, cache_dir), ignore_errors=True)
+        if _dir_size_mb(path) > PROFILE_MAX_MB:
+            shutil.rmtree(path, ignore_errors=True)
+            os.makedirs(path, exist_ok=True)
+
+    def cleanup(self):
+        """Trim oversized profiles and delete stale ones that no driver holds"""
+        if not os.path.isdir(self.root):
+            return
+        cutoff = time.time() - PROFILE_MAX_AGE_DAYS * 24 * 3600
+        for name in os.listdir(self.root):
+            if not name.startswith("slot-") or name.endswith(".lock"):
+                continue
+            try:
+                index = int(name.split("-", 1)[1])
+            except ValueError:
+                continue
+            with self._lock:
+                if index in self._held:
+                    continue
+                lock_file = self._try_lock(index)
+            if lock_file is None:
+                continue
+            try:
+                path = self._slot_path(index)
+                if os.path.getmtime(path) < cutoff:
+                    shutil.rmtree(path, ignore_errors=True)
+                else:
+                    self.enforce_size_limit(path)
+            finally:
+                lock_file.close()
+
+
+profiles = ProfileManager()
@@ -0,0 +1,166 @@
+import contextvars
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any
+from companies_details_extraction.cancellation import current_token
+
+# Lower value means served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_NORMAL = 5
+PRIORITY_BATCH = 10
+
+# Every Streamlit session runs in the same server process, so one scheduler
+# per process caps the browsers launched on the host by all sessions together
+MAX_BROWSERS = int(os.environ.get("MAX_BROWSERS", max(2, (os.cpu_count() or 4) // 2)))
+
+# Waiting requests gain one priority level per AGING_SECONDS so batch work is never starved
+AGING_SECONDS = 30
+
+_scheduling = contextvars.ContextVar("browser_scheduling", default={})
+
+
+class _Ticket:
+    def __init__(self, seq, session_id, priority):
+        self.seq = seq
+        self.session_id = session_id
+        self.priority = priority
+        self.enqueued_at = time.time()
+
+
+class BrowserScheduler:
+    """
+    Admission control for browser instances
+    Callers wait in a queue until a browser slot is free. Higher priority requests are
+    admitted first, and requests of equal priority are served round-robin across sessions.
+    """
+
+    def __init__(self, max_browsers: int = MAX_BROWSERS):
+        self.max_browsers = max_browsers
+        self._condition = threading.Condition()
+        self._active = 0
+        self._waiting = []
+        self._seq = itertools.count()
+        self._served = itertools.count()
+        self._last_served = {}
+
+    def _queue_order(self):
+        now = time.time()
+        per_session = {}
+        keyed = []
+        for ticket in sorted(self._waiting, key=lambda t: t.seq):
+            # The n-th waiting request of a session queues behind every other session's (n-1)-th
+            turn = per_session.get(ticket.session_id, 0)
+            per_session[ticket.session_id] = turn + 1
+            effective_priority = ticket.priority - int((now - ticket.enqueued_at) // AGING_SECONDS)
+            last_served = self._last_served.get(ticket.session_id, -1)
+            keyed.append(((effective_priority, turn, last_served, ticket.seq), ticket))
+        return [ticket for _, ticket in sorted(keyed, key=lambda item: item[0])]
+
+    def acquire(self, session_id=None, priority: int = PRIORITY_NORMAL, on_wait=None):
+        """
+        Block until a browser slot is granted
+        Args:
+            session_id: Identifier of the requesting session, used for fair queuing
+            priority: One of the PRIORITY_* constants
+            on_wait: Optional callback called with the 1-based queue position while waiting,
+                and with 0 once the slot is granted
+        Raises:
+            ScrapeCancelled: If the active cancellation token fires while waiting
+        """
+        cancel_token = current_token()
+        with self._condition:
+            ticket = _Ticket(next(self._seq), session_id, priority)
+            self._waiting.append(ticket)
+
+        last_position = None
+        try:
+            while True:
+                cancel_token.check()
+                with self._condition:
+                    order = self._queue_order()
+                    if self._active < self.max_browsers and order[0] is ticket:
+                        self._waiting.remove(ticket)
+                        self._active += 1
+                        self._last_served[ticket.session_id] = next(self._served)
+                        self._condition.notify_all()
+                        break
+                    position = order.index(ticket) + 1
+
+                if on_wait and position != last_position:
+                    on_wait(position)
+                    last_position = position
+
+                with self._condition:
+                    self._condition.wait(timeout=1.0)
+        except BaseException:
+            with self._condition:
+                if ticket in self._waiting:
+                    self._waiting.remove(ticket)
+                self._condition.notify_all()
+            raise
+
+        if on_wait and last_position is not None:
+            on_wait(0)
+
+    def release(self):
+        """Return a browser slot to the pool"""
+        with self._condition:
+            self._active -= 1
+            self._condition.notify_all()
+
+    def resize(self, max_browsers: int):
+        """Change the browser cap, e.g. as remote WebDriver capacity comes and goes"""
+        with self._condition:
+            if max_browsers != self.max_browsers:
+                self.max_browsers = max_browsers
+                self._condition.notify_all()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return the number of active browsers, queued requests and the browser cap"""
+        with self._condition:
+            return {
+                "active": self._active,
+                "queued": len(self._waiting),
+                "max_browsers": self.max_browsers
+            }
+
+
+scheduler = BrowserScheduler()
+
+
+@contextmanager
+def scheduling_context(session_id=None, priority: int = None, on_wait=None):
+    """
+    Set the session, priority and queue callback used by browser_slot() in this context
+    Scrapers pick these up automatically, so callers do not need to pass them through.
+    """
+    settings = dict(_scheduling.get())
+    if session_id is not None:
+        settings["session_id"] = session_id
+    if priority is not None:
+        settings["priority"] = priority
+    if on_wait is not None:
+        settings["on_wait"] = on_wait
+    token = _scheduling.set(settings)
+    try:
+        yield
+    finally:
+        _scheduling.reset(token)
+
+
+@contextmanager
+def browser_slot(priority: int = None):
+    """Hold one of the host's browser slots for the duration of the block"""
+    settings = _scheduling.get()
+    scheduler.acquire(
+        session_id=settings.get("session_id"),
+        priority=priority if priority is not None else settings.get("priority", PRIORITY_NORMAL),
+        on_wait=settings.get("on_wait")
+    )
+    try:
+        yield
+    finally:
+        scheduler.release()
@@ -0,0 +1,160 @@
+"""
+Background warmer that refreshes popular cached searches during off-peak hours
+
+The most requested calls in the query popularity log (plus the app's default searches)
+are re-run before their cached results expire, so peak-hour users get cache hits.
+Refreshes queue for browsers at batch priority and are spaced out to stay within
+WARM_MAX_PER_HOUR.
+
+WARM_HOURS sets the off-peak window in local hours, e.g. "1-6" or "22-5"; the default
+"auto" picks the quietest hours of the logged traffic.
+"""
+import importlib
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from companies_details_extraction.browser_scheduler import PRIORITY_BATCH, scheduling_context
+from companies_details_extraction.cancellation import cancellation_scope
+from companies_details_extraction.result_cache import CACHE_TTL, CACHED_FUNCTIONS, cache_age, get_cache_key, query_log
+from companies_details_extraction.scrape_logging import request_scope
+
+WARM_TOP_N = int(os.environ.get("WARM_TOP_N", 20))
+WARM_MAX_PER_HOUR = int(os.environ.get("WARM_MAX_PER_HOUR", 30))
+WARM_HOURS = os.environ.get("WARM_HOURS", "auto")
+# Entries expiring within this many seconds are refreshed
+WARM_LEAD = 6 * 3600
+WARM_CHECK_INTERVAL = 300
+WARM_FETCH_TIMEOUT = 300
+# "auto" uses this many quietest hours once enough traffic is logged, else DEFAULT_OFF_PEAK_HOURS
+OFF_PEAK_HOUR_COUNT = 6
+MIN_LOGGED_REQUESTS = 100
+DEFAULT_OFF_PEAK_HOURS = [1, 2, 3, 4, 5]
+
+# Searches the app runs with its default form values, warmed even before anyone asks for them
+DEFAULT_QUERIES = [
+    {"func": "search_linkedin_jobs", "args": ["Software Developer", "Ahmedabad", False, 10], "kwargs": {}},
+    {"func": "search_indeed_jobs", "args": ["Software Developer", "Ahmedabad", False, 10], "kwargs": {}},
+    {"func": "get_linkedin_company_links", "args": ["Ahmedabad", "IT OR Software", 10], "kwargs": {}}
+]
+DEFAULT_QUERY_COUNT = 1.0
+
+# Modules whose @cache_results functions the warmer re-runs; loading them registers the functions
+CACHED_MODULES = ("company_scraper", "hr_scraper", "job_search")
+for module_name in CACHED_MODULES:
+    importlib.import_module(f"companies_details_extraction.{module_name}")
+
+
+def parse_hours(spec: str) -> Optional[List[int]]:
+    """Hours of the day in a "start-end" window (end exclusive, may wrap midnight), None for "auto" """
+    if not spec or spec == "auto":
+        return None
+    start, end = (int(hour) % 24 for hour in spec.split("-"))
+    return [(start + offset) % 24 for offset in range((end - start) % 24 or 24)]
+
+
+def off_peak_hours() -> List[int]:
+    hours = parse_hours(WARM_HOURS)
+    if hours is not None:
+        return hours
+    traffic = query_log.hourly_traffic()
+    if sum(traffic) < MIN_LOGGED_REQUESTS:
+        return DEFAULT_OFF_PEAK_HOURS
+    return sorted(sorted(range(24), key=lambda hour: traffic[hour])[:OFF_PEAK_HOUR_COUNT])
+
+
+class CacheWarmer:
+    """Refreshes the most popular cached calls whose results are missing or about to expire"""
+
+    def __init__(self, top_n: int = WARM_TOP_N, max_per_hour: int = WARM_MAX_PER_HOUR):
+        self.top_n = top_n
+        self.spacing = 3600 / max(1, max_per_hour)
+        self._lock = threading.Lock()
+        self._next_fetch_at = 0.0
+        self._attempted = {}
+        self.stats = {"refreshed": 0, "incomplete": 0, "failed": 0, "last_refresh": None}
+
+    def candidates(self) -> List[Dict[str, Any]]:
+        """Popular calls due for a refresh, most popular first"""
+        entries = {}
+        for entry in DEFAULT_QUERIES + query_log.top(self.top_n):
+            key = get_cache_key(entry["func"], *entry["args"], **entry["kwargs"])
+            count = max(entry.get("count", DEFAULT_QUERY_COUNT), entries[key]["count"] if key in entries else 0)
+            entries[key] = dict(entry, key=key, count=count)
+
+        now = time.time()
+        due = []
+        for entry in sorted(entries.values(), key=lambda e: e["count"], reverse=True)[:self.top_n]:
+            if entry["func"] not in CACHED_FUNCTIONS:
+                continue
+            age = cache_age(entry["func"], tuple(entry["args"]), entry["kwargs"])
+            # A refresh that did not stick (cut short or failed) is not retried until the next window
+            if now - self._attempted.get(entry["key"], 0) < WARM_LEAD:
+                continue
+            if age is None or age > CACHE_TTL - WARM_LEAD:
+                due.append(entry)
+        return due
+
+    def refresh(self, entry: Dict[str, Any]) -> bool:
+        """Re-run one cached call; returns True if a complete result was cached"""
+        self._attempted[entry["key"]] = time.time()
+        try:
+            with scheduling_context(session_id="cache-warmer", priority=PRIORITY_BATCH), cancellation_scope(WARM_FETCH_TIMEOUT), \
+                    request_scope():
+                results = CACHED_FUNCTIONS[entry["func"]].refresh(*entry["args"], **entry["kwargs"])
+        except Exception as e:
+            print(f"Error warming {entry['func']}{tuple(entry['args'])}: {e}")
+            self.stats["failed"] += 1
+            return False
+        if not getattr(results, "complete", True):
+            self.stats["incomplete"] += 1
+            return False
+        print(f"♨️ Warmed {entry['func']}{tuple(entry['args'])}: {len(results)} results")
+        self.stats["refreshed"] += 1
+        self.stats["last_refresh"] = time.time()
+        return True
+
+    def warm(self) -> int:
+        """Refresh due entries while in the off-peak window and within the rate budget"""
+        with self._lock:
+            refreshed = 0
+            for entry in self.candidates():
+                now = time.time()
+                if datetime.fromtimestamp(now).hour not in off_peak_hours():
+                    break
+                if now < self._next_fetch_at:
+                    time.sleep(self._next_fetch_at - now)
+                self._next_fetch_at = time.time() + self.spacing
+                refreshed += self.refresh(entry)
+            return refreshed
+
+    def get_stats(self) -> Dict[str, Any]:
+        return dict(self.stats, off_peak_hours=off_peak_hours(), due=len(self.candidates()))
+
+
+warmer = CacheWarmer()
+
+_thread = None
+_thread_lock = threading.Lock()
+
+
+def _run():
+    while True:
+        try:
+            warmer.warm()
+        except Exception as e:
+            print(f"Error in cache warmer: {e}")
+        time.sleep(WARM_CHECK_INTERVAL)
+
+
+def start_warmer() -> Optional[threading.Thread]:
+    """Start the background cache warmer; safe to call repeatedly. Disabled when WARM_MAX_PER_HOUR is 0."""
+    global _thread
+    if WARM_MAX_PER_HOUR <= 0:
+        return None
+    with _thread_lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_run, name="cache-warmer", daemon=True)
+            _thread.start()
+    return _thread
@@ -0,0 +1,118 @@
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterable, Optional
+
+# Longest single sleep while waiting, so cancellation of an enclosing token is noticed promptly
+POLL_INTERVAL = 0.25
+
+_current_token = contextvars.ContextVar("cancel_token", default=None)
+
+
+class ScrapeCancelled(Exception):
+    """Raised from blocking calls (browser queue, page loads) once the active token is cancelled"""
+
+
+class CancelToken:
+    """
+    Cancellation flag with an optional deadline
+    A token is also cancelled when any of its parents is, so a scrape started under a
+    Streamlit run stops both at its own deadline and when the run is abandoned.
+    """
+
+    def __init__(self, timeout: Optional[float] = None, parents: Iterable["CancelToken"] = ()):
+        self.deadline = time.monotonic() + timeout if timeout else None
+        self.parents = [parent for parent in parents if parent is not None]
+        self._event = threading.Event()
+        self._reason = None
+
+    def cancel(self, reason: str = "cancelled"):
+        if not self._event.is_set():
+            self._reason = reason
+            self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        if self._event.is_set():
+            return True
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            self.cancel("deadline exceeded")
+            return True
+        for parent in self.parents:
+            if parent.cancelled:
+                self.cancel(parent.reason)
+                return True
+        return False
+
+    @property
+    def reason(self) -> Optional[str]:
+        return self._reason if self.cancelled else None
+
+    def remaining(self) -> Optional[float]:
+        """Seconds until the nearest deadline of this token or its parents, None if unbounded"""
+        deadlines = [self.deadline - time.monotonic()] if self.deadline is not None else []
+        deadlines += [r for r in (parent.remaining() for parent in self.parents) if r is not None]
+        return max(0.0, min(deadlines)) if deadlines else None
+
+    def wait(self, seconds: float) -> bool:
+        """Sleep for up to seconds, returning early (True) if the token is cancelled"""
+        end = time.monotonic() + seconds
+        while not self.cancelled:
+            left = end - time.monotonic()
+            if left <= 0:
+                return False
+            remaining = self.remaining()
+            if remaining is not None:
+                left = min(left, remaining)
+            self._event.wait(min(left, POLL_INTERVAL))
+        return True
+
+    def check(self):
+        """Raise ScrapeCancelled if the token is cancelled"""
+        if self.cancelled:
+            raise ScrapeCancelled(self.reason)
+
+
+# Returned when no scope is active; nothing ever cancels it
+_NEVER = CancelToken()
+
+
+def current_token() -> CancelToken:
+    """Token of the innermost cancellation_scope in this context"""
+    return _current_token.get() or _NEVER
+
+
+@contextmanager
+def cancellation_scope(timeout: Optional[float] = None, cancel_token: Optional[CancelToken] = None):
+    """
+    Run the block under a token that combines the caller's timeout and token with any enclosing scope
+    Blocking helpers (settle, the browser queue, pooled page loads) pick the token up from context.
+    """
+    token = CancelToken(timeout, parents=[cancel_token, _current_token.get()])
+    reset = _current_token.set(token)
+    try:
+        yield token
+    finally:
+        _current_token.reset(reset)
+
+
+def context_with_token(token: CancelToken) -> contextvars.Context:
+    """Copy of the current context with token active, for running work on another thread"""
+    ctx = contextvars.copy_context()
+    ctx.run(_current_token.set, token)
+    return ctx
+
+
+class ScrapeResult(list):
+    """List of scraped items that records whether the scrape ran to completion"""
+
+    def __init__(self, items=(), complete: bool = True, reason: Optional[str] = None):
+        super().__init__(items)
+        self.complete = complete
+        self.reason = reason
+
+    @classmethod
+    def from_token(cls, items, token: CancelToken):
+        """Items gathered under token, marked incomplete if the token stopped the scrape"""
+        return cls(items, complete=not token.cancelled, reason=token.reason)
@@ -0,0 +1,117 @@
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List
+from companies_details_extraction.domain_resolver import normalize_company_key
+
+# Two names whose character trigram sets overlap at least this much are treated as the same company
+SIMILARITY_THRESHOLD = 0.8
+# Words ignored when building acronyms, e.g. "Bank of Baroda" -> "bb"
+ACRONYM_STOPWORDS = {"of", "and", "the", "for", "in", "at", "&"}
+MAX_ACRONYM_LENGTH = 6
+
+
+def normalize_company_name(name: str) -> str:
+    """'The Tata Consultancy Services Ltd.' -> 'tata consultancy services'"""
+    text = re.sub(r"&", " and ", str(name or ""))
+    tokens = normalize_company_key(text).split()
+    if len(tokens) > 1 and tokens[0] == "the":
+        tokens = tokens[1:]
+    return " ".join(tokens)
+
+
+def company_acronyms(normalized: str) -> set:
+    """Acronyms of a multi-word name with and without stopwords: 'bank of baroda' -> {'bb', 'bob'}"""
+    tokens = normalized.split()
+    if len(tokens) < 2:
+        return set()
+    significant = [token for token in tokens if token not in ACRONYM_STOPWORDS]
+    candidates = {"".join(token[0] for token in tokens), "".join(token[0] for token in significant)}
+    return {acronym for acronym in candidates if 1 < len(acronym) <= MAX_ACRONYM_LENGTH}
+
+
+def _trigrams(normalized: str) -> set:
+    compact = f"  {normalized.replace(' ', '')} "
+    return {compact[i:i + 3] for i in range(len(compact) - 2)}
+
+
+class DisjointSet:
+    def __init__(self, items):
+        self.parent = {item: item for item in items}
+
+    def find(self, item):
+        while self.parent[item] != item:
+            self.parent[item] = self.parent[self.parent[item]]
+            item = self.parent[item]
+        return item
+
+    def union(self, a, b):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            self.parent[root_b] = root_a
+
+
+def cluster_company_names(names: Iterable[str]) -> Dict[str, List[str]]:
+    """
+    Group spellings of the same company
+    Names match when they normalize identically, when their character trigrams are similar,
+    or when one is the acronym of the other ("TCS" / "Tata Consultancy Services"). An acronym
+    is only attached when a single company in the input matches it, so "HP" next to both
+    "Hewlett Packard" and "Hindustan Petroleum" stays on its own and never joins the two.
+    Candidate pairs come from an inverted trigram index, so names are never compared pairwise.
+    Args:
+        names: Company names as entered by the user, duplicates allowed
+    Returns:
+        {canonical name: [every input spelling in the cluster, in input order]}
+        The canonical name is the most frequent spelling; ties go to full names over
+        acronyms, then to the shortest spelling, which searches best as an exact phrase.
+    """
+    names = [str(name) for name in names if str(name or "").strip()]
+    spellings = list(dict.fromkeys(names))
+    normalized = {name: normalize_company_name(name) or name.lower() for name in spellings}
+    keys = list(dict.fromkeys(normalized.values()))
+    groups = DisjointSet(keys)
+
+    # Trigram similarity through an inverted index
+    trigram_sets = {key: _trigrams(key) for key in keys}
+    index = defaultdict(list)
+    for key, grams in trigram_sets.items():
+        for gram in grams:
+            index[gram].append(key)
+    for key, grams in trigram_sets.items():
+        shared = Counter(other for gram in grams for other in index[gram] if other > key)
+        for other, overlap in shared.items():
+            union_size = len(grams) + len(trigram_sets[other]) - overlap
+            if union_size and overlap / union_size >= SIMILARITY_THRESHOLD:
+                groups.union(key, other)
+
+    # Acronyms of multi-word names against single-token names, once spelling variants are grouped
+    by_acronym = defaultdict(list)
+    for key in keys:
+        for acronym in company_acronyms(key):
+            by_acronym[acronym].append(key)
+    acronym_keys = set()
+    for key in keys:
+        if " " in key:
+            continue
+        matches = {groups.find(match) for match in by_acronym.get(key, [])}
+        if len(matches) == 1:
+            groups.union(matches.pop(), key)
+            acronym_keys.add(key)
+
+    counts = Counter(names)
+    clusters = defaultdict(list)
+    for name in spellings:
+        clusters[groups.find(normalized[name])].append(name)
+    return {
+        max(members, key=lambda name: (counts[name], normalized[name] not in acronym_keys, -len(name))): members
+        for members in clusters.values()
+    }
+
+
+def resolve_aliases(names: Iterable[str]) -> Dict[str, str]:
+    """Map every input spelling to its cluster's canonical name"""
+    return {
+        alias: canonical
+        for canonical, aliases in cluster_company_names(names).items()
+        for alias in aliases
+    }
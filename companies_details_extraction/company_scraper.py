@@ -1,81 +1,101 @@
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
-from urllib.parse import quote
 import time
-from concurrent.futures import ThreadPoolExecutor
+from companies_details_extraction.query_planner import planner
+from companies_details_extraction.search_engines import hedged_fetch
+from companies_details_extraction.cancellation import ScrapeCancelled, ScrapeResult, cancellation_scope
+from companies_details_extraction.result_cache import cache_results
+from companies_details_extraction.scrape_logging import get_logger
 
+logger = get_logger(__name__)
 
-def get_linkedin_company_links(location, domain, num_companies=10):
+# Result pages (or DuckDuckGo scroll rounds) loaded per query template
+MAX_ATTEMPTS = 3
+
+
+def is_company_link(href):
+    return bool(href) and 'linkedin.com/company/' in href and 'linkedin.com/company/jobs' not in href
+
+
+def has_company_links(page):
+    return not page.get("blocked") and any(is_company_link(result["href"]) for result in page["results"])
+
+
+@cache_results
+def get_linkedin_company_links(location, domain, num_companies=10, timeout=None, cancel_token=None):
     """
     Search for LinkedIn company links based on location and domain
     Args:
         location: Location to search for
         domain: Domain/Industry to search for
         num_companies: Number of companies to retrieve (default: 10)
+        timeout: Seconds after which to stop and return what was found so far (optional)
+        cancel_token: CancelToken that stops the search early when cancelled (optional)
     Returns:
-        List of LinkedIn company URLs
+        ScrapeResult of LinkedIn company URLs, with complete set to False if cut short;
+        complete results are cached for 24 hours
     """
-    search_queries = [
-        f"site:linkedin.com/company {domain} {location}",
-        f"site:linkedin.com/company \"{domain}\" \"{location}\"",
-        f"site:linkedin.com/company {domain} company {location}",
-        f"site:linkedin.com/company {domain} in {location}"
-    ]
+    # Templates ordered by how many new companies they produced for this domain and location before
+    templates = planner.plan(domain, location)
     
     company_links = []
     seen_links = set()  # To avoid duplicates
     
-    # Headless browser options
-    chrome_options = Options()
-    chrome_options.add_argument('--headless')
-    chrome_options.add_argument('--disable-gpu')
-    chrome_options.add_argument('--no-sandbox')
-    chrome_options.add_argument('--disable-dev-shm-usage')
-    chrome_options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36')
-    
-    try:
-        driver = webdriver.Chrome(options=chrome_options)
-
-        for search_query in search_queries:
-            if len(company_links) >= num_companies:
+    def add_links(results):
+        for result in results:
+            href = result['href']
+            if is_company_link(href) and href not in seen_links:
+                seen_links.add(href)
+                company_links.append(href)
+                logger.debug("Found company link", extra={"link": href})
+
+    def consume(engine, driver, page):
+        """Take the winning page and load up to MAX_ATTEMPTS pages' worth of results from it"""
+        add_links(page["results"])
+        attempt = 1
+        while len(company_links) < num_companies and attempt < MAX_ATTEMPTS and not token.cancelled:
+            if engine.name == "duckduckgo":
+                # DuckDuckGo does not paginate by URL; scrolling loads more results
+                engine.scroll(driver)
+                page = engine.extract(driver)
+            elif page["next_page"]:
+                page = engine.fetch(driver, search_query, url=page["next_page"])
+            else:
                 break
+            attempt += 1
+            links_before = len(company_links)
+            add_links(page["results"])
+            if len(company_links) == links_before:
+                break
+        return attempt
 
-            search_url = f"https://duckduckgo.com/?q={quote(search_query)}&t=h_&ia=web"
-            driver.get(search_url)
-            attempt = 0
-
-            def process_element(element):
-                href = element.get_attribute('href')
-                if href and 'linkedin.com/company/' in href and 'linkedin.com/company/jobs' not in href:
-                    if href not in seen_links:
-                        seen_links.add(href)
-                        company_links.append(href)
-                        print(f"Found company link: {href}")
-
-            while len(company_links) < num_companies and attempt < 3:
-                time.sleep(1.5)
-
-                for _ in range(3):
-                    driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                    time.sleep(1)
-
-                elements = driver.find_elements(By.CSS_SELECTOR, 'a[href*="linkedin.com/company/"]:not([href*="jobs"])')
-                with ThreadPoolExecutor(max_workers=4) as executor:
-                    executor.map(process_element, elements)
-
-                attempt += 1  # DuckDuckGo may not support deep pagination
-                if len(elements) == 0:
+    with cancellation_scope(timeout, cancel_token) as token:
+        try:
+            for template in templates:
+                if len(company_links) >= num_companies or token.cancelled:
                     break
 
-        driver.quit()
-        return company_links[:num_companies]
-
-    except Exception as e:
-        print(f"Error details: {str(e)}")
-        if 'driver' in locals():
-            driver.quit()
-        return []
+                search_query = template.format(domain=domain, location=location)
+                started_at = time.time()
+                links_before = len(company_links)
+                # DuckDuckGo first, hedged with Bing when it is slow or blocked
+                engine, attempt = hedged_fetch(search_query, ["duckduckgo", "bing"], usable=has_company_links, consume=consume)
+                if not token.cancelled:
+                    # A template no engine had anything for is recorded as a run with no new links, so it can be pruned
+                    planner.record(domain, location, template, attempt or 1, len(company_links) - links_before, time.time() - started_at)
+                logger.info("Query template finished", extra={
+                    "template": template, "engine": engine.name if engine else None,
+                    "new_links": len(company_links) - links_before
+                })
+
+        except ScrapeCancelled:
+            pass
+        except Exception as e:
+            logger.exception("Company search failed", extra={"domain": domain, "location": location})
+            return ScrapeResult(complete=False, reason=str(e))
+
+        if token.cancelled and len(company_links) < num_companies:
+            logger.warning("Company search stopped early", extra={"reason": token.reason, "companies": len(company_links)})
+            return ScrapeResult(company_links, complete=False, reason=token.reason)
+        return ScrapeResult(company_links[:num_companies])
 
 
 def extract_company_name_from_url(url):
@@ -0,0 +1,244 @@
+import atexit
+import json
+import os
+import re
+import socket
+import threading
+import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from urllib.parse import urlparse, parse_qs, unquote
+import requests
+from companies_details_extraction.egress_pool import egress
+
+RESOLVER_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_FILE = os.path.join(RESOLVER_DIR, 'cache', 'domain_cache.json')
+KNOWN_DOMAINS_FILE = os.path.join(RESOLVER_DIR, 'known_domains.json')
+
+# Resolved domains are kept for 30 days, failed lookups are retried after a day
+POSITIVE_TTL = 30 * 24 * 3600
+NEGATIVE_TTL = 24 * 3600
+# The cache file is rewritten at most this often, and after every batch
+CACHE_SAVE_INTERVAL = 30
+
+# Legal suffixes dropped before building domain candidates
+LEGAL_SUFFIXES = {"ltd", "limited", "pvt", "private", "inc", "llp", "llc", "corp", "corporation", "co", "plc", "gmbh"}
+
+# Candidate top-level domains tried for DNS lookups, in order of preference
+CANDIDATE_TLDS = ["com", "in", "co.in", "io", "co"]
+
+# Domains that show up in company pages but never belong to the company itself
+IGNORED_DOMAINS = ("linkedin.com", "licdn.com", "bing.com", "duckduckgo.com", "google.com/maps")
+
+WEBSITE_PATTERNS = [
+    re.compile(r'data-tracking-control-name="about_website"[^>]*href="([^"]+)"'),
+    re.compile(r'href="([^"]+)"[^>]*data-tracking-control-name="about_website"'),
+    re.compile(r'"websiteUrl"\s*:\s*"([^"]+)"'),
+    re.compile(r'"companyPageUrl"\s*:\s*"([^"]+)"')
+]
+
+
+def normalize_company_key(company_name: str) -> str:
+    """Lowercase, strip accents, punctuation and legal suffixes: 'Acme Pvt. Ltd.' -> 'acme'"""
+    text = unicodedata.normalize("NFKD", company_name or "").encode("ascii", "ignore").decode()
+    tokens = re.findall(r"[a-z0-9]+", text.lower())
+    while len(tokens) > 1 and tokens[-1] in LEGAL_SUFFIXES:
+        tokens.pop()
+    return " ".join(tokens)
+
+
+def domain_from_url(url: str) -> str:
+    """Return the bare host of a URL without 'www.', unwrapping LinkedIn redirect links"""
+    if not url:
+        return ""
+    parsed = urlparse(url if "://" in url else f"http://{url}")
+    if "linkedin.com" in parsed.netloc and "redir" in parsed.path:
+        target = parse_qs(parsed.query).get("url", [""])[0]
+        return domain_from_url(unquote(target))
+    host = parsed.netloc.split("@")[-1].split(":")[0].lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def fetch_company_page(url: str) -> str:
+    """Fetch a company page over HTTP through a pooled egress identity, returning '' on failure"""
+    try:
+        with egress.http_session() as session:
+            # LinkedIn answers most plain HTTP clients with 999; that is not a verdict on the proxy
+            response = egress.session_request(session, "GET", url, score_blocks=False, timeout=5)
+        if response.ok:
+            return response.text
+    except requests.RequestException:
+        pass
+    return ""
+
+
+def dns_resolves(domain: str) -> bool:
+    try:
+        socket.getaddrinfo(domain, 80)
+        return True
+    except (socket.gaierror, UnicodeError):
+        return False
+
+
+class DomainResolver:
+    """
+    Resolve a company's real web domain
+    Sources are tried in order: persistent cache, known-mapping table, the company's
+    LinkedIn page and finally DNS checks of candidate domains built from the name.
+    Page fetching and DNS lookups are injectable so the resolver can run against local stand-ins.
+    """
+
+    def __init__(self, cache_path: str = CACHE_FILE, known_domains_path: str = KNOWN_DOMAINS_FILE,
+                 fetch_page=fetch_company_page, dns_lookup=dns_resolves):
+        self.cache_path = cache_path
+        self.fetch_page = fetch_page
+        self.dns_lookup = dns_lookup
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self._saved_at = time.time()
+        self.known_domains = self._load_json(known_domains_path)
+        self._cache = self._load_json(cache_path)
+
+    @staticmethod
+    def _load_json(path) -> Dict:
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_cache(self, text: str):
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        temp_path = f"{self.cache_path}.tmp"
+        with open(temp_path, 'w') as f:
+            f.write(text)
+        os.replace(temp_path, self.cache_path)
+
+    def flush(self):
+        """Write the cache file if anything was resolved since the last write"""
+        with self._lock:
+            if not self._dirty:
+                return
+            text = json.dumps(self._cache, indent=1)
+            self._dirty = False
+            self._saved_at = time.time()
+        with self._save_lock:
+            try:
+                self._save_cache(text)
+            except OSError as e:
+                print(f"Could not write domain cache: {e}")
+                with self._lock:
+                    self._dirty = True
+
+    def _cached(self, key) -> Optional[Dict]:
+        with self._lock:
+            entry = self._cache.get(key)
+        if entry and time.time() - entry["resolved_at"] < entry["ttl"]:
+            return entry
+        return None
+
+    def _remember(self, key, domain, source):
+        with self._lock:
+            self._cache[key] = {
+                "domain": domain,
+                "source": source,
+                "resolved_at": time.time(),
+                "ttl": POSITIVE_TTL if domain else NEGATIVE_TTL
+            }
+            self._dirty = True
+            due = time.time() - self._saved_at >= CACHE_SAVE_INTERVAL
+        if due:
+            self.flush()
+
+    def _from_company_page(self, company_url) -> str:
+        if not company_url:
+            return ""
+        html = self.fetch_page(company_url)
+        for pattern in WEBSITE_PATTERNS:
+            for match in pattern.finditer(html):
+                domain = domain_from_url(match.group(1).replace("&amp;", "&").replace("\\u002F", "/"))
+                if domain and not any(ignored in domain for ignored in IGNORED_DOMAINS):
+                    return domain
+        return ""
+
+    def candidate_domains(self, company_name, company_url=None) -> List[str]:
+        """
+        Domain guesses built from the company name and LinkedIn slug, best first
+        The first word alone is not guessed: 'sapphire.com' resolves for almost any "Sapphire ..." company.
+        """
+        stems = []
+        tokens = normalize_company_key(company_name).split()
+        if tokens:
+            stems.extend(["".join(tokens), "-".join(tokens)])
+        if company_url and "/company/" in company_url:
+            slug = company_url.split('/company/')[1].split('/')[0].lower()
+            stems.extend([slug.replace("-", ""), slug])
+        seen = []
+        for stem in stems:
+            for tld in CANDIDATE_TLDS:
+                domain = f"{stem}.{tld}"
+                if stem and domain not in seen:
+                    seen.append(domain)
+        return seen
+
+    def _from_dns(self, company_name, company_url) -> str:
+        for domain in self.candidate_domains(company_name, company_url):
+            if self.dns_lookup(domain):
+                return domain
+        return ""
+
+    def resolve(self, company_name: str, company_url: str = None) -> str:
+        """
+        Resolve the domain of one company
+        Args:
+            company_name: Company name as shown to the user
+            company_url: LinkedIn company URL (optional)
+        Returns:
+            Domain such as 'example.com', or '' if nothing could be found
+        """
+        key = normalize_company_key(company_name) or (company_url or "")
+        cached = self._cached(key)
+        if cached:
+            return cached["domain"]
+
+        if key in self.known_domains:
+            domain, source = self.known_domains[key], "known"
+        else:
+            domain, source = self._from_company_page(company_url), "company_page"
+            if not domain:
+                domain, source = self._from_dns(company_name, company_url), "dns"
+
+        self._remember(key, domain, source if domain else "unresolved")
+        return domain
+
+    def resolve_many(self, companies: Dict[str, str], max_workers: int = 8) -> Dict[str, str]:
+        """
+        Resolve the domains of a batch of companies concurrently
+        Args:
+            companies: {company name: LinkedIn company URL or ''}
+        Returns:
+            {company name: domain or ''}
+        """
+        names = list(companies)
+        if not names:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(names))) as executor:
+            domains = dict(zip(names, executor.map(lambda name: self.resolve(name, companies[name]), names)))
+        self.flush()
+        return domains
+
+
+resolver = DomainResolver()
+atexit.register(resolver.flush)
+
+
+def resolve_company_domain(company_name: str, company_url: str = None) -> str:
+    """Resolve a company's domain with the shared resolver"""
+    return resolver.resolve(company_name, company_url)
+
+
+def resolve_company_domains(companies: Dict[str, str]) -> Dict[str, str]:
+    """Resolve the domains of several companies concurrently with the shared resolver"""
+    return resolver.resolve_many(companies)
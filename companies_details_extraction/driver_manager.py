@@ -0,0 +1,422 @@
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from contextlib import contextmanager
+from typing import List, Dict, Any
+import atexit
+import os
+import signal
+import threading
+import time
+from companies_details_extraction.browser_scheduler import browser_slot
+from companies_details_extraction.serp_archive import ReplayDriver, replay_enabled
+from companies_details_extraction.browser_profiles import profiles
+from companies_details_extraction.cancellation import ScrapeCancelled, current_token
+from companies_details_extraction.egress_pool import egress, page_is_blocked, BLOCKED, FAILURE, SUCCESS
+from companies_details_extraction.remote_drivers import factory
+from companies_details_extraction.scrape_logging import get_logger
+
+logger = get_logger(__name__)
+
+# Recycle a driver after this many page loads or once its process tree uses this much memory
+MAX_NAVIGATIONS = int(os.environ.get("DRIVER_MAX_NAVIGATIONS", 50))
+MAX_RSS_MB = int(os.environ.get("DRIVER_MAX_RSS_MB", 1024))
+# Idle pooled drivers are closed after this many seconds
+IDLE_TIMEOUT = int(os.environ.get("DRIVER_IDLE_TIMEOUT", 300))
+WATCHDOG_INTERVAL = 30
+# Keep HTTP cache and cookies warm by giving each pooled driver a persistent profile
+USE_PERSISTENT_PROFILES = os.environ.get("BROWSER_PROFILES", "1") != "0"
+PROFILE_CLEANUP_INTERVAL = 3600
+
+# Chrome's own page load timeout, restored once a driver is used outside a deadline
+DEFAULT_PAGE_LOAD_TIMEOUT = 300
+
+BROWSER_PROCESS_NAMES = ("chromedriver", "chrome", "chromium", "chromium-browser", "google-chrome")
+# Orphans are re-parented to PID 1; only trust that when PID 1 is an init process and not our own app
+INIT_PROCESS_NAMES = ("init", "systemd", "tini", "dumb-init", "docker-init", "launchd")
+
+
+def build_chrome_options(profile_slot=None, identity=None) -> Options:
+    """
+    Return the headless Chrome options shared by all scrapers
+    Uses a persistent profile and an egress identity's proxy and user agent if given.
+    """
+    identity = identity or egress.identities[0]
+    chrome_options = Options()
+    chrome_options.add_argument('--headless')
+    chrome_options.add_argument('--disable-gpu')
+    chrome_options.add_argument('--no-sandbox')
+    chrome_options.add_argument('--disable-dev-shm-usage')
+    chrome_options.add_argument(f'--user-agent={identity.user_agent}')
+    if identity.proxy:
+        # Chrome takes no proxy credentials on the command line; use IP-allowlisted proxies for browsers
+        chrome_options.add_argument(f'--proxy-server={identity.chrome_proxy()}')
+
+    # Performance optimizations
+    chrome_options.add_argument('--disable-extensions')
+    chrome_options.add_argument('--disable-infobars')
+    chrome_options.add_argument('--disable-notifications')
+    chrome_options.add_argument('--blink-settings=imagesEnabled=false')  # Disable images
+
+    if profile_slot is not None:
+        for argument in profile_slot.chrome_arguments():
+            chrome_options.add_argument(argument)
+
+    return chrome_options
+
+
+def _read_proc_status(pid) -> Dict[str, str]:
+    status = {}
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                status[key] = value.strip()
+    except (OSError, ValueError):
+        pass
+    return status
+
+
+def _list_processes() -> Dict[int, Dict[str, Any]]:
+    """Return {pid: {'name', 'ppid', 'rss_kb'}} for all processes, empty where /proc is unavailable"""
+    processes = {}
+    if not os.path.isdir("/proc"):
+        return processes
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        status = _read_proc_status(entry)
+        if not status:
+            continue
+        processes[int(entry)] = {
+            "name": status.get("Name", ""),
+            "ppid": int(status.get("PPid", "0") or 0),
+            "rss_kb": int((status.get("VmRSS", "0 kB").split() or ["0"])[0])
+        }
+    return processes
+
+
+def _read_cmdline(pid) -> str:
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            return f.read().replace(b"\0", b" ").decode(errors="ignore")
+    except OSError:
+        return ""
+
+
+def _descendants(pid, processes) -> List[int]:
+    children = {}
+    for child_pid, info in processes.items():
+        children.setdefault(info["ppid"], []).append(child_pid)
+    found = []
+    stack = [pid]
+    while stack:
+        for child_pid in children.get(stack.pop(), []):
+            found.append(child_pid)
+            stack.append(child_pid)
+    return found
+
+
+def _kill(pids):
+    for pid in pids:
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except OSError:
+            pass
+
+
+def kill_orphaned_browsers() -> int:
+    """
+    Kill chromedriver/Chrome process trees left behind by crashed or killed runs
+    A browser process is orphaned when it was re-parented to init (ppid 1).
+    Returns:
+        Number of processes killed
+    """
+    processes = _list_processes()
+    if processes.get(1, {}).get("name") not in INIT_PROCESS_NAMES:
+        return 0
+    # Only headless/automated browsers, never a user's desktop Chrome
+    orphans = [
+        pid for pid, info in processes.items()
+        if info["ppid"] == 1 and info["name"] in BROWSER_PROCESS_NAMES
+        and (info["name"] == "chromedriver" or "--headless" in _read_cmdline(pid))
+    ]
+    victims = []
+    for pid in orphans:
+        victims.extend(_descendants(pid, processes))
+        victims.append(pid)
+    _kill(victims)
+    if victims:
+        logger.info("Killed orphaned browser processes", extra={"processes": len(victims)})
+    return len(victims)
+
+
+class ManagedDriver:
+    """Thin proxy around a WebDriver that counts navigations for recycling and scores its egress identity"""
+
+    def __init__(self, driver, profile_slot=None, identity=None, node=None):
+        self._driver = driver
+        self.profile_slot = profile_slot
+        self.identity = identity
+        # Remote WebDriver node the browser runs on, None when it is local
+        self.node = node
+        self.blocked = False
+        self.loading = False
+        self.navigations = 0
+        self.created_at = time.time()
+        self.last_used = time.time()
+        self._page_load_timeout = DEFAULT_PAGE_LOAD_TIMEOUT
+
+    def get(self, url):
+        """Navigate, refusing once the active token is cancelled and bounding the load by its deadline"""
+        token = current_token()
+        token.check()
+        remaining = token.remaining()
+        timeout = DEFAULT_PAGE_LOAD_TIMEOUT if remaining is None else max(1, min(DEFAULT_PAGE_LOAD_TIMEOUT, int(remaining) + 1))
+        if timeout != self._page_load_timeout:
+            self._driver.set_page_load_timeout(timeout)
+            self._page_load_timeout = timeout
+        self.navigations += 1
+        started_at = time.time()
+        self.loading = True
+        try:
+            result = self._driver.get(url)
+        except Exception as e:
+            # Page loads cut off by a deadline or an interrupt say nothing about the proxy
+            if token.cancelled:
+                raise ScrapeCancelled(token.reason) from e
+            egress.report(self.identity, FAILURE, time.time() - started_at)
+            raise
+        finally:
+            self.loading = False
+        # A blocked driver is retired after the lease so the next one gets a fresh identity
+        self.blocked = page_is_blocked(self._driver)
+        egress.report(self.identity, BLOCKED if self.blocked else SUCCESS, time.time() - started_at)
+        return result
+
+    def __getattr__(self, name):
+        return getattr(self._driver, name)
+
+    @property
+    def service_pid(self):
+        try:
+            return self._driver.service.process.pid
+        except AttributeError:
+            return None
+
+    def rss_mb(self, processes=None) -> float:
+        """Memory used by chromedriver and every browser process it spawned"""
+        pid = self.service_pid
+        if not pid:
+            return 0.0
+        processes = processes if processes is not None else _list_processes()
+        pids = [pid] + _descendants(pid, processes)
+        return sum(processes[p]["rss_kb"] for p in pids if p in processes) / 1024
+
+    def interrupt_load(self) -> bool:
+        """
+        Abort a page load in progress by killing the local browser, whose lease then retires it
+        Call only after cancelling the token the load runs under. Remote browsers are left to
+        their page load timeout.
+        """
+        pid = self.service_pid
+        if not self.loading or not pid:
+            return False
+        _kill(_descendants(pid, _list_processes()) + [pid])
+        return True
+
+    def is_alive(self) -> bool:
+        try:
+            self._driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def needs_recycling(self, processes=None) -> bool:
+        # A fresh browser only helps if it can get a different identity
+        if egress.rotating and (self.blocked or (self.identity is not None and self.identity.quarantined)):
+            return True
+        return self.navigations >= MAX_NAVIGATIONS or self.rss_mb(processes) >= MAX_RSS_MB
+
+    def quit(self):
+        pid = self.service_pid
+        processes = _list_processes() if pid else {}
+        try:
+            self._driver.quit()
+        except Exception as e:
+            logger.warning("Error quitting driver", extra={"error": str(e)})
+        # Make sure no browser process outlives a failed quit
+        if pid:
+            alive = _list_processes()
+            _kill([p for p in _descendants(pid, processes) + [pid] if p in alive])
+        # The profile can only be reused once its browser is gone
+        profiles.release(self.profile_slot)
+        self.profile_slot = None
+        egress.release(self.identity)
+        self.identity = None
+        factory.release(self.node)
+        self.node = None
+
+
+class DriverPool:
+    """
+    Pool of reusable drivers
+    Drivers are leased under a browser slot, returned to the pool after use and
+    recycled once they exceed the navigation or memory limits or sit idle too long.
+    New browsers are placed on remote WebDriver nodes when any are configured.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._idle = []
+        self._in_use = set()
+        self._recycled = 0
+
+    def _create(self):
+        # The node is reserved first: with no local fallback it raises when every node is full
+        node = factory.acquire()
+        identity = egress.acquire()
+        if node is not None:
+            try:
+                # Profile directories live on this host, so remote browsers start without one
+                return ManagedDriver(factory.start(node, build_chrome_options(None, identity)), None, identity, node)
+            except Exception as e:
+                if not factory.local_fallback:
+                    egress.release(identity)
+                    raise
+                logger.warning("Could not start a remote browser, starting it locally", extra={"node": node.name, "error": str(e)})
+
+        profile_slot = profiles.acquire() if USE_PERSISTENT_PROFILES else None
+        try:
+            driver = webdriver.Chrome(options=build_chrome_options(profile_slot, identity))
+            return ManagedDriver(driver, profile_slot, identity)
+        except Exception:
+            profiles.release(profile_slot)
+            egress.release(identity)
+            raise
+
+    def _retire(self, driver):
+        self._recycled += 1
+        driver.quit()
+
+    @contextmanager
+    def lease(self):
+        """Lease a driver for the duration of the block"""
+        if replay_enabled():
+            # Archived pages need neither a browser nor a browser slot
+            yield ReplayDriver()
+            return
+
+        with browser_slot():
+            driver = None
+            with self._lock:
+                if self._idle:
+                    driver = self._idle.pop()
+            if driver is not None and (driver.needs_recycling() or not driver.is_alive()):
+                self._retire(driver)
+                driver = None
+            if driver is None:
+                # The slot may have been granted just as the scrape was cancelled
+                current_token().check()
+                driver = self._create()
+
+            with self._lock:
+                self._in_use.add(driver)
+            healthy = False
+            try:
+                yield driver
+                healthy = True
+            finally:
+                with self._lock:
+                    self._in_use.discard(driver)
+                driver.last_used = time.time()
+                if healthy and not driver.needs_recycling():
+                    with self._lock:
+                        self._idle.append(driver)
+                else:
+                    self._retire(driver)
+
+    def reap(self):
+        """Close idle drivers that timed out or exceed the recycling limits"""
+        processes = _list_processes()
+        now = time.time()
+        with self._lock:
+            expired = [
+                driver for driver in self._idle
+                if now - driver.last_used > IDLE_TIMEOUT or driver.needs_recycling(processes)
+            ]
+            self._idle = [driver for driver in self._idle if driver not in expired]
+        for driver in expired:
+            self._retire(driver)
+
+    def shutdown(self):
+        """Quit every pooled driver"""
+        with self._lock:
+            drivers = self._idle + list(self._in_use)
+            self._idle = []
+            self._in_use = set()
+        for driver in drivers:
+            driver.quit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return live browser counts and memory usage"""
+        processes = _list_processes()
+        with self._lock:
+            idle = list(self._idle)
+            in_use = list(self._in_use)
+        drivers = [("idle", driver) for driver in idle] + [("in_use", driver) for driver in in_use]
+        details = [
+            {
+                "state": state,
+                "navigations": driver.navigations,
+                "identity": driver.identity.name if driver.identity else None,
+                "node": driver.node.name if driver.node else "local",
+                "age_seconds": round(time.time() - driver.created_at),
+                "rss_mb": round(driver.rss_mb(processes), 1)
+            }
+            for state, driver in drivers
+        ]
+        return {
+            "live_browsers": len(drivers),
+            "in_use": len(in_use),
+            "idle": len(idle),
+            "recycled": self._recycled,
+            "remote": sum(driver.node is not None for _, driver in drivers),
+            "total_rss_mb": round(sum(detail["rss_mb"] for detail in details), 1),
+            "drivers": details,
+            "nodes": factory.get_stats()
+        }
+
+
+pool = DriverPool()
+
+
+def lease_driver():
+    """Lease a pooled driver, e.g. `with lease_driver() as driver:`"""
+    return pool.lease()
+
+
+def get_driver_stats() -> Dict[str, Any]:
+    return pool.get_stats()
+
+
+def _watchdog():
+    last_profile_cleanup = 0
+    while True:
+        time.sleep(WATCHDOG_INTERVAL)
+        try:
+            pool.reap()
+            if USE_PERSISTENT_PROFILES and time.time() - last_profile_cleanup > PROFILE_CLEANUP_INTERVAL:
+                profiles.cleanup()
+                last_profile_cleanup = time.time()
+        except Exception:
+            logger.exception("Driver watchdog error")
+
+
+def _shutdown():
+    pool.shutdown()
+    kill_orphaned_browsers()
+
+
+kill_orphaned_browsers()
+atexit.register(_shutdown)
+threading.Thread(target=_watchdog, name="driver-watchdog", daemon=True).start()
@@ -0,0 +1,286 @@
+"""
+Pool of egress identities (proxy + user agent) shared by browsers and HTTP lookups
+
+Identities are read from the JSON file at EGRESS_CONFIG:
+    {
+        "include_direct": false,
+        "identities": [
+            {"name": "proxy-a", "proxy": "http://10.0.0.5:3128", "user_agent": "Mozilla/5.0 ..."},
+            {"name": "proxy-b", "proxy": "socks5://10.0.0.6:1080"}
+        ]
+    }
+Without a config file every request leaves directly, as a single "direct" identity.
+Identities without a user_agent get one from DEFAULT_USER_AGENTS.
+
+Run `python -m companies_details_extraction.egress_pool --probe http://127.0.0.1:8000/`
+to check every identity against a URL, e.g. a local stub behind local stand-in proxies.
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+import requests
+
+EGRESS_CONFIG = os.environ.get(
+    "EGRESS_CONFIG",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "egress.json")
+)
+
+DEFAULT_USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36 Edg/123.0.0.0"
+]
+
+# Health is an exponentially weighted success rate; each outcome moves it by this much
+HEALTH_ALPHA = 0.2
+# Quarantine an identity whose health drops below this or that is blocked this many times in a row
+QUARANTINE_HEALTH = 0.5
+QUARANTINE_CONSECUTIVE_BLOCKS = 3
+# First quarantine lasts this long, doubling on every repeat up to the maximum
+QUARANTINE_SECONDS = int(os.environ.get("EGRESS_QUARANTINE_SECONDS", 120))
+MAX_QUARANTINE_SECONDS = 3600
+# Health an identity restarts with after quarantine, so one more block sends it back
+PROBATION_HEALTH = 0.6
+# Throughput is reported over this window
+THROUGHPUT_WINDOW = 300
+
+# HTTP statuses search engines and LinkedIn answer with when they block a client
+BLOCK_STATUSES = (403, 429, 999)
+
+# Runs in the page and reports whether it is a block or challenge page instead of content
+BLOCK_CHECK_SCRIPT = """
+const text = ((document.title || '') + ' ' + (document.body ? document.body.innerText.slice(0, 2000) : '')).toLowerCase();
+return /captcha|unusual traffic|are you a robot|verify you are (a )?human|access denied|too many requests/.test(text);
+"""
+
+SUCCESS = "success"
+BLOCKED = "blocked"
+FAILURE = "failure"
+
+
+class EgressIdentity:
+    """One proxy (or the direct connection) with its user agent and health record"""
+
+    def __init__(self, name: str, proxy: Optional[str], user_agent: str):
+        self.name = name
+        self.proxy = proxy
+        self.user_agent = user_agent
+        self.health = 1.0
+        self.block_rate = 0.0
+        self.consecutive_blocks = 0
+        self.quarantine_strikes = 0
+        self.quarantined_until = 0.0
+        self.in_use = 0
+        self.last_used = 0.0
+        self.counts = {SUCCESS: 0, BLOCKED: 0, FAILURE: 0}
+        self.total_latency = 0.0
+        self._recent = deque()
+
+    @property
+    def quarantined(self) -> bool:
+        return time.time() < self.quarantined_until
+
+    def chrome_proxy(self) -> Optional[str]:
+        """Proxy address for Chrome's --proxy-server flag, which cannot carry credentials"""
+        if not self.proxy:
+            return None
+        parsed = urlparse(self.proxy)
+        return f"{parsed.scheme or 'http'}://{parsed.hostname}:{parsed.port}" if parsed.port else f"{parsed.scheme or 'http'}://{parsed.hostname}"
+
+    def requests_proxies(self) -> Optional[Dict[str, str]]:
+        return {"http": self.proxy, "https": self.proxy} if self.proxy else None
+
+    def throughput(self, now: float) -> float:
+        """Successful requests per minute over the last THROUGHPUT_WINDOW seconds"""
+        while self._recent and now - self._recent[0] > THROUGHPUT_WINDOW:
+            self._recent.popleft()
+        return len(self._recent) * 60 / THROUGHPUT_WINDOW
+
+    def to_dict(self, now: float) -> Dict[str, Any]:
+        requests_made = sum(self.counts.values())
+        return {
+            "name": self.name,
+            "proxy": self.chrome_proxy() or "direct",
+            "status": "quarantined" if self.quarantined else "active",
+            "quarantined_for": max(0, round(self.quarantined_until - now)),
+            "in_use": self.in_use,
+            "health": round(self.health, 2),
+            "block_rate": round(self.block_rate, 2),
+            "requests": requests_made,
+            "successes": self.counts[SUCCESS],
+            "blocks": self.counts[BLOCKED],
+            "failures": self.counts[FAILURE],
+            "avg_latency": round(self.total_latency / requests_made, 2) if requests_made else None,
+            "per_minute": round(self.throughput(now), 1)
+        }
+
+
+def load_identities(path: str = EGRESS_CONFIG) -> List[EgressIdentity]:
+    """Read identities from the config file, falling back to a single direct identity"""
+    config = {}
+    if path and os.path.exists(path):
+        try:
+            with open(path, "r") as f:
+                config = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error reading egress config {path}: {e}")
+
+    identities = []
+    for index, entry in enumerate(config.get("identities", [])):
+        identities.append(EgressIdentity(
+            entry.get("name") or f"proxy-{index}",
+            entry.get("proxy"),
+            entry.get("user_agent") or DEFAULT_USER_AGENTS[index % len(DEFAULT_USER_AGENTS)]
+        ))
+    if not identities or config.get("include_direct"):
+        identities.append(EgressIdentity("direct", None, DEFAULT_USER_AGENTS[len(identities) % len(DEFAULT_USER_AGENTS)]))
+    return identities
+
+
+class EgressPool:
+    """
+    Hands out egress identities and tracks how each one is treated by the sites we scrape
+    Identities are picked by health, spreading concurrent users across them. An identity
+    that keeps getting blocked is quarantined with exponential backoff and returns on probation.
+    With a single identity there is nothing to rotate to, so it is scored but never quarantined.
+    """
+
+    def __init__(self, identities: List[EgressIdentity] = None):
+        self._lock = threading.Lock()
+        self.identities = identities if identities is not None else load_identities()
+
+    @property
+    def rotating(self) -> bool:
+        """True if there is another identity to switch to when one is blocked"""
+        return len(self.identities) > 1
+
+    def acquire(self) -> EgressIdentity:
+        """Pick the healthiest, least loaded identity that is not quarantined"""
+        with self._lock:
+            now = time.time()
+            available = [identity for identity in self.identities if not identity.quarantined]
+            if available:
+                identity = max(available, key=lambda i: (i.health / (1 + i.in_use), -i.last_used))
+            else:
+                # Everything is quarantined: use whichever comes back first rather than stall
+                identity = min(self.identities, key=lambda i: i.quarantined_until)
+                print(f"⚠️ All egress identities are quarantined, using {identity.name}")
+            identity.in_use += 1
+            identity.last_used = now
+            return identity
+
+    def release(self, identity: EgressIdentity):
+        if identity is None:
+            return
+        with self._lock:
+            identity.in_use = max(0, identity.in_use - 1)
+
+    def report(self, identity: EgressIdentity, outcome: str, latency: float = 0.0):
+        """Record the outcome of one request made through an identity"""
+        if identity is None:
+            return
+        with self._lock:
+            now = time.time()
+            identity.counts[outcome] += 1
+            identity.total_latency += latency
+            identity.health += HEALTH_ALPHA * ((outcome == SUCCESS) - identity.health)
+            identity.block_rate += HEALTH_ALPHA * ((outcome == BLOCKED) - identity.block_rate)
+            if outcome == SUCCESS:
+                identity.consecutive_blocks = 0
+                identity._recent.append(now)
+            elif outcome == BLOCKED:
+                identity.consecutive_blocks += 1
+
+            if self.rotating and not identity.quarantined and (
+                identity.health < QUARANTINE_HEALTH
+                or identity.consecutive_blocks >= QUARANTINE_CONSECUTIVE_BLOCKS
+            ):
+                identity.quarantine_strikes += 1
+                duration = min(MAX_QUARANTINE_SECONDS, QUARANTINE_SECONDS * 2 ** (identity.quarantine_strikes - 1))
+                identity.quarantined_until = now + duration
+                identity.health = PROBATION_HEALTH
+                identity.consecutive_blocks = 0
+                print(f"🚧 Quarantined egress identity {identity.name} for {duration}s")
+
+    @contextmanager
+    def http_session(self):
+        """
+        Yield a requests.Session routed through a pooled identity
+        Use session_request() on it so outcomes are scored.
+        """
+        identity = self.acquire()
+        session = requests.Session()
+        session.headers["User-Agent"] = identity.user_agent
+        proxies = identity.requests_proxies()
+        if proxies:
+            session.proxies.update(proxies)
+        session.egress_identity = identity
+        try:
+            yield session
+        finally:
+            session.close()
+            self.release(identity)
+
+    def session_request(self, session, method: str, url: str, score_blocks: bool = True, **kwargs):
+        """
+        Make a request on a session from http_session() and score its identity
+        With score_blocks=False a block status is not held against the identity, for sites
+        that refuse every plain HTTP client regardless of where it comes from.
+        """
+        identity = session.egress_identity
+        started_at = time.time()
+        try:
+            response = session.request(method, url, **kwargs)
+        except requests.RequestException:
+            self.report(identity, FAILURE, time.time() - started_at)
+            raise
+        if response.status_code in BLOCK_STATUSES:
+            if score_blocks:
+                self.report(identity, BLOCKED, time.time() - started_at)
+        else:
+            self.report(identity, SUCCESS, time.time() - started_at)
+        return response
+
+    def get_stats(self) -> List[Dict[str, Any]]:
+        """Return health, block rate and throughput for every identity"""
+        with self._lock:
+            now = time.time()
+            return [identity.to_dict(now) for identity in self.identities]
+
+
+def page_is_blocked(driver) -> bool:
+    """True if the page loaded in the driver is a block or challenge page"""
+    if getattr(driver, "replay", False):
+        return False
+    try:
+        return bool(driver.execute_script(BLOCK_CHECK_SCRIPT))
+    except Exception:
+        return False
+
+
+egress = EgressPool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Probe every egress identity against a URL")
+    parser.add_argument("--probe", required=True, help="URL to fetch through each identity")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    for _ in range(args.rounds):
+        for _ in egress.identities:
+            with egress.http_session() as session:
+                try:
+                    egress.session_request(session, "GET", args.probe, timeout=10)
+                except requests.RequestException as e:
+                    print(f"{session.egress_identity.name}: {e}")
+
+    for stats in egress.get_stats():
+        print(json.dumps(stats))
@@ -1,17 +1,13 @@
 import re
 from typing import List, Dict
 import pandas as pd
-from urllib.parse import urlparse
+from companies_details_extraction.profile_url_parser import parse_profile_url, parse_profile_urls
 
 
 def extract_name_from_linkedin_url(url: str) -> str:
-    """Extract name from LinkedIn profile URL"""
-    try:
-        path = urlparse(url).path
-        name_part = path.split('/in/')[1].split('/')[0]
-        return ' '.join([part.capitalize() for part in name_part.split('-')])
-    except:
-        return ""
+    """Extract name from LinkedIn profile URL, without hash suffixes or encoded characters"""
+    record = parse_profile_url(url)
+    return record.name if record.valid else ""
 
 
 def predict_email_formats(name: str, domain: str) -> List[str]:
@@ -48,15 +44,15 @@ def predict_emails_from_profiles(profile_urls: List[str], company_domain: str) -
     """
     results = []
     
-    for url in profile_urls:
-        name = extract_name_from_linkedin_url(url)
-        if not name:
+    for record in parse_profile_urls(profile_urls):
+        if not record.valid:
             continue
             
+        name = record.name
         emails = predict_email_formats(name, company_domain)
         for email in emails:
             results.append({
-                'Profile URL': url,
+                'Profile URL': record.url,
                 'Name': name,
                 'Predicted Email': email,
                 'Company Domain': company_domain
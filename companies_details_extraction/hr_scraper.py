@@ -1,25 +1,204 @@
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
-from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+import math
+import re
+import threading
 import time
+from companies_details_extraction.driver_manager import lease_driver
+from companies_details_extraction.search_engines import ENGINES, hedged_fetch
+from companies_details_extraction.cancellation import ScrapeCancelled, ScrapeResult, cancellation_scope, current_token
+from companies_details_extraction.company_resolution import normalize_company_name
+from companies_details_extraction.result_cache import cache_results, is_cached, store_result
+from companies_details_extraction.scrape_logging import get_logger
 
-def process_result(result, profile_links):
-    href = result.get_attribute("href")
-    if href and "linkedin.com/in/" in href and href not in profile_links:
-        profile_links.append(href)
-        print(f"✔️ Found LinkedIn profile: {href}")
+logger = get_logger(__name__)
 
-def get_hr_profiles(company_name, num_profiles, designation="HR OR Recruiter", country="India", state="Gujarat"):
+RESULTS_PER_PAGE = 10
+
+# Batched queries OR several company names together; Bing drops terms from much longer queries
+MAX_BATCH_QUERY_LENGTH = 200
+MAX_BATCH_COMPANIES = 5
+# Result pages read per batched query before short companies fall back to their own query
+MAX_BATCH_PAGES = 3
+
+# Bing titles look like "John Smith - HR Manager - Acme | LinkedIn"
+TITLE_SUFFIX_PATTERN = re.compile(r'\s*[|\-–—]\s*LinkedIn\s*$', re.IGNORECASE)
+TITLE_SEPARATOR_PATTERN = re.compile(r'\s+[-–—|]\s+')
+LOCATION_PATTERN = re.compile(r'Location:\s*([^·|\n]+)', re.IGNORECASE)
+
+def parse_profile_result(result, rank):
     """
-    Search for HR profiles on LinkedIn
+    Turn a Bing result for a LinkedIn profile into a structured record
     Args:
-        company_name: Name of the company to search for
-        num_profiles: Number of profiles to retrieve
-        designation: Job title to search for (default: "HR OR Recruiter")
-        country: Country to filter by (optional)
-        state: State/region to filter by (optional)
+        result: Extracted result with title, href and snippet
+        rank: 1-based position of the result in the search ranking
+    Returns:
+        Dict with name, headline, location, rank, link, title and snippet
+    """
+    title = TITLE_SUFFIX_PATTERN.sub("", result["title"])
+    parts = TITLE_SEPARATOR_PATTERN.split(title, maxsplit=1)
+    name = parts[0].strip()
+    headline = parts[1].strip() if len(parts) > 1 else ""
+
+    # Snippets carry either "Location: X" or a leading "City, State, Country · ..." segment
+    location = ""
+    match = LOCATION_PATTERN.search(result["snippet"])
+    if match:
+        location = match.group(1).strip()
+    else:
+        first_segment = result["snippet"].split("·")[0].strip()
+        if "," in first_segment and len(first_segment) < 60 and not any(char.isdigit() for char in first_segment):
+            location = first_segment
+
+    return {
+        "name": name,
+        "headline": headline,
+        "location": location,
+        "rank": rank,
+        "link": result["href"],
+        "title": result["title"],
+        "snippet": result["snippet"]
+    }
+
+def matches_keywords(text, keywords):
+    """True when no keywords are given or any keyword appears in the text"""
+    if not keywords:
+        return True
+    text = text.lower()
+    return any(keyword.lower() in text for keyword in keywords)
+
+class ProfileCollector:
+    """Accumulates unique profile records up to a target, applying the local keyword filters"""
+
+    def __init__(self, num_profiles, designation_keywords=None, location_keywords=None):
+        self.num_profiles = num_profiles
+        self.designation_keywords = designation_keywords
+        self.location_keywords = location_keywords
+        self.records = []
+        self._seen = set()
+
+    @property
+    def full(self):
+        return len(self.records) >= self.num_profiles
+
+    def add(self, result, rank):
+        href = result["href"]
+        if self.full or not href or "linkedin.com/in/" not in href or href in self._seen:
+            return
+        self._seen.add(href)
+        record = parse_profile_result(result, rank)
+        text = f"{record['title']} {record['snippet']}"
+        if not matches_keywords(text, self.designation_keywords):
+            return
+        if not matches_keywords(text, self.location_keywords):
+            return
+        self.records.append(record)
+        logger.debug("Found LinkedIn profile", extra={"link": href, "rank": rank})
+
+def is_profile_page(page):
+    """A results page is usable for HR search if it is not a challenge page and holds a profile link"""
+    return not page.get("blocked") and any("linkedin.com/in/" in result["href"] for result in page["results"])
+
+def add_page_results(collector, results, first):
+    for index, result in enumerate(results):
+        collector.add(result, first + index)
+
+def collect_first_page(search_query, collector):
+    """
+    Fetch the first results page, hedging Bing with DuckDuckGo when Bing is slow or blocked
+    Returns:
+        (offset, url) of the next Bing page to load; url is None when it has to be built from the offset
     """
+    def consume(engine, driver, page):
+        logger.info("First results page loaded", extra={"engine": engine.name, "results": len(page["results"])})
+        add_page_results(collector, page["results"], 1)
+        return page
+
+    engine, page = hedged_fetch(search_query, ["bing", "duckduckgo"], usable=is_profile_page, consume=consume, first=1)
+    if engine is None:
+        logger.warning("No usable results page", extra={"query": search_query})
+        return None, None
+    if engine.name == "bing":
+        return (1 + len(page["results"]), page["next_page"]) if page["next_page"] else (None, None)
+    # DuckDuckGo answered first; page on through Bing
+    return 1 + RESULTS_PER_PAGE, None
+
+def collect_profiles_serially(search_query, collector, first=1, search_url=None):
+    """Walk Bing result pages one after another until enough profiles are found"""
+    bing = ENGINES["bing"]
+    search_url = search_url or bing.build_url(search_query, first)
+    rank = first
+    token = current_token()
+    with lease_driver() as driver:
+        while not collector.full and not token.cancelled:
+            page = bing.fetch(driver, search_query, url=search_url)
+            results = page["results"]
+            logger.info("Results page loaded", extra={"url": search_url, "results": len(results)})
+
+            add_page_results(collector, results, rank)
+            rank += len(results)
+        
+            # Check if we need more results and can paginate
+            if not collector.full:
+                if not page["next_page"]:
+                    logger.info("No more result pages", extra={"profiles": len(collector.records)})
+                    break
+                search_url = page["next_page"]
+
+def fetch_results_page(search_query, first, stop_event):
+    """Load one Bing results page in its own driver, skipping it if the target was already met"""
+    if stop_event.is_set():
+        return []
+    with lease_driver() as driver:
+        if stop_event.is_set():
+            return []
+        logger.debug("Prefetching results page", extra={"offset": first})
+        return ENGINES["bing"].fetch(driver, search_query, first)["results"]
+
+def prefetch_profiles(search_query, collector):
+    """
+    Fetch the offset pages needed for the collector's target concurrently and merge them in rank order
+    Returns:
+        Offset of the first page that was not fetched
+    """
+    # One spare page because not every result on a page is a profile
+    num_pages = math.ceil(collector.num_profiles / RESULTS_PER_PAGE) + 1
+    offsets = [1 + page * RESULTS_PER_PAGE for page in range(num_pages)]
+    stop_event = threading.Event()
+
+    with ThreadPoolExecutor(max_workers=num_pages) as executor:
+        futures = [
+            executor.submit(contextvars.copy_context().run, fetch_results_page, search_query, first, stop_event)
+            for first in offsets
+        ]
+        for first, future in zip(offsets, futures):
+            try:
+                results = future.result()
+            except ScrapeCancelled:
+                results = []
+            except Exception as e:
+                logger.error("Prefetch failed", extra={"offset": first, "error": str(e)})
+                results = []
+            add_page_results(collector, results, first)
+
+            if collector.full or current_token().cancelled:
+                # Target met or scrape cancelled: drop queued fetches and tell running ones to skip their page
+                stop_event.set()
+                for pending in futures:
+                    pending.cancel()
+                break
+
+    return offsets[-1] + RESULTS_PER_PAGE
+
+def build_hr_search_query(company_name, designation="HR OR Recruiter", country="India", state="Gujarat"):
+    return build_hr_query_for(f'"{company_name}"', designation, country, state)
+
+def build_batch_hr_search_query(company_names, designation="HR OR Recruiter", country="India", state="Gujarat"):
+    """One query for several companies: site:linkedin.com/in ("A" OR "B") (designation)"""
+    company_filter = " OR ".join(f'"{name.replace(chr(34), "")}"' for name in company_names)
+    return build_hr_query_for(f"({company_filter})", designation, country, state)
+
+def build_hr_query_for(company_filter, designation, country, state):
     location_filter = ""
     if country and state:
         location_filter = f" AND ({country} AND {state})"
@@ -28,60 +207,232 @@ def get_hr_profiles(company_name, num_profiles, designation="HR OR Recruiter", c
     elif state:
         location_filter = f" AND {state}"
         
-    search_query = f'site:linkedin.com/in "{company_name}" ({designation}){location_filter}'
-    search_url = f"https://www.bing.com/search?q={quote(search_query)}&first=1"
-    
-    chrome_options = Options()
-    chrome_options.add_argument('--headless')
-    chrome_options.add_argument('--disable-gpu')
-    chrome_options.add_argument('--no-sandbox')
-    chrome_options.add_argument('--disable-dev-shm-usage')
-    chrome_options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36')
+    return f'site:linkedin.com/in {company_filter} ({designation}){location_filter}'
+
+@cache_results
+def get_hr_profile_records(company_name, num_profiles, designation="HR OR Recruiter", country="India", state="Gujarat",
+                           prefetch=None, designation_keywords=None, location_keywords=None, timeout=None, cancel_token=None):
+    """
+    Search for HR profiles on LinkedIn and return structured records
+    Args:
+        company_name: Name of the company to search for
+        num_profiles: Number of profiles to retrieve
+        designation: Job title to search for (default: "HR OR Recruiter")
+        country: Country to filter by (optional)
+        state: State/region to filter by (optional)
+        prefetch: Fetch the needed result pages concurrently instead of one after another
+            (default: only when more than one page is needed)
+        designation_keywords: Keep only results whose title or snippet mentions one of these (optional)
+        location_keywords: Keep only results whose title or snippet mentions one of these (optional)
+        timeout: Seconds after which to stop and return what was found so far (optional)
+        cancel_token: CancelToken that stops the search early when cancelled (optional)
+    Returns:
+        ScrapeResult of dicts with name, headline, location, rank, link, title and snippet;
+        its complete attribute is False if the search was cut short by the timeout or token.
+        Complete results are cached for 24 hours.
+    """
+    search_query = build_hr_search_query(company_name, designation, country, state)
+    if prefetch is None:
+        prefetch = num_profiles > RESULTS_PER_PAGE
     
-    profile_links = []
+    collector = ProfileCollector(num_profiles, designation_keywords, location_keywords)
     
-    try:
-        driver = webdriver.Chrome(options=chrome_options)
-        
-        while len(profile_links) < num_profiles:
-            driver.get(search_url)
-            print(f"🔍 Searching: {search_url}")
-            
-            time.sleep(2)
+    with cancellation_scope(timeout, cancel_token) as token:
+        try:
+            first, search_url = 1, None
+            if prefetch:
+                first = prefetch_profiles(search_query, collector)
+            elif not token.cancelled:
+                first, search_url = collect_first_page(search_query, collector)
+            if first is not None and not collector.full and not token.cancelled:
+                collect_profiles_serially(search_query, collector, first, search_url)
 
-            results = driver.find_elements(By.CSS_SELECTOR, 'li.b_algo h2 a')
-            print(f"🔗 Total search results found: {len(results)}")
+        except ScrapeCancelled:
+            pass
+        except Exception as e:
+            logger.exception("HR profile search failed", extra={"company": company_name})
+            return ScrapeResult(complete=False, reason=str(e))
 
-            for result in results:
-                if len(profile_links) >= num_profiles:
-                    break
-                process_result(result, profile_links)
-            
-            # Check if we need more results and can paginate
-            if len(profile_links) < num_profiles:
-                try:
-                    next_page = driver.find_element(By.CSS_SELECTOR, 'a.sb_pagN')
-                    search_url = next_page.get_attribute('href')
-                except:
-                    print("⚠️ No more pages available")
-                    break
+        if token.cancelled and not collector.full:
+            logger.warning("HR profile search stopped early", extra={"company": company_name, "reason": token.reason, "profiles": len(collector.records)})
+            return ScrapeResult(collector.records, complete=False, reason=token.reason)
+        return ScrapeResult(collector.records)
 
-        driver.quit()
-        return profile_links
+def get_hr_profiles(company_name, num_profiles, designation="HR OR Recruiter", country="India", state="Gujarat", prefetch=None,
+                    timeout=None, cancel_token=None):
+    """
+    Search for HR profiles on LinkedIn
+    Args:
+        company_name: Name of the company to search for
+        num_profiles: Number of profiles to retrieve
+        designation: Job title to search for (default: "HR OR Recruiter")
+        country: Country to filter by (optional)
+        state: State/region to filter by (optional)
+        prefetch: Fetch the needed result pages concurrently instead of one after another
+            (default: only when more than one page is needed)
+        timeout: Seconds after which to stop and return what was found so far (optional)
+        cancel_token: CancelToken that stops the search early when cancelled (optional)
+    Returns:
+        ScrapeResult of LinkedIn profile URLs, with complete set to False if cut short
+    """
+    records = get_hr_profile_records(company_name, num_profiles, designation, country, state,
+                                     prefetch=prefetch, timeout=timeout, cancel_token=cancel_token)
+    return ScrapeResult([record["link"] for record in records], records.complete, records.reason)
 
-    except Exception as e:
-        print(f"❌ Error: {str(e)}")
-        if 'driver' in locals():
-            driver.quit()
-        return []
+def plan_company_batches(companies, designation="HR OR Recruiter", country="India", state="Gujarat"):
+    """Pack companies, in order, into batches whose OR query stays within the length and size limits"""
+    batches = []
+    for company in companies:
+        if batches and len(batches[-1]) < MAX_BATCH_COMPANIES and len(
+            build_batch_hr_search_query(batches[-1] + [company], designation, country, state)
+        ) <= MAX_BATCH_QUERY_LENGTH:
+            batches[-1].append(company)
+        else:
+            batches.append([company])
+    return batches
+
+def _normalize_text(text):
+    return " ".join(re.findall(r"[a-z0-9]+", (text or "").lower().replace("&", " and ")))
 
-def batch_process_companies(companies_list, num_profiles, designation="HR OR Recruiter", country=None, state=None):
-    """Process multiple companies and get HR profile links"""
+def attribute_company(result, companies):
+    """
+    Company of a batch that a profile result belongs to, judged from its title and then its snippet
+    Returns:
+        The most specific company named, or None if none (or several equally specific ones) are named
+    """
+    keys = {company: normalize_company_name(company) for company in companies}
+    for text in (result["title"], result["snippet"]):
+        padded = f" {_normalize_text(text)} "
+        named = [company for company, key in keys.items() if key and f" {key} " in padded]
+        if named:
+            longest = max(len(keys[company]) for company in named)
+            named = [company for company in named if len(keys[company]) == longest]
+            return named[0] if len(named) == 1 else None
+    return None
+
+def collect_batch_profiles(batch, collectors, designation, country, state):
+    """
+    Walk the result pages of one batched query, adding each profile to the collector of its company
+    Returns:
+        True if the results ran out, so companies still short of their target have no more profiles
+    """
+    bing = ENGINES["bing"]
+    search_query = build_batch_hr_search_query(batch, designation, country, state)
+    search_url = bing.build_url(search_query, 1)
+    token = current_token()
+    with lease_driver() as driver:
+        for _ in range(MAX_BATCH_PAGES):
+            page = bing.fetch(driver, search_query, url=search_url)
+            if page["blocked"]:
+                return False
+            attributed = 0
+            for result in page["results"]:
+                company = attribute_company(result, batch) if "linkedin.com/in/" in result["href"] else None
+                if company:
+                    collector = collectors[company]
+                    collector.add(result, len(collector.records) + 1)
+                    attributed += 1
+            logger.info("Batched results page loaded", extra={
+                "companies": len(batch), "results": len(page["results"]), "attributed": attributed
+            })
+            if all(collectors[company].full for company in batch) or token.cancelled:
+                return False
+            if not page["next_page"]:
+                return True
+            search_url = page["next_page"]
+    return False
+
+def get_batched_hr_profile_records(companies, num_profiles, designation="HR OR Recruiter", country="India", state="Gujarat",
+                                   on_result=None, timeout=None, cancel_token=None):
+    """
+    Search HR profiles for many companies with few queries by OR-ing company names together
+    Companies with fresh cached results are served from the cache. The rest are packed into
+    batched queries; each hit is attributed to the company its title or snippet names.
+    Companies a batch found nothing for, or left short when it stopped before the results ran
+    out, fall back to individual queries.
+    Args:
+        companies: Company names
+        num_profiles: Number of profiles to retrieve per company
+        designation: Job title to search for (default: "HR OR Recruiter")
+        country: Country to filter by (optional)
+        state: State/region to filter by (optional)
+        on_result: Optional callback called with (company, records) as each company is finished
+        timeout: Seconds after which to stop and return what was found so far (optional)
+        cancel_token: CancelToken that stops the search early when cancelled (optional)
+    Returns:
+        Dict of company -> ScrapeResult of profile records, for the companies reached before a stop
+    """
+    results = {}
+
+    def finish(company, records):
+        results[company] = records
+        if on_result:
+            on_result(company, records)
+
+    with cancellation_scope(timeout, cancel_token) as token:
+        individual = []
+        pending = []
+        for company in dict.fromkeys(companies):
+            cached = is_cached("get_hr_profile_records", (company, num_profiles, designation, country, state))
+            (individual if cached else pending).append(company)
+
+        for batch in plan_company_batches(pending, designation, country, state):
+            if token.cancelled:
+                break
+            if len(batch) == 1:
+                individual.extend(batch)
+                continue
+            collectors = {company: ProfileCollector(num_profiles) for company in batch}
+            exhausted = False
+            try:
+                exhausted = collect_batch_profiles(batch, collectors, designation, country, state)
+            except ScrapeCancelled:
+                pass
+            except Exception as e:
+                logger.error("Batched HR profile search failed", extra={"companies": batch, "error": str(e)})
+            for company, collector in collectors.items():
+                if collector.full or (exhausted and collector.records):
+                    records = ScrapeResult(collector.records)
+                    # Later single-company lookups of this company are served from the cache
+                    store_result("get_hr_profile_records", (company, num_profiles, designation, country, state), records)
+                    finish(company, records)
+                elif token.cancelled:
+                    finish(company, ScrapeResult(collector.records, complete=False, reason=token.reason))
+                else:
+                    individual.append(company)
+
+        for company in individual:
+            if token.cancelled:
+                break
+            finish(company, get_hr_profile_records(company, num_profiles, designation, country, state))
+
+    logger.info("Batched HR profile search finished", extra={
+        "companies": len(results), "individual_queries": len(individual)
+    })
+    return results
+
+def batch_process_companies(companies_list, num_profiles, designation="HR OR Recruiter", country=None, state=None,
+                            timeout=None, cancel_token=None, batched=True):
+    """
+    Process multiple companies and get HR profile links, stopping at the timeout or when cancelled
+    With batched, companies share OR-batched queries (see get_batched_hr_profile_records).
+    """
+    if batched:
+        records = get_batched_hr_profile_records(companies_list, num_profiles, designation, country, state,
+                                                 timeout=timeout, cancel_token=cancel_token)
+        return {
+            company: ScrapeResult([record["link"] for record in found], found.complete, found.reason)
+            for company, found in records.items()
+        }
+    
     all_results = {}
     
-    for company in companies_list:
-        print(f"\n📦 Processing company: {company}")
-        all_results[company] = get_hr_profiles(company, num_profiles, designation, country, state)
+    with cancellation_scope(timeout, cancel_token) as token:
+        for company in companies_list:
+            if token.cancelled:
+                break
+            logger.info("Processing company", extra={"company": company})
+            all_results[company] = get_hr_profiles(company, num_profiles, designation, country, state)
     
     return all_results
 
@@ -0,0 +1,153 @@
+import re
+import zlib
+from typing import List, Set
+import numpy as np
+import pandas as pd
+from companies_details_extraction.company_resolution import DisjointSet
+
+# 64 MinHash permutations split into 16 LSH bands of 4 rows: pairs with Jaccard
+# similarity around 0.5 and above share at least one band with high probability
+NUM_PERMUTATIONS = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+# Candidate pairs from the LSH buckets are merged only above this exact shingle Jaccard similarity
+SIMILARITY_THRESHOLD = 0.6
+SHINGLE_SIZE = 5
+# Only the start of a snippet is compared; platforms truncate descriptions differently
+SNIPPET_CHARS = 160
+
+MERSENNE_PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(20240501)
+_HASH_A = _rng.integers(1, MERSENNE_PRIME, NUM_PERMUTATIONS, dtype=np.uint64)
+_HASH_B = _rng.integers(0, MERSENNE_PRIME, NUM_PERMUTATIONS, dtype=np.uint64)
+
+# Platform names appended to result titles, e.g. "Developer - Acme | LinkedIn"
+PLATFORM_SUFFIX = re.compile(r'\s*[|\-–—]\s*(linkedin|indeed(\.com)?|glassdoor|internshala)\b.*$', re.IGNORECASE)
+COMPANY_PATTERNS = [
+    re.compile(r'^(?P<company>.+?)\s+hiring\s+', re.IGNORECASE),
+    re.compile(r'\s+at\s+(?P<company>[^|\-–—,]+)', re.IGNORECASE),
+    re.compile(r'^[^|\-–—]+\s[\-–—|]\s(?P<company>[^|\-–—]+)')
+]
+
+
+def clean_title(title: str) -> str:
+    return PLATFORM_SUFFIX.sub("", title or "").strip()
+
+
+def extract_company(title: str) -> str:
+    """Best-effort company name from a job result title: 'Acme hiring X', 'X at Acme' or 'X - Acme - City'"""
+    title = clean_title(title)
+    for pattern in COMPANY_PATTERNS:
+        match = pattern.search(title)
+        if match:
+            return match.group("company").strip()
+    return ""
+
+
+def _normalize(text: str) -> str:
+    return " ".join(re.findall(r"[a-z0-9]+", (text or "").lower()))
+
+
+def posting_shingles(title: str, description: str) -> Set[int]:
+    """Hashed character shingles over a posting's title, company and the start of its snippet"""
+    title = clean_title(title)
+    text = _normalize(f"{title} {extract_company(title)} {(description or '')[:SNIPPET_CHARS]}")
+    if len(text) <= SHINGLE_SIZE:
+        return {zlib.crc32(text.encode())}
+    return {zlib.crc32(text[i:i + SHINGLE_SIZE].encode()) for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def minhash_signatures(shingle_sets: List[Set[int]], chunk_size: int = 20000) -> np.ndarray:
+    """
+    MinHash signature of each shingle set as rows of a (len(shingle_sets), NUM_PERMUTATIONS) array
+    Shingles are hashed in chunks so memory stays bounded for large result sets.
+    """
+    signatures = np.full((len(shingle_sets), NUM_PERMUTATIONS), MERSENNE_PRIME, dtype=np.uint64)
+    start = 0
+    while start < len(shingle_sets):
+        # Grow the chunk until it holds about chunk_size shingles
+        end, total = start, 0
+        while end < len(shingle_sets) and (total < chunk_size or end == start):
+            total += len(shingle_sets[end])
+            end += 1
+        values = np.fromiter((h for shingles in shingle_sets[start:end] for h in shingles), dtype=np.uint64, count=total)
+        lengths = np.array([len(shingles) for shingles in shingle_sets[start:end]])
+        hashed = (values[:, None] * _HASH_A + _HASH_B) % MERSENNE_PRIME
+        offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        signatures[start:end] = np.minimum.reduceat(hashed, offsets, axis=0)
+        start = end
+    return signatures
+
+
+def cluster_postings(titles: List[str], descriptions: List[str]) -> List[int]:
+    """
+    Group near-duplicate postings without comparing every pair
+    Postings sharing an LSH band of their MinHash signatures are candidates; candidates
+    whose exact shingle Jaccard similarity reaches SIMILARITY_THRESHOLD are merged.
+    Returns:
+        Cluster id for each posting (the index of one of its members)
+    """
+    shingle_sets = [posting_shingles(title, description) for title, description in zip(titles, descriptions)]
+    if not shingle_sets:
+        return []
+    signatures = minhash_signatures(shingle_sets)
+    groups = DisjointSet(range(len(shingle_sets)))
+
+    for band in range(BANDS):
+        band_rows = np.ascontiguousarray(signatures[:, band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND])
+        _, bucket_ids = np.unique(band_rows, axis=0, return_inverse=True)
+        bucket_ids = bucket_ids.ravel()
+        # Only buckets with more than one posting can hold duplicates
+        order = np.argsort(bucket_ids, kind="stable")
+        boundaries = np.flatnonzero(np.diff(bucket_ids[order])) + 1
+        for members in np.split(order, boundaries):
+            if len(members) < 2:
+                continue
+            for position, index in enumerate(members.tolist()):
+                for other in members[:position].tolist():
+                    if groups.find(index) == groups.find(other):
+                        continue
+                    a, b = shingle_sets[index], shingle_sets[other]
+                    if len(a & b) / len(a | b) >= SIMILARITY_THRESHOLD:
+                        groups.union(other, index)
+
+    return [groups.find(index) for index in range(len(shingle_sets))]
+
+
+def dedupe_jobs(results: pd.DataFrame) -> pd.DataFrame:
+    """
+    Collapse the same opening found on several platforms or in both the job and internship passes
+    Args:
+        results: Job listings with title, link, description, source and optionally Type columns
+    Returns:
+        One canonical row per cluster (the one with the longest description), with 'sources',
+        'links' (every source link, space separated) and 'duplicates' (cluster size) columns
+    """
+    if results.empty:
+        return results
+    results = results.reset_index(drop=True)
+    clusters = cluster_postings(results["title"].fillna("").tolist(), results["description"].fillna("").tolist())
+    results = results.assign(_cluster=clusters, _length=results["description"].fillna("").str.len())
+
+    grouped = results.groupby("_cluster", sort=False)
+    join_unique = lambda separator: lambda values: separator.join(dict.fromkeys(values))
+    merged = pd.DataFrame({
+        "sources": grouped["source"].agg(join_unique(", ")),
+        "links": grouped["link"].agg(join_unique(" ")),
+        "duplicates": grouped.size()
+    })
+    if "Type" in results:
+        merged["Type"] = grouped["Type"].agg(join_unique(", "))
+
+    # The row with the longest description represents its cluster, in order of first appearance
+    canonical = (
+        results.sort_values("_length", ascending=False, kind="stable")
+        .drop_duplicates("_cluster")
+        .sort_index()
+        .drop(columns=[column for column in merged.columns if column in results])
+    )
+    return (
+        canonical.join(merged, on="_cluster")
+        .drop(columns=["_cluster", "_length"])
+        .reset_index(drop=True)
+    )
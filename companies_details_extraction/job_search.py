@@ -1,174 +1,194 @@
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from urllib.parse import quote
-import time
 import pandas as pd
 from typing import List, Dict, Any
 import concurrent.futures
-import functools
-import hashlib
-import os
-import json
-from datetime import datetime, timedelta
+from companies_details_extraction.driver_manager import lease_driver
+from companies_details_extraction.result_cache import cache_results
+from companies_details_extraction.search_engines import ENGINES
+from companies_details_extraction.scrape_logging import get_logger
+from companies_details_extraction.cancellation import (
+    CancelToken, ScrapeCancelled, ScrapeResult, cancellation_scope, context_with_token, current_token
+)
 
-# Add a simple cache
-CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache')
-if not os.path.exists(CACHE_DIR):
-    os.makedirs(CACHE_DIR)
+logger = get_logger(__name__)
 
-def get_cache_key(func_name, *args):
-    """Generate a cache key based on function name and arguments"""
-    key = f"{func_name}_{args}"
-    return hashlib.md5(key.encode()).hexdigest()
+# Declarative registry of supported job platforms. Each entry holds the site filter
+# used in search queries, the query template for single-platform searches, a
+# predicate selecting links that belong to the platform and the page settle time.
+PLATFORMS = {
+    "LinkedIn": {
+        "site": "linkedin.com",
+        "query": 'site:{site} "{job_type}" "{job_title}" "{location}"',
+        "link_filter": lambda link: "linkedin.com/jobs" in link,
+        "page_wait": 1.5,
+        "internship_only": False
+    },
+    "Indeed": {
+        "site": "indeed.com",
+        "query": 'site:{site} "{job_type}" "{job_title}" "{location}"',
+        "link_filter": lambda link: "indeed.com" in link,
+        "page_wait": 1.5,
+        "internship_only": False
+    },
+    "Glassdoor": {
+        "site": "glassdoor.com/job",
+        "query": "{job_title} {job_type} {location} site:{site}",
+        "link_filter": lambda link: "glassdoor.com" in link,
+        "page_wait": 3,
+        "internship_only": False
+    },
+    "Internshala": {
+        "site": "internshala.com",
+        "query": "{job_title} internship {location} site:{site}",
+        "link_filter": lambda link: "internshala.com" in link,
+        "page_wait": 3,
+        "internship_only": True
+    }
+}
+
+EMPTY_RESULTS_COLUMNS = ["title", "link", "description", "source"]
+
+
+def get_platforms(is_internship: bool = False) -> List[str]:
+    """Return the names of the platforms that apply to a job or internship search"""
+    return [
+        name for name, platform in PLATFORMS.items()
+        if is_internship or not platform["internship_only"]
+    ]
 
-def cache_results(func):
-    """Decorator to cache search results for 24 hours"""
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        # Generate cache key
-        cache_key = get_cache_key(func.__name__, *args)
-        cache_file = os.path.join(CACHE_DIR, f"{cache_key}.json")
-        
-        # Check if cache exists and is recent (less than 24 hours old)
-        if os.path.exists(cache_file):
-            file_age = datetime.now() - datetime.fromtimestamp(os.path.getmtime(cache_file))
-            if file_age < timedelta(hours=24):
-                try:
-                    with open(cache_file, 'r') as f:
-                        return json.load(f)
-                except:
-                    pass  # If cache read fails, continue with normal execution
-        
-        # Execute function and cache results
-        results = func(*args, **kwargs)
-        try:
-            with open(cache_file, 'w') as f:
-                json.dump(results, f)
-        except:
-            pass  # If cache write fails, just return results
-            
-        return results
-    return wrapper
 
-def setup_driver():
-    """Set up and return a headless Chrome driver with optimized settings"""
-    chrome_options = Options()
-    chrome_options.add_argument('--headless')
-    chrome_options.add_argument('--disable-gpu')
-    chrome_options.add_argument('--no-sandbox')
-    chrome_options.add_argument('--disable-dev-shm-usage')
-    chrome_options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36')
+def to_job_result(result: Dict[str, str], source: str) -> Dict[str, Any]:
+    """Convert an extracted search result into a job listing row"""
+    return {
+        "title": result["title"],
+        "link": result["href"],
+        "description": result["snippet"],
+        "source": source
+    }
+
+
+def route_result(result: Dict[str, str], platforms: List[str]) -> str:
+    """Return the platform a search result belongs to, or None if it matches none of them"""
+    for name in platforms:
+        if PLATFORMS[name]["link_filter"](result["href"]):
+            return name
+    return None
+
+
+def search_platform_jobs(platform: str, job_title: str, location: str, is_internship: bool = False, limit: int = 10,
+                         timeout: float = None, cancel_token: CancelToken = None) -> List[Dict[str, Any]]:
+    """
+    Search for jobs/internships on a single platform from the registry
     
-    # Performance optimizations
-    chrome_options.add_argument('--disable-extensions')
-    chrome_options.add_argument('--disable-infobars')
-    chrome_options.add_argument('--disable-notifications')
-    chrome_options.add_argument('--blink-settings=imagesEnabled=false')  # Disable images
+    Args:
+        platform: Platform name, a key of PLATFORMS
+        job_title: Job title or keywords
+        location: Location for job search
+        is_internship: Whether to search for internships specifically
+        limit: Number of search results to inspect
+        timeout: Seconds after which to give up and return what was found (optional)
+        cancel_token: CancelToken that stops the search early when cancelled (optional)
     
-    return webdriver.Chrome(options=chrome_options)
-
-@cache_results
-def search_linkedin_jobs(job_title: str, location: str, is_internship: bool = False, limit: int = 10) -> List[Dict[str, Any]]:
-    """Search for jobs/internships on LinkedIn"""
+    Returns:
+        ScrapeResult of job listings with details, with complete set to False if cut short
+    """
+    config = PLATFORMS[platform]
     job_type = "internship" if is_internship else "job"
-    search_query = f'site:linkedin.com "{job_type}" "{job_title}" "{location}"'
-    search_url = f"https://www.bing.com/search?q={quote(search_query)}"
-    
-    driver = setup_driver()
+    search_query = config["query"].format(site=config["site"], job_type=job_type, job_title=job_title, location=location)
     results = []
     
-    try:
-        driver.get(search_url)
-        # Reduced wait time
-        time.sleep(1.5)
+    with cancellation_scope(timeout, cancel_token) as token:
+        try:
+            with lease_driver() as driver:
+                page = ENGINES["bing"].fetch(driver, search_query, wait=config["page_wait"])
+                token.check()
+                
+                for result in page["results"][:limit]:
+                    if config["link_filter"](result["href"]):
+                        results.append(to_job_result(result, platform))
         
-        # Find search results
-        search_results = driver.find_elements(By.CSS_SELECTOR, "li.b_algo")
+        except ScrapeCancelled:
+            pass
+        except Exception as e:
+            logger.exception("Platform job search failed", extra={"platform": platform})
+            return ScrapeResult(results, complete=False, reason=str(e))
         
-        for result in search_results[:limit]:  # Use limit parameter
-            try:
-                title_element = result.find_element(By.CSS_SELECTOR, "h2 a")
-                title = title_element.text
-                link = title_element.get_attribute("href")
-                
-                # Extract description if available
-                description = ""
-                try:
-                    description = result.find_element(By.CSS_SELECTOR, "p").text
-                except:
-                    pass
-                
-                if "linkedin.com/jobs" in link:
-                    results.append({
-                        "title": title,
-                        "link": link,
-                        "description": description,
-                        "source": "LinkedIn"
-                    })
-            except Exception as e:
-                continue
-    
-    except Exception as e:
-        print(f"Error searching LinkedIn jobs: {e}")
+        return ScrapeResult.from_token(results, token)
+
+def search_combined_platforms(job_title: str, location: str, is_internship: bool = False, limit: int = 10, platforms: List[str] = None, max_pages: int = 5,
+                              timeout: float = None, cancel_token: CancelToken = None, is_known=None) -> List[Dict[str, Any]]:
+    """
+    Search several platforms with a single combined `site:A OR site:B` query
     
-    finally:
-        driver.quit()
+    Args:
+        job_title: Job title or keywords
+        location: Location for job search
+        is_internship: Whether to search for internships specifically
+        limit: Number of results to collect for each platform
+        platforms: Platform names to include (default: all platforms for the search type)
+        max_pages: Maximum number of result pages to walk through
+        timeout: Seconds after which to stop paging and return what was found (optional)
+        cancel_token: CancelToken that stops the search early when cancelled (optional)
+        is_known: Optional predicate on result links; paging stops after a page whose
+            platform results are all known, as later pages rarely hold anything new
     
-    return results
-
-# Apply similar optimizations to other search functions
-@cache_results
-def search_indeed_jobs(job_title: str, location: str, is_internship: bool = False, limit: int = 10) -> List[Dict[str, Any]]:
-    """Search for jobs/internships on Indeed"""
+    Returns:
+        ScrapeResult of job listings with details, routed to platforms by domain,
+        with complete set to False if cut short
+    """
+    platforms = platforms or get_platforms(is_internship)
     job_type = "internship" if is_internship else "job"
-    search_query = f'site:indeed.com "{job_type}" "{job_title}" "{location}"'
-    search_url = f"https://www.bing.com/search?q={quote(search_query)}"
+    site_filter = " OR ".join(f"site:{PLATFORMS[name]['site']}" for name in platforms)
+    search_query = f'"{job_title}" {job_type} "{location}" ({site_filter})'
+    search_url = None
     
-    # Similar implementation with reduced wait time
-    driver = setup_driver()
-    results = []
+    routed = {name: [] for name in platforms}
+    seen_links = set()
     
-    try:
-        driver.get(search_url)
-        # Reduced wait time
-        time.sleep(1.5)
+    with cancellation_scope(timeout, cancel_token) as token:
+        try:
+            with lease_driver() as driver:
+                for _ in range(max_pages):
+                    page = ENGINES["bing"].fetch(
+                        driver, search_query, url=search_url,
+                        wait=max(PLATFORMS[name]["page_wait"] for name in platforms)
+                    )
+                    token.check()
+                    
+                    matched = unknown = 0
+                    for result in page["results"]:
+                        platform = route_result(result, platforms)
+                        if not platform or result["href"] in seen_links or len(routed[platform]) >= limit:
+                            continue
+                        seen_links.add(result["href"])
+                        routed[platform].append(to_job_result(result, platform))
+                        matched += 1
+                        unknown += not (is_known and is_known(result["href"]))
+                    
+                    if all(len(found) >= limit for found in routed.values()) or not page["next_page"]:
+                        break
+                    if is_known and matched and not unknown:
+                        break
+                    search_url = page["next_page"]
         
-        # Find search results
-        search_results = driver.find_elements(By.CSS_SELECTOR, "li.b_algo")
+        except ScrapeCancelled:
+            pass
+        except Exception as e:
+            logger.exception("Combined job search failed", extra={"platforms": platforms})
+            return ScrapeResult([job for name in platforms for job in routed[name]], complete=False, reason=str(e))
         
-        for result in search_results[:limit]:  # Use limit parameter
-            try:
-                title_element = result.find_element(By.CSS_SELECTOR, "h2 a")
-                title = title_element.text
-                link = title_element.get_attribute("href")
-                
-                # Extract description if available
-                description = ""
-                try:
-                    description = result.find_element(By.CSS_SELECTOR, "p").text
-                except:
-                    pass
-                
-                if "indeed.com" in link:
-                    results.append({
-                        "title": title,
-                        "link": link,
-                        "description": description,
-                        "source": "Indeed"
-                    })
-            except Exception as e:
-                continue
-    
-    except Exception as e:
-        print(f"Error searching Indeed jobs: {e}")
-    
-    finally:
-        driver.quit()
-    
-    return results
+        return ScrapeResult.from_token([job for name in platforms for job in routed[name]], token)
+
+@cache_results
+def search_linkedin_jobs(job_title: str, location: str, is_internship: bool = False, limit: int = 10) -> List[Dict[str, Any]]:
+    """Search for jobs/internships on LinkedIn"""
+    return search_platform_jobs("LinkedIn", job_title, location, is_internship, limit)
+
+@cache_results
+def search_indeed_jobs(job_title: str, location: str, is_internship: bool = False, limit: int = 10) -> List[Dict[str, Any]]:
+    """Search for jobs/internships on Indeed"""
+    return search_platform_jobs("Indeed", job_title, location, is_internship, limit)
 
 def search_internshala_jobs(job_title: str, location: str) -> List[Dict[str, Any]]:
     """
@@ -181,50 +201,7 @@ def search_internshala_jobs(job_title: str, location: str) -> List[Dict[str, Any
     Returns:
         List of internship listings with details
     """
-    search_query = f"{job_title} internship {location} site:internshala.com"
-    search_url = f"https://www.bing.com/search?q={quote(search_query)}"
-    
-    driver = setup_driver()
-    results = []
-    
-    try:
-        driver.get(search_url)
-        time.sleep(3)
-        
-        # Find search results
-        search_results = driver.find_elements(By.CSS_SELECTOR, "li.b_algo")
-        
-        for result in search_results[:10]:  # Limit to first 10 results
-            try:
-                title_element = result.find_element(By.CSS_SELECTOR, "h2 a")
-                title = title_element.text
-                link = title_element.get_attribute("href")
-                
-                # Extract description if available
-                description = ""
-                try:
-                    description = result.find_element(By.CSS_SELECTOR, "p").text
-                except:
-                    pass
-                
-                if "internshala.com" in link:
-                    results.append({
-                        "title": title,
-                        "link": link,
-                        "description": description,
-                        "source": "Internshala"
-                    })
-            except Exception as e:
-                print(f"Error processing Internshala result: {e}")
-                continue
-    
-    except Exception as e:
-        print(f"Error searching Internshala jobs: {e}")
-    
-    finally:
-        driver.quit()
-    
-    return results
+    return search_platform_jobs("Internshala", job_title, location, is_internship=True, limit=10)
 
 def search_glassdoor_jobs(job_title: str, location: str, is_internship: bool = False, limit: int = 10) -> List[Dict[str, Any]]:
     """
@@ -238,53 +215,78 @@ def search_glassdoor_jobs(job_title: str, location: str, is_internship: bool = F
     Returns:
         List of job listings with details
     """
-    job_type = "internship" if is_internship else "job"
-    search_query = f"{job_title} {job_type} {location} site:glassdoor.com/job"
-    search_url = f"https://www.bing.com/search?q={quote(search_query)}"
+    return search_platform_jobs("Glassdoor", job_title, location, is_internship, limit)
+
+# Per-platform entry points, keeping the caching behaviour of the original functions
+PLATFORM_SEARCHES = {
+    "LinkedIn": search_linkedin_jobs,
+    "Indeed": search_indeed_jobs,
+    "Glassdoor": search_glassdoor_jobs,
+    "Internshala": lambda job_title, location, is_internship, limit: search_internshala_jobs(job_title, location)
+}
+
+def iter_platform_results(job_title: str, location: str, search_types: List[bool] = (False,), limit: int = 10, platforms: List[str] = None, combined: bool = False,
+                          timeout: float = None, cancel_token: CancelToken = None):
+    """
+    Search every platform x search type in parallel and yield results as each search completes
     
-    driver = setup_driver()
-    results = []
+    Args:
+        job_title: Job title or keywords
+        location: Location for job search
+        search_types: is_internship flags to search for, e.g. (False, True) for jobs and internships
+        limit: Number of results to fetch from each platform
+        platforms: Platform names to search (default: all platforms)
+        combined: Send one combined multi-site query per search type instead of one query per platform
+        timeout: Seconds after which every search stops and yields what it found (optional)
+        cancel_token: CancelToken that stops every search early when cancelled (optional)
     
-    try:
-        driver.get(search_url)
-        time.sleep(3)
-        
-        # Find search results
-        search_results = driver.find_elements(By.CSS_SELECTOR, "li.b_algo")
-        
-        for result in search_results[:limit]:  # Use limit parameter
-            try:
-                title_element = result.find_element(By.CSS_SELECTOR, "h2 a")
-                title = title_element.text
-                link = title_element.get_attribute("href")
-                
-                # Extract description if available
-                description = ""
-                try:
-                    description = result.find_element(By.CSS_SELECTOR, "p").text
-                except:
-                    pass
-                
-                if "glassdoor.com" in link:
-                    results.append({
-                        "title": title,
-                        "link": link,
-                        "description": description,
-                        "source": "Glassdoor"
-                    })
-            except Exception as e:
-                print(f"Error processing Glassdoor result: {e}")
-                continue
+    Yields:
+        Tuples of (platform, is_internship, results) in completion order; results is a
+        ScrapeResult whose complete attribute is False if that search was cut short
+    """
+    tasks = []
+    for is_internship in search_types:
+        names = [name for name in get_platforms(is_internship) if not platforms or name in platforms]
+        if not names:
+            continue
+        if combined:
+            tasks.append((names, is_internship, search_combined_platforms, (job_title, location, is_internship, limit, names)))
+        else:
+            for name in names:
+                tasks.append(([name], is_internship, PLATFORM_SEARCHES[name], (job_title, location, is_internship, limit)))
     
-    except Exception as e:
-        print(f"Error searching Glassdoor jobs: {e}")
+    if not tasks:
+        return
     
-    finally:
-        driver.quit()
+    # Created here rather than in a scope: a generator must not leave its token set in the consumer's context
+    token = CancelToken(timeout, parents=[cancel_token, current_token()])
     
-    return results
+    # Submit every task up front so the slowest platform does not hold back the others
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(tasks)) as executor:
+        # Each task runs in a copy of the caller's context so it inherits the browser scheduling settings
+        future_to_task = {
+            executor.submit(context_with_token(token).run, search_func, *args): (names, is_internship)
+            for names, is_internship, search_func, args in tasks
+        }
+        for future in concurrent.futures.as_completed(future_to_task):
+            names, is_internship = future_to_task[future]
+            try:
+                results = future.result()
+            except Exception as e:
+                logger.error("Job search task failed", extra={"platforms": names, "error": str(e)})
+                results = ScrapeResult(complete=False, reason=str(e))
+            complete = getattr(results, "complete", True)
+            logger.info("Job search finished", extra={
+                "platforms": names, "internship": is_internship, "results": len(results), "complete": complete
+            })
+            for name in names:
+                yield name, is_internship, ScrapeResult(
+                    [result for result in results if result["source"] == name],
+                    complete, getattr(results, "reason", None)
+                )
 
-def search_all_platforms(job_title: str, location: str, is_internship: bool = False, limit: int = 10) -> pd.DataFrame:
+def search_all_platforms(job_title: str, location: str, is_internship: bool = False, limit: int = 10, combined: bool = False, on_result=None,
+                         timeout: float = None, cancel_token: CancelToken = None) -> pd.DataFrame:
     """
     Search for jobs/internships across all supported platforms using parallel processing
     
@@ -293,29 +295,30 @@ def search_all_platforms(job_title: str, location: str, is_internship: bool = Fa
         location: Location for job search
         is_internship: Whether to search for internships specifically
         limit: Number of results to fetch from each platform
+        combined: Send one combined multi-site query instead of one query per platform
+        on_result: Optional callback called with (platform, results) as each platform completes
+        timeout: Seconds after which every search stops and returns what it found (optional)
+        cancel_token: CancelToken that stops every search early when cancelled (optional)
+    
+    Returns:
+        DataFrame of job listings; attrs["complete"] is False if any search was cut short
     """
-    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
-        # Submit all search tasks with limit parameter
-        linkedin_future = executor.submit(search_linkedin_jobs, job_title, location, is_internship, limit)
-        indeed_future = executor.submit(search_indeed_jobs, job_title, location, is_internship, limit)
-        glassdoor_future = executor.submit(search_glassdoor_jobs, job_title, location, is_internship, limit)
-        
-        # Get results as they complete
-        all_results = []
-        all_results.extend(linkedin_future.result())
-        all_results.extend(indeed_future.result())
-        all_results.extend(glassdoor_future.result())
-        
-        # Only search Internshala for internships
-        if is_internship:
-            internshala_future = executor.submit(search_internshala_jobs, job_title, location)
-            all_results.extend(internshala_future.result())
+    all_results = []
+    complete = True
+    for platform, _, results in iter_platform_results(job_title, location, (is_internship,), limit, combined=combined,
+                                                      timeout=timeout, cancel_token=cancel_token):
+        all_results.extend(results)
+        complete = complete and results.complete
+        if on_result:
+            on_result(platform, results)
     
     # Convert to DataFrame
     if all_results:
-        return pd.DataFrame(all_results)
+        results_df = pd.DataFrame(all_results)
     else:
-        return pd.DataFrame(columns=["title", "link", "description", "source"])
+        results_df = pd.DataFrame(columns=EMPTY_RESULTS_COLUMNS)
+    results_df.attrs["complete"] = complete
+    return results_df
 
 # Test code
 if __name__ == "__main__":
@@ -0,0 +1,127 @@
+import functools
+import re
+import unicodedata
+from typing import Iterable, List, NamedTuple, Optional
+from urllib.parse import unquote
+
+# https://in.linkedin.com/in/john-smith-4a1b2c3/?trk=... -> locale 'in', slug 'john-smith-4a1b2c3'
+PROFILE_URL_PATTERN = re.compile(
+    r'^(?:https?://)?(?:(?P<subdomain>[a-z]{2,3}|www|m)\.)?linkedin\.com/in/(?P<slug>[^/?#\s]+)',
+    re.IGNORECASE
+)
+# LinkedIn appends numeric or hash suffixes such as '4a1b2c3' or '123456789' to duplicate names
+SUFFIX_PART_PATTERN = re.compile(r'^(?=[a-z]*\d)[0-9a-z]+$')
+NAME_PART_PATTERN = re.compile(r'^[a-z]+$')
+
+PARSE_CACHE_SIZE = 200_000
+
+
+class ProfileRecord(NamedTuple):
+    url: str
+    slug: str
+    first_name: str
+    last_name: str
+    suffix: str
+    locale: Optional[str]
+    valid: bool
+
+    @property
+    def name(self) -> str:
+        return " ".join(part for part in (self.first_name, self.last_name) if part)
+
+
+def _fold_ascii(text: str) -> str:
+    """'José' -> 'jose'; scripts without an ASCII form fold to ''"""
+    if text.isascii():
+        return text.lower()
+    return unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode().lower()
+
+
+@functools.lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_profile_url(url: str) -> ProfileRecord:
+    """
+    Parse a LinkedIn profile URL into a structured record
+    Args:
+        url: LinkedIn profile URL
+    Returns:
+        ProfileRecord with the decoded slug, capitalized ASCII first/last name, the
+        numeric/hash suffix, the locale subdomain and whether a usable name was found
+    """
+    match = PROFILE_URL_PATTERN.match(url.strip()) if url else None
+    if not match:
+        return ProfileRecord(url, "", "", "", "", None, False)
+
+    slug = unquote(match.group("slug"))
+    subdomain = (match.group("subdomain") or "").lower()
+    locale = subdomain if subdomain not in ("", "www", "m") else None
+
+    parts = [_fold_ascii(part) for part in slug.split("-") if part]
+    suffix_parts = []
+    while parts and SUFFIX_PART_PATTERN.match(parts[-1]):
+        suffix_parts.insert(0, parts.pop())
+    name_parts = [part for part in parts if NAME_PART_PATTERN.match(part)]
+
+    first_name = name_parts[0].capitalize() if name_parts else ""
+    last_name = name_parts[-1].capitalize() if len(name_parts) > 1 else ""
+    return ProfileRecord(url, slug, first_name, last_name, "-".join(suffix_parts), locale, bool(first_name))
+
+
+def parse_profile_urls(urls: Iterable[str]) -> List[ProfileRecord]:
+    """Parse a batch of profile URLs, reusing cached records for repeated URLs"""
+    return [parse_profile_url(url) for url in urls]
+
+
+if __name__ == "__main__":
+    import random
+    import time
+    from urllib.parse import urlparse
+
+    def legacy_extract_name(url):
+        try:
+            path = urlparse(url).path
+            name_part = path.split('/in/')[1].split('/')[0]
+            return ' '.join([part.capitalize() for part in name_part.split('-')])
+        except:
+            return ""
+
+    samples = [
+        "https://www.linkedin.com/in/john-smith-4a1b2c3",
+        "https://in.linkedin.com/in/priya-patel-123456789/",
+        "https://linkedin.com/in/jos%C3%A9-garc%C3%ADa?trk=public_profile",
+        "https://uk.linkedin.com/in/mary-jane-watson",
+        "https://www.linkedin.com/in/%E5%BC%A0%E4%BC%9F-b1234a56",
+        "https://www.linkedin.com/company/not-a-profile",
+    ]
+    for sample in samples:
+        print(parse_profile_url(sample))
+
+    # Bulk enrichment sees many repeated URLs, so build a million-URL workload with repeats
+    random.seed(0)
+    first_names = ["john", "priya", "amit", "sara", "rahul", "neha", "li", "josé", "fatima", "arjun"]
+    last_names = ["smith", "patel", "shah", "khan", "mehta", "garcía", "wang", "desai", "joshi", "brown"]
+    unique_urls = [
+        f"https://{random.choice(['www', 'in', 'uk'])}.linkedin.com/in/"
+        f"{random.choice(first_names)}-{random.choice(last_names)}-{random.getrandbits(28):07x}"
+        for _ in range(200_000)
+    ]
+    urls = [random.choice(unique_urls) for _ in range(1_000_000)]
+
+    start = time.perf_counter()
+    for url in urls:
+        legacy_extract_name(url)
+    legacy_seconds = time.perf_counter() - start
+
+    parse_profile_url.cache_clear()
+    start = time.perf_counter()
+    records = parse_profile_urls(urls)
+    cold_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    parse_profile_urls(urls)
+    warm_seconds = time.perf_counter() - start
+
+    print(f"\n⏱️ {len(urls):,} URLs ({len(unique_urls):,} unique)")
+    print(f"Legacy urlparse:      {len(urls) / legacy_seconds:,.0f} URLs/s")
+    print(f"Parser (cold cache):  {len(urls) / cold_seconds:,.0f} URLs/s")
+    print(f"Parser (warm cache):  {len(urls) / warm_seconds:,.0f} URLs/s")
+    print(f"Valid records: {sum(record.valid for record in records):,}")
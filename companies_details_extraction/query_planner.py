@@ -0,0 +1,160 @@
+import atexit
+import json
+import os
+import threading
+import time
+from typing import List, Dict
+
+PLANNER_FILE = os.environ.get(
+    "QUERY_PLANNER_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'query_planner.json')
+)
+
+DEFAULT_TEMPLATES = [
+    'site:linkedin.com/company {domain} {location}',
+    'site:linkedin.com/company "{domain}" "{location}"',
+    'site:linkedin.com/company {domain} company {location}',
+    'site:linkedin.com/company {domain} in {location}'
+]
+
+GLOBAL_SCOPE = "*"
+# A template that produced nothing new after this many runs for a scope is pruned there
+PRUNE_AFTER_RUNS = 3
+# Weight of the global statistics when a scope has little data of its own
+PRIOR_WEIGHT = 2.0
+# The stats file is rewritten at most this often, and at exit
+SAVE_INTERVAL = 30
+
+
+class QueryPlanner:
+    """
+    Order company discovery query templates by their observed yield
+    Yield is recorded per (domain, location) scope and globally as new unique links per
+    page and per second of browser time. Templates that never produce new links for a
+    scope are pruned there, and untried templates are tried first so they get measured.
+    """
+
+    def __init__(self, path: str = PLANNER_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self._saved_at = time.time()
+        self._state = self._load()
+
+    def _load(self) -> Dict:
+        try:
+            with open(self.path, 'r') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = {}
+        state.setdefault("templates", list(DEFAULT_TEMPLATES))
+        state.setdefault("stats", {})
+        return state
+
+    def _save(self, text: str):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w') as f:
+            f.write(text)
+        os.replace(temp_path, self.path)
+
+    def flush(self):
+        """Write the stats file if anything was recorded since the last write"""
+        with self._lock:
+            if not self._dirty:
+                return
+            text = json.dumps(self._state, indent=1)
+            self._dirty = False
+            self._saved_at = time.time()
+        with self._save_lock:
+            try:
+                self._save(text)
+            except OSError as e:
+                print(f"Could not save query planner stats: {e}")
+                with self._lock:
+                    self._dirty = True
+
+    @staticmethod
+    def scope_key(domain: str, location: str) -> str:
+        return f"{' '.join(domain.lower().split())}|{' '.join(location.lower().split())}"
+
+    def templates(self) -> List[str]:
+        with self._lock:
+            return list(self._state["templates"])
+
+    def add_template(self, template: str):
+        """Register a new query template; it may use {domain} and {location} placeholders"""
+        template.format(domain="", location="")  # Fail early on unknown placeholders
+        with self._lock:
+            if template not in self._state["templates"]:
+                self._state["templates"].append(template)
+                self._dirty = True
+        self.flush()
+
+    def _stats(self, scope, template) -> Dict[str, float]:
+        return self._state["stats"].get(scope, {}).get(template, {"runs": 0, "pages": 0, "new_links": 0, "seconds": 0.0})
+
+    def score(self, domain: str, location: str, template: str) -> float:
+        """Smoothed new links per second, blending scope statistics with the global ones"""
+        local = self._stats(self.scope_key(domain, location), template)
+        overall = self._stats(GLOBAL_SCOPE, template)
+        prior_rate = overall["new_links"] / overall["seconds"] if overall["seconds"] else 0.0
+        prior_seconds = PRIOR_WEIGHT * (overall["seconds"] / overall["runs"] if overall["runs"] else 1.0)
+        return (local["new_links"] + prior_rate * prior_seconds) / (local["seconds"] + prior_seconds)
+
+    def plan(self, domain: str, location: str) -> List[str]:
+        """
+        Return the query templates to run for a domain and location, best first
+        Args:
+            domain: Domain/Industry being searched
+            location: Location being searched
+        Returns:
+            Templates ordered by expected yield, with pruned templates removed
+        """
+        scope = self.scope_key(domain, location)
+        with self._lock:
+            templates = list(self._state["templates"])
+            untried = [t for t in templates if self._stats(GLOBAL_SCOPE, t)["runs"] == 0]
+            tried = [t for t in templates if t not in untried]
+            kept = [
+                t for t in tried
+                if not (self._stats(scope, t)["runs"] >= PRUNE_AFTER_RUNS and self._stats(scope, t)["new_links"] == 0)
+            ]
+            ranked = sorted(
+                kept,
+                key=lambda t: (self.score(domain, location, t), self._per_page(scope, t)),
+                reverse=True
+            )
+        # Never prune everything; fall back to the full list in its configured order
+        return untried + ranked if untried or ranked else templates
+
+    def _per_page(self, scope, template) -> float:
+        stats = self._stats(scope, template)
+        return stats["new_links"] / stats["pages"] if stats["pages"] else 0.0
+
+    def record(self, domain: str, location: str, template: str, pages: int, new_links: int, seconds: float):
+        """Record the outcome of running one template for a domain and location"""
+        with self._lock:
+            for scope in (self.scope_key(domain, location), GLOBAL_SCOPE):
+                stats = self._state["stats"].setdefault(scope, {}).setdefault(
+                    template, {"runs": 0, "pages": 0, "new_links": 0, "seconds": 0.0}
+                )
+                stats["runs"] += 1
+                stats["pages"] += pages
+                stats["new_links"] += new_links
+                stats["seconds"] = round(stats["seconds"] + seconds, 3)
+            self._dirty = True
+            due = time.time() - self._saved_at >= SAVE_INTERVAL
+        if due:
+            self.flush()
+
+    def get_stats(self, domain: str = None, location: str = None) -> Dict[str, Dict[str, float]]:
+        """Return the recorded statistics for a scope, or the global ones"""
+        scope = self.scope_key(domain, location) if domain is not None and location is not None else GLOBAL_SCOPE
+        with self._lock:
+            return {t: dict(self._stats(scope, t)) for t in self._state["templates"]}
+
+
+planner = QueryPlanner()
+atexit.register(planner.flush)
@@ -0,0 +1,269 @@
+"""
+Remote WebDriver nodes that browsers can be placed on instead of the app host
+
+Nodes are read from the JSON file at WEBDRIVER_CONFIG:
+    {
+        "local_fallback": true,
+        "nodes": [
+            {"name": "grid", "url": "http://10.0.0.7:4444"},
+            {"name": "box-b", "url": "http://10.0.0.8:9515", "capacity": 4}
+        ]
+    }
+Each node's /status is polled: a Selenium Grid (hub or standalone) reports its slots
+and busy sessions, a bare chromedriver only whether it is ready, so give it a capacity.
+New browsers go to the least loaded ready node; with local_fallback they start on the
+app host when every node is full or down. Without a config file every browser is local.
+
+Run `python -m companies_details_extraction.remote_drivers --spawn 3` to start three
+local chromedriver processes standing in for nodes and print a matching config, and
+`python -m companies_details_extraction.remote_drivers --status` to check the nodes.
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import threading
+import time
+from typing import Any, Dict, List, Optional
+import requests
+from selenium import webdriver
+from companies_details_extraction.browser_scheduler import MAX_BROWSERS, scheduler
+
+WEBDRIVER_CONFIG = os.environ.get(
+    "WEBDRIVER_CONFIG",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "webdriver_nodes.json")
+)
+# MAX_BROWSERS set explicitly caps admission; otherwise it follows the discovered capacity
+CAPACITY_FROM_ENV = "MAX_BROWSERS" in os.environ
+DISCOVERY_INTERVAL = 30
+STATUS_TIMEOUT = 3
+# A node that failed to start a session is skipped for this long
+NODE_COOLDOWN = 60
+
+
+class NoNodeAvailable(Exception):
+    """Raised when no WebDriver node has free capacity and local fallback is off"""
+
+
+class WebDriverNode:
+    """A remote WebDriver endpoint with its capacity and the sessions placed on it"""
+
+    def __init__(self, name: str, url: str, capacity: int = None):
+        self.name = name
+        self.url = url.rstrip("/")
+        self.configured_capacity = capacity
+        self.capacity = capacity or 1
+        self.ready = False
+        self.busy = 0
+        self.in_use = 0
+        self.started = 0
+        self.failures = 0
+        self.cooldown_until = 0.0
+        self.last_checked = None
+
+    @property
+    def used(self) -> int:
+        # A grid's busy count includes our own sessions, a chromedriver reports none
+        return max(self.in_use, self.busy)
+
+    @property
+    def available(self) -> bool:
+        return self.ready and time.time() >= self.cooldown_until and self.used < self.capacity
+
+    def load(self) -> float:
+        return self.used / self.capacity if self.capacity else 1.0
+
+    def update_status(self, status: Dict[str, Any]):
+        """Apply a /status response from a Selenium Grid or a chromedriver"""
+        value = status.get("value", status)
+        self.last_checked = time.time()
+        grid_nodes = value.get("nodes")
+        if grid_nodes is None:
+            self.ready = bool(value.get("ready"))
+            self.busy = 0
+            return
+        slots = [
+            slot for node in grid_nodes if node.get("availability", "UP") == "UP"
+            for slot in node.get("slots", [])
+        ]
+        self.ready = bool(value.get("ready")) or bool(slots)
+        self.busy = sum(1 for slot in slots if slot.get("session"))
+        self.capacity = self.configured_capacity or len(slots)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "url": self.url,
+            "status": "ready" if self.ready and time.time() >= self.cooldown_until else "down",
+            "capacity": self.capacity,
+            "in_use": self.in_use,
+            "busy": self.busy,
+            "started": self.started,
+            "failures": self.failures
+        }
+
+
+def load_nodes(path: str = WEBDRIVER_CONFIG):
+    """Read (nodes, local_fallback) from the config file; no file means no nodes"""
+    config = {}
+    if path and os.path.exists(path):
+        try:
+            with open(path, "r") as f:
+                config = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error reading WebDriver config {path}: {e}")
+    nodes = [
+        WebDriverNode(entry.get("name") or f"node-{index}", entry["url"], entry.get("capacity"))
+        for index, entry in enumerate(config.get("nodes", []))
+    ]
+    return nodes, config.get("local_fallback", True)
+
+
+class DriverFactory:
+    """
+    Places new browsers on remote WebDriver nodes, least loaded first, or on the local host
+    Node readiness and capacity are refreshed from each node's /status in the background.
+    """
+
+    def __init__(self, nodes: List[WebDriverNode] = None, local_fallback: bool = True):
+        if nodes is None:
+            nodes, local_fallback = load_nodes()
+        self.nodes = nodes
+        self.local_fallback = local_fallback
+        self._lock = threading.Lock()
+        self._discovery = None
+
+    @property
+    def remote(self) -> bool:
+        return bool(self.nodes)
+
+    def discover(self):
+        """Poll every node's /status and resize browser admission to the capacity found"""
+        for node in self.nodes:
+            try:
+                response = requests.get(f"{node.url}/status", timeout=STATUS_TIMEOUT)
+                status = response.json()
+            except (requests.RequestException, ValueError):
+                status = None
+            with self._lock:
+                if status is None:
+                    node.ready = False
+                    node.last_checked = time.time()
+                else:
+                    node.update_status(status)
+        if self.remote and not CAPACITY_FROM_ENV:
+            scheduler.resize(self.capacity())
+
+    def capacity(self) -> int:
+        """Browsers that can run at once: ready node capacity, plus the local cap with fallback"""
+        with self._lock:
+            remote = sum(node.capacity for node in self.nodes if node.ready)
+        return max(1, remote + (MAX_BROWSERS if self.local_fallback else 0))
+
+    def start_discovery(self):
+        """Discover nodes now and keep refreshing them in the background"""
+        if not self.remote or self._discovery is not None:
+            return
+        self.discover()
+
+        def refresh():
+            while True:
+                time.sleep(DISCOVERY_INTERVAL)
+                try:
+                    self.discover()
+                except Exception as e:
+                    print(f"WebDriver node discovery error: {e}")
+
+        self._discovery = threading.Thread(target=refresh, name="webdriver-discovery", daemon=True)
+        self._discovery.start()
+
+    def acquire(self) -> Optional[WebDriverNode]:
+        """
+        Reserve capacity on the least loaded ready node
+        Returns:
+            The node, or None when the browser should run locally
+        Raises:
+            NoNodeAvailable: every node is full or down and local fallback is off
+        """
+        with self._lock:
+            candidates = [node for node in self.nodes if node.available]
+            if candidates:
+                node = min(candidates, key=lambda n: (n.load(), n.in_use, n.failures))
+                node.in_use += 1
+                return node
+        if not self.remote or self.local_fallback:
+            return None
+        raise NoNodeAvailable("No WebDriver node has free capacity")
+
+    def release(self, node: Optional[WebDriverNode]):
+        if node is None:
+            return
+        with self._lock:
+            node.in_use = max(0, node.in_use - 1)
+
+    def start(self, node: WebDriverNode, options):
+        """Start a browser session on a reserved node, releasing the reservation if it fails"""
+        try:
+            driver = webdriver.Remote(command_executor=node.url, options=options)
+        except Exception:
+            with self._lock:
+                node.failures += 1
+                node.cooldown_until = time.time() + NODE_COOLDOWN
+            self.release(node)
+            raise
+        with self._lock:
+            node.started += 1
+        return driver
+
+    def get_stats(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [node.to_dict() for node in self.nodes]
+
+
+factory = DriverFactory()
+factory.start_discovery()
+
+
+def spawn_local_nodes(count: int, first_port: int, chromedriver: str) -> List[subprocess.Popen]:
+    """Start chromedriver processes on consecutive ports to stand in for remote nodes"""
+    return [
+        subprocess.Popen([chromedriver, f"--port={first_port + index}"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        for index in range(count)
+    ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check or simulate remote WebDriver nodes")
+    parser.add_argument("--status", action="store_true", help="Poll the configured nodes and print their state")
+    parser.add_argument("--spawn", type=int, help="Start this many local chromedriver nodes and print their config")
+    parser.add_argument("--port", type=int, default=9515, help="Port of the first spawned node")
+    parser.add_argument("--capacity", type=int, default=2, help="Capacity to give each spawned node")
+    parser.add_argument("--chromedriver", default=shutil.which("chromedriver") or "chromedriver")
+    args = parser.parse_args()
+
+    if args.spawn:
+        processes = spawn_local_nodes(args.spawn, args.port, args.chromedriver)
+        print(json.dumps({
+            "local_fallback": False,
+            "nodes": [
+                {"name": f"local-{index}", "url": f"http://127.0.0.1:{args.port + index}", "capacity": args.capacity}
+                for index in range(args.spawn)
+            ]
+        }, indent=4))
+        print("Save this as WEBDRIVER_CONFIG; press Ctrl+C to stop the nodes")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            for process in processes:
+                process.terminate()
+    elif args.status:
+        factory.discover()
+        for stats in factory.get_stats():
+            print(json.dumps(stats))
+        print(f"Total capacity: {factory.capacity()}")
+    else:
+        parser.print_help()
@@ -0,0 +1,229 @@
+import functools
+import hashlib
+import inspect
+import json
+import math
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from companies_details_extraction.cancellation import ScrapeResult
+from companies_details_extraction.serp_archive import replay_enabled
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache')
+if not os.path.exists(CACHE_DIR):
+    os.makedirs(CACHE_DIR)
+
+# Cached results are served for this long
+CACHE_TTL = 24 * 3600
+CACHE_ENABLED = os.environ.get("RESULT_CACHE", "1") != "0"
+# Keyword arguments that control how a call runs rather than what it returns; left out of cache keys
+CONTROL_KWARGS = ("timeout", "cancel_token", "prefetch")
+
+POPULARITY_FILE = os.path.join(CACHE_DIR, 'query_popularity.json')
+# Request counts halve over this many seconds, so last month's favourites fade out
+POPULARITY_HALF_LIFE = 7 * 24 * 3600
+MAX_LOGGED_QUERIES = 500
+# The log is written at most this often
+POPULARITY_SAVE_INTERVAL = 30
+
+# Cached functions by name, so the warmer can re-run logged calls
+CACHED_FUNCTIONS = {}
+
+
+def cache_arguments(func, args: tuple, kwargs: Dict[str, Any]) -> Tuple[tuple, Dict[str, Any]]:
+    """
+    Arguments that identify a cached call, bound to func's signature with defaults applied
+    Positional and keyword spellings of the same call give the same arguments. Parameters up
+    to the first control argument come back positionally; later ones only as keywords and only
+    when they differ from their default, so a call passing every leading argument positionally
+    keeps the key it had before keys were normalized.
+    """
+    bound = inspect.signature(func).bind(*args, **kwargs)
+    bound.apply_defaults()
+    key_args, key_kwargs = [], {}
+    positional = True
+    for name, parameter in bound.signature.parameters.items():
+        value = bound.arguments[name]
+        if name in CONTROL_KWARGS:
+            positional = False
+        elif parameter.kind == parameter.VAR_KEYWORD:
+            key_kwargs.update((key, item) for key, item in value.items() if key not in CONTROL_KWARGS)
+        elif parameter.kind == parameter.VAR_POSITIONAL:
+            key_args.extend(value)
+        elif positional and parameter.kind != parameter.KEYWORD_ONLY:
+            key_args.append(value)
+        elif value != parameter.default:
+            positional = False
+            key_kwargs[name] = value
+        else:
+            positional = False
+    return tuple(key_args), dict(sorted(key_kwargs.items()))
+
+
+def call_arguments(func_name, args: tuple, kwargs: Dict[str, Any] = None) -> Tuple[tuple, Dict[str, Any]]:
+    """cache_arguments() for a registered cached function, looked up by name"""
+    func = CACHED_FUNCTIONS.get(func_name)
+    if func is None:
+        return args, dict(kwargs or {})
+    return cache_arguments(func, args, kwargs or {})
+
+
+def get_cache_key(func_name, *args, **kwargs):
+    """Generate a cache key based on function name and arguments"""
+    key = f"{func_name}_{args}" + (f"_{kwargs}" if kwargs else "")
+    return hashlib.md5(key.encode()).hexdigest()
+
+
+def cache_file(func_name, args, kwargs) -> str:
+    return os.path.join(CACHE_DIR, f"{get_cache_key(func_name, *args, **kwargs)}.json")
+
+
+def cache_age(func_name, args, kwargs) -> Optional[float]:
+    """Seconds since a call's result was cached, or None if it is not cached"""
+    path = cache_file(func_name, args, kwargs)
+    try:
+        return time.time() - os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+def is_cached(func_name, args: tuple, kwargs: Dict[str, Any] = None) -> bool:
+    """True if a call to a cached function would be answered from the cache"""
+    if not CACHE_ENABLED or replay_enabled():
+        return False
+    age = cache_age(func_name, *call_arguments(func_name, args, kwargs))
+    return age is not None and age < CACHE_TTL
+
+
+def write_cache(path: str, results):
+    # Searches cut short by a deadline are not cached
+    if not getattr(results, "complete", True):
+        return
+    try:
+        with open(path, 'w') as f:
+            json.dump(results, f)
+    except (OSError, TypeError, ValueError):
+        pass  # If cache write fails, just return results
+
+
+def store_result(func_name, args: tuple, results, kwargs: Dict[str, Any] = None):
+    """Cache results gathered another way as the result of a call to a cached function"""
+    if CACHE_ENABLED and not replay_enabled():
+        write_cache(cache_file(func_name, *call_arguments(func_name, args, kwargs)), results)
+
+
+def cache_results(func):
+    """
+    Decorator to cache search results for CACHE_TTL seconds
+    Every call is also counted in the query popularity log, and the wrapper gets a
+    refresh(*args, **kwargs) method that re-runs the search and overwrites its cache entry.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        # Replays must re-parse the archived pages rather than return earlier results
+        if replay_enabled() or not CACHE_ENABLED:
+            return func(*args, **kwargs)
+
+        key_args, key_kwargs = cache_arguments(func, args, kwargs)
+        query_log.record(func.__name__, key_args, key_kwargs)
+        path = cache_file(func.__name__, key_args, key_kwargs)
+
+        # Check if cache exists and is recent
+        age = cache_age(func.__name__, key_args, key_kwargs)
+        if age is not None and age < CACHE_TTL:
+            try:
+                with open(path, 'r') as f:
+                    return ScrapeResult(json.load(f))
+            except (OSError, ValueError):
+                pass  # If cache read fails, continue with normal execution
+
+        results = func(*args, **kwargs)
+        write_cache(path, results)
+        return results
+
+    def refresh(*args, **kwargs):
+        """Run the search again, bypassing and replacing its cached result"""
+        results = func(*args, **kwargs)
+        if CACHE_ENABLED:
+            key_args, key_kwargs = cache_arguments(func, args, kwargs)
+            write_cache(cache_file(func.__name__, key_args, key_kwargs), results)
+        return results
+
+    wrapper.refresh = refresh
+    CACHED_FUNCTIONS[func.__name__] = wrapper
+    return wrapper
+
+
+class QueryLog:
+    """
+    Decayed request counts of cached calls, overall and by hour of day
+    Tells the cache warmer which queries are worth keeping fresh and when traffic is low.
+    """
+
+    def __init__(self, path: str = POPULARITY_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._saved_at = 0.0
+        self._state = self._load()
+
+    def _load(self) -> Dict:
+        try:
+            with open(self.path, 'r') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = {}
+        state.setdefault("queries", {})
+        state.setdefault("hours", [0] * 24)
+        return state
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(self._state, f, indent=1)
+        os.replace(temp_path, self.path)
+        self._saved_at = time.time()
+
+    @staticmethod
+    def _decayed(entry: Dict[str, Any], now: float) -> float:
+        return entry["count"] * math.pow(0.5, (now - entry["updated"]) / POPULARITY_HALF_LIFE)
+
+    def record(self, func_name: str, args: tuple, kwargs: Dict[str, Any] = None, weight: float = 1.0):
+        """Count one request for a cached call"""
+        kwargs = kwargs or {}
+        key = get_cache_key(func_name, *args, **kwargs)
+        now = time.time()
+        with self._lock:
+            queries = self._state["queries"]
+            entry = queries.get(key)
+            if entry is None:
+                entry = queries[key] = {"func": func_name, "args": list(args), "kwargs": kwargs, "count": 0.0, "updated": now}
+            entry["count"] = self._decayed(entry, now) + weight
+            entry["updated"] = now
+            self._state["hours"][datetime.fromtimestamp(now).hour] += weight
+
+            if len(queries) > MAX_LOGGED_QUERIES:
+                for stale in sorted(queries, key=lambda k: self._decayed(queries[k], now))[:len(queries) - MAX_LOGGED_QUERIES]:
+                    del queries[stale]
+            if now - self._saved_at >= POPULARITY_SAVE_INTERVAL:
+                try:
+                    self._save()
+                except OSError as e:
+                    print(f"Could not save query popularity log: {e}")
+
+    def top(self, n: int) -> List[Dict[str, Any]]:
+        """The n most requested calls, each with func, args, kwargs and decayed count"""
+        now = time.time()
+        with self._lock:
+            entries = [dict(entry, count=self._decayed(entry, now)) for entry in self._state["queries"].values()]
+        return sorted(entries, key=lambda entry: entry["count"], reverse=True)[:n]
+
+    def hourly_traffic(self) -> List[float]:
+        """Requests logged in each hour of the day (local time), all time"""
+        with self._lock:
+            return list(self._state["hours"])
+
+
+query_log = QueryLog()
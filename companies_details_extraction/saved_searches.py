@@ -0,0 +1,255 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlsplit, urlunsplit
+from companies_details_extraction.browser_scheduler import PRIORITY_BATCH, scheduling_context
+from companies_details_extraction.cancellation import cancellation_scope
+from companies_details_extraction.job_search import get_platforms, search_combined_platforms
+from companies_details_extraction.result_cache import CACHE_DIR
+from companies_details_extraction.scrape_logging import request_scope
+
+SAVED_SEARCHES_FILE = os.path.join(CACHE_DIR, 'saved_searches.json')
+
+DEFAULT_INTERVAL = 24 * 3600
+# How often the watcher looks for saved searches that are due
+WATCH_CHECK_INTERVAL = int(os.environ.get("WATCH_CHECK_INTERVAL", 60))
+# A watch run gives up after this many seconds and records what it found
+WATCH_RUN_TIMEOUT = 600
+# Fingerprints not seen for this long are forgotten so the store does not grow forever
+FINGERPRINT_TTL = 30 * 24 * 3600
+# Unread new/changed postings kept per saved search
+MAX_UNREAD = 200
+
+NEW = "new"
+CHANGED = "changed"
+
+
+def posting_key(link: str) -> str:
+    """Stable identity of a posting: its link without query string, fragment or trailing slash"""
+    parts = urlsplit(link or "")
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/"), "", ""))
+
+
+def posting_hash(posting: Dict[str, Any]) -> str:
+    """Hash of the posting content, so edits to a known posting are noticed"""
+    text = " ".join(re.findall(r"[a-z0-9]+", f"{posting.get('title', '')} {posting.get('description', '')}".lower()))
+    return hashlib.md5(text.encode()).hexdigest()
+
+
+class SavedSearches:
+    """
+    Saved job searches that are re-run periodically, reporting only postings not seen before
+    Each search keeps a fingerprint (content hash and last-seen time) of every posting it
+    has returned. A run walks result pages until a page holds nothing new, and the postings
+    that are new or whose content changed are kept as unread and passed to listeners.
+    """
+
+    def __init__(self, path: str = SAVED_SEARCHES_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._running = set()
+        self._listeners = []
+        self._state = self._load()
+
+    def _load(self) -> Dict:
+        try:
+            with open(self.path, 'r') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = {}
+        state.setdefault("searches", {})
+        return state
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(self._state, f, indent=1)
+        os.replace(temp_path, self.path)
+
+    def _save_quietly(self):
+        try:
+            self._save()
+        except OSError as e:
+            print(f"Could not save saved searches: {e}")
+
+    def add_listener(self, callback: Callable[[Dict[str, Any], List[Dict[str, Any]]], None]):
+        """Call callback(search, postings) whenever a run finds new or changed postings"""
+        self._listeners.append(callback)
+
+    def save(self, job_title: str, location: str, search_types: List[bool] = (False,), platforms: List[str] = None,
+             limit: int = 10, interval: int = DEFAULT_INTERVAL) -> str:
+        """
+        Save a job search to be re-run every interval seconds
+        Args:
+            job_title: Job title or keywords
+            location: Location for job search
+            search_types: is_internship flags to search for
+            platforms: Platform names to search (default: all platforms for each search type)
+            limit: Number of results to collect per platform on each run
+            interval: Seconds between runs
+        Returns:
+            Id of the saved search; saving the same search again updates it
+        """
+        key = json.dumps([job_title.strip().lower(), location.strip().lower(), sorted(search_types), sorted(platforms or [])])
+        with self._lock:
+            search_id = next(
+                (sid for sid, search in self._state["searches"].items() if search["key"] == key),
+                uuid.uuid4().hex[:12]
+            )
+            search = self._state["searches"].setdefault(search_id, {
+                "id": search_id,
+                "key": key,
+                "fingerprints": {},
+                "unread": [],
+                "last_run": None,
+                "runs": 0
+            })
+            search.update({
+                "job_title": job_title,
+                "location": location,
+                "search_types": list(search_types),
+                "platforms": list(platforms or []),
+                "limit": limit,
+                "interval": interval,
+                "next_run": search.get("next_run") or time.time()
+            })
+            self._save_quietly()
+        return search_id
+
+    def remove(self, search_id: str):
+        with self._lock:
+            if self._state["searches"].pop(search_id, None) is not None:
+                self._save_quietly()
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Saved searches without their fingerprints"""
+        with self._lock:
+            return [
+                {key: value for key, value in search.items() if key != "fingerprints"}
+                | {"known": len(search["fingerprints"]), "running": search["id"] in self._running}
+                for search in self._state["searches"].values()
+            ]
+
+    def mark_read(self, search_id: str):
+        with self._lock:
+            search = self._state["searches"].get(search_id)
+            if search and search["unread"]:
+                search["unread"] = []
+                self._save_quietly()
+
+    def due(self, now: float = None) -> List[str]:
+        now = time.time() if now is None else now
+        with self._lock:
+            return [
+                search_id for search_id, search in self._state["searches"].items()
+                if search["next_run"] <= now and search_id not in self._running
+            ]
+
+    def run(self, search_id: str, timeout: float = WATCH_RUN_TIMEOUT) -> List[Dict[str, Any]]:
+        """
+        Run a saved search now and return the postings that are new or changed since its last run
+        Each returned posting has a 'change' key of NEW or CHANGED.
+        """
+        with self._lock:
+            search = self._state["searches"].get(search_id)
+            if search is None or search_id in self._running:
+                return []
+            self._running.add(search_id)
+            search = {key: value for key, value in search.items() if key != "fingerprints"}
+            known = set(self._state["searches"][search_id]["fingerprints"])
+
+        postings = []
+        complete = True
+        try:
+            with cancellation_scope(timeout), request_scope(f"watch-{search_id}"):
+                for is_internship in search["search_types"]:
+                    platforms = [name for name in get_platforms(is_internship) if not search["platforms"] or name in search["platforms"]]
+                    if not platforms:
+                        continue
+                    results = search_combined_platforms(
+                        search["job_title"], search["location"], is_internship, search["limit"], platforms,
+                        is_known=lambda link: posting_key(link) in known
+                    )
+                    complete = complete and results.complete
+                    postings.extend(dict(result, Type="Internship" if is_internship else "Job") for result in results)
+            return self._record_run(search_id, postings, complete)
+        finally:
+            with self._lock:
+                self._running.discard(search_id)
+
+    def _record_run(self, search_id: str, postings: List[Dict[str, Any]], complete: bool) -> List[Dict[str, Any]]:
+        now = time.time()
+        changes = []
+        with self._lock:
+            search = self._state["searches"].get(search_id)
+            if search is None:
+                return []
+            fingerprints = search["fingerprints"]
+            for posting in postings:
+                key = posting_key(posting["link"])
+                content = posting_hash(posting)
+                previous = fingerprints.get(key)
+                if previous is None:
+                    changes.append(dict(posting, change=NEW))
+                elif previous["hash"] != content:
+                    changes.append(dict(posting, change=CHANGED))
+                fingerprints[key] = {"hash": content, "seen": now}
+
+            for key in [key for key, fingerprint in fingerprints.items() if now - fingerprint["seen"] > FINGERPRINT_TTL]:
+                del fingerprints[key]
+
+            search["unread"] = (changes + search["unread"])[:MAX_UNREAD]
+            search["last_run"] = now
+            search["runs"] += 1
+            search["complete"] = complete
+            search["next_run"] = now + search["interval"]
+            self._save_quietly()
+            listeners = list(self._listeners)
+            snapshot = {key: value for key, value in search.items() if key != "fingerprints"}
+
+        if changes:
+            print(f"🔔 Saved search '{search['job_title']} / {search['location']}': {len(changes)} new or changed postings")
+            for listener in listeners:
+                try:
+                    listener(snapshot, changes)
+                except Exception as e:
+                    print(f"Error notifying saved search listener: {e}")
+        return changes
+
+    def run_due(self):
+        """Run every saved search that is due, one after another"""
+        for search_id in self.due():
+            try:
+                self.run(search_id)
+            except Exception as e:
+                print(f"Error running saved search {search_id}: {e}")
+
+
+saved_searches = SavedSearches()
+
+_watcher = None
+_watcher_lock = threading.Lock()
+
+
+def _watch():
+    # Watch runs queue behind interactive scrapes for browsers
+    with scheduling_context(session_id="saved-searches", priority=PRIORITY_BATCH):
+        while True:
+            saved_searches.run_due()
+            time.sleep(WATCH_CHECK_INTERVAL)
+
+
+def start_watcher() -> Optional[threading.Thread]:
+    """Start the background thread that re-runs due saved searches; safe to call repeatedly"""
+    global _watcher
+    with _watcher_lock:
+        if _watcher is None:
+            _watcher = threading.Thread(target=_watch, name="saved-search-watcher", daemon=True)
+            _watcher.start()
+    return _watcher
@@ -0,0 +1,136 @@
+"""
+Structured, non-blocking logging for the scrapers
+
+Loggers from get_logger() write to a queue; a single listener thread formats the
+records and writes them to stderr, so scraping threads never block on the console.
+Every record carries the id of the request it belongs to, set with request_scope()
+and inherited by worker threads that run in a copy of the caller's context.
+
+    LOG_LEVEL   DEBUG, INFO (default), WARNING or ERROR
+    LOG_FORMAT  "json" (default, one object per line) or "text"
+"""
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Optional
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "json")
+# Records beyond this many waiting in the queue are dropped rather than block the scraper
+LOG_QUEUE_SIZE = 10000
+ROOT_LOGGER = "hirvana"
+
+_request_id = contextvars.ContextVar("request_id", default=None)
+_setup_lock = threading.Lock()
+_listener = None
+
+# Attributes every LogRecord has; anything else was passed through extra=
+_STANDARD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "request_id"}
+
+
+def current_request_id() -> Optional[str]:
+    return _request_id.get()
+
+
+@contextmanager
+def request_scope(request_id: str = None):
+    """Tag every record logged in the block, and in threads started from it, with a request id"""
+    reset = _request_id.set(request_id or uuid.uuid4().hex[:12])
+    try:
+        yield _request_id.get()
+    finally:
+        _request_id.reset(reset)
+
+
+class RequestContextFilter(logging.Filter):
+    """Attach the request id of the logging thread before the record crosses to the listener"""
+
+    def filter(self, record):
+        record.request_id = _request_id.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+            "thread": record.threadName
+        }
+        entry.update({key: value for key, value in vars(record).items() if key not in _STANDARD_ATTRIBUTES})
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record):
+        extra = " ".join(f"{key}={value}" for key, value in vars(record).items() if key not in _STANDARD_ATTRIBUTES)
+        request_id = getattr(record, "request_id", None)
+        line = (
+            f"{self.formatTime(record, '%H:%M:%S')} {record.levelname:<7} "
+            f"{f'[{request_id}] ' if request_id else ''}{record.getMessage()}{f' {extra}' if extra else ''}"
+        )
+        if record.exc_text:
+            line += "\n" + record.exc_text
+        return line
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records when the queue is full instead of blocking"""
+
+    def prepare(self, record):
+        # Merge the arguments and render the traceback here; tracebacks cannot cross threads safely
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+
+def setup_logging():
+    """Route the scraper loggers through the queue listener; safe to call repeatedly"""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            return
+        stream_handler = logging.StreamHandler(sys.stderr)
+        stream_handler.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else TextFormatter())
+        log_queue = queue.Queue(LOG_QUEUE_SIZE)
+        _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+
+        queue_handler = DroppingQueueHandler(log_queue)
+        queue_handler.addFilter(RequestContextFilter())
+        root = logging.getLogger(ROOT_LOGGER)
+        root.addHandler(queue_handler)
+        root.setLevel(LOG_LEVEL)
+        root.propagate = False
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger for a scraper module, e.g. get_logger(__name__)"""
+    setup_logging()
+    return logging.getLogger(f"{ROOT_LOGGER}.{name.rsplit('.', 1)[-1]}")
@@ -0,0 +1,222 @@
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote
+from companies_details_extraction.cancellation import CancelToken, ScrapeCancelled, context_with_token, current_token
+from companies_details_extraction.driver_manager import lease_driver
+from companies_details_extraction.serp_archive import archive_page, settle
+from companies_details_extraction.scrape_logging import get_logger
+from companies_details_extraction.serp_extraction import extract_bing_results, extract_duckduckgo_results
+
+logger = get_logger(__name__)
+
+# Base URLs are configurable so the scrapers can be pointed at a local stub engine
+BING_BASE_URL = os.environ.get("BING_BASE_URL", "https://www.bing.com").rstrip("/")
+DUCKDUCKGO_BASE_URL = os.environ.get("DUCKDUCKGO_BASE_URL", "https://duckduckgo.com").rstrip("/")
+
+# Seconds the primary engine gets to produce usable results, on top of its fixed render waits
+# (see SearchEngine.fixed_wait), before the query is also sent to the secondary
+HEDGE_BUDGET = float(os.environ.get("SEARCH_HEDGE_BUDGET", 4))
+HEDGING_ENABLED = os.environ.get("SEARCH_HEDGING", "1") != "0"
+
+
+class SearchEngine:
+    """A results page source: how to build its URLs, load a page and extract its results"""
+
+    name = ""
+    # Whether build_url can jump straight to a result offset
+    supports_offsets = False
+
+    def __init__(self, base_url: str, page_wait: float):
+        self.base_url = base_url
+        self.page_wait = page_wait
+
+    def build_url(self, query: str, first: int = None) -> str:
+        raise NotImplementedError
+
+    def fixed_wait(self) -> float:
+        """Seconds every fetch spends waiting for the page to render, however fast the engine answers"""
+        return self.page_wait
+
+    def extract(self, driver) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def load(self, driver, query: str, url: str, wait: float = None):
+        """Navigate to a results page, wait for it to render and archive it"""
+        driver.get(url)
+        settle(driver, self.page_wait if wait is None else wait)
+        current_token().check()
+        archive_page(driver, query, self.name, url)
+
+    def fetch(self, driver, query: str, first: int = None, url: str = None, wait: float = None) -> Dict[str, Any]:
+        """
+        Load a results page and extract it
+        Args:
+            driver: Leased WebDriver
+            query: Search query
+            first: 1-based offset of the first result, for engines that support offsets (optional)
+            url: Results page URL to load instead of building one, e.g. a next_page link
+            wait: Seconds to let the page render (default: the engine's page_wait)
+        Returns:
+            Dict with 'results', 'next_page' and 'blocked' (the page was a challenge page)
+        """
+        self.load(driver, query, url or self.build_url(query, first), wait)
+        page = self.extract(driver)
+        page["blocked"] = bool(getattr(driver, "blocked", False))
+        return page
+
+
+class BingEngine(SearchEngine):
+    name = "bing"
+    supports_offsets = True
+
+    def build_url(self, query: str, first: int = None) -> str:
+        url = f"{self.base_url}/search?q={quote(query)}"
+        return f"{url}&first={first}" if first is not None else url
+
+    def extract(self, driver) -> Dict[str, Any]:
+        return extract_bing_results(driver)
+
+
+class DuckDuckGoEngine(SearchEngine):
+    """DuckDuckGo's results page, which loads further results as it is scrolled"""
+
+    name = "duckduckgo"
+
+    def __init__(self, base_url: str, page_wait: float, scrolls: int = 3, scroll_wait: float = 1):
+        super().__init__(base_url, page_wait)
+        self.scrolls = scrolls
+        self.scroll_wait = scroll_wait
+
+    def build_url(self, query: str, first: int = None) -> str:
+        return f"{self.base_url}/?q={quote(query)}&t=h_&ia=web"
+
+    def scroll(self, driver):
+        """Scroll to the bottom a few times so more results load"""
+        for _ in range(self.scrolls):
+            current_token().check()
+            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+            settle(driver, self.scroll_wait)
+
+    def fixed_wait(self) -> float:
+        return self.page_wait + self.scrolls * self.scroll_wait
+
+    def load(self, driver, query: str, url: str, wait: float = None):
+        driver.get(url)
+        settle(driver, self.page_wait if wait is None else wait)
+        self.scroll(driver)
+        current_token().check()
+        # Archive the scrolled page so replays see every loaded result
+        archive_page(driver, query, self.name, url)
+
+    def extract(self, driver) -> Dict[str, Any]:
+        return extract_duckduckgo_results(driver)
+
+
+ENGINES = {
+    "bing": BingEngine(BING_BASE_URL, page_wait=2),
+    "duckduckgo": DuckDuckGoEngine(DUCKDUCKGO_BASE_URL, page_wait=1.5)
+}
+
+
+def has_results(page: Dict[str, Any]) -> bool:
+    return bool(page["results"]) and not page.get("blocked")
+
+
+def hedged_fetch(query: str, engines: List[str], usable: Callable[[Dict[str, Any]], bool] = has_results,
+                 consume: Callable = None, budget: float = None, first: int = None) -> Tuple[Optional[SearchEngine], Any]:
+    """
+    Fetch the first results page of a query, hedging a slow or blocked primary engine with the next one
+    The primary engine is queried first. If it has not produced a usable page within its fixed
+    render waits plus the budget, or fails or returns an unusable page earlier, the query is also
+    sent to the next engine. The first usable page wins and the other attempts are cancelled,
+    aborting a page load still in progress.
+    Args:
+        query: Search query
+        engines: Engine names in order of preference
+        usable: Predicate deciding whether a page is a good answer (default: non-empty and not blocked)
+        consume: Optional callback (engine, driver, page) run for the winner while it still holds
+            its driver, e.g. to load more results; its return value replaces the page
+        budget: Seconds beyond an engine's fixed_wait() before hedging (default: HEDGE_BUDGET)
+        first: Result offset passed to engines that support offsets (optional)
+    Returns:
+        (engine, page or consume() result) of the winner, or (None, None) if no engine was usable
+    """
+    budget = HEDGE_BUDGET if budget is None else budget
+    engines = [ENGINES[name] for name in engines] if HEDGING_ENABLED else [ENGINES[engines[0]]]
+    parent = current_token()
+    tokens = {engine.name: CancelToken(parents=[parent]) for engine in engines}
+    lock = threading.Lock()
+    winner = []
+    drivers = {}
+
+    def cancel_others(engine):
+        for name, token in tokens.items():
+            if name != engine.name:
+                token.cancel("lost the hedge")
+                with lock:
+                    driver = drivers.get(name)
+                # A page load cannot notice the token, so it is cut off instead
+                if driver is not None and hasattr(driver, "interrupt_load"):
+                    driver.interrupt_load()
+
+    def attempt(engine):
+        with lease_driver() as driver:
+            with lock:
+                drivers[engine.name] = driver
+            try:
+                page = engine.fetch(driver, query, first)
+            finally:
+                with lock:
+                    drivers.pop(engine.name, None)
+            if not usable(page):
+                return None
+            with lock:
+                if winner:
+                    return None
+                winner.append(engine)
+            cancel_others(engine)
+            return consume(engine, driver, page) if consume else page
+
+    executor = ThreadPoolExecutor(max_workers=len(engines), thread_name_prefix="hedge")
+    pending = {}
+    try:
+        for index, engine in enumerate(engines):
+            started_at = time.monotonic()
+            engine_budget = engine.fixed_wait() + budget
+            future = executor.submit(context_with_token(tokens[engine.name]).run, attempt, engine)
+            pending[future] = engine
+            is_last = index == len(engines) - 1
+            # Wait out the budget for this engine, then hedge with the next one
+            while pending and not parent.cancelled:
+                # Once an attempt has won there is nothing left to hedge against
+                hedging = not is_last and not winner
+                left = engine_budget - (time.monotonic() - started_at)
+                if hedging and left <= 0:
+                    break
+                done, _ = wait(pending, timeout=min(left, 1.0) if hedging else 1.0, return_when=FIRST_COMPLETED)
+                for finished in done:
+                    finished_engine = pending.pop(finished)
+                    try:
+                        result = finished.result()
+                    except ScrapeCancelled:
+                        result = None
+                    except Exception as e:
+                        logger.warning("Search engine attempt failed", extra={"engine": finished_engine.name, "error": str(e)})
+                        result = None
+                    if result is not None:
+                        return finished_engine, result
+                # Everything sent so far failed: hedge right away
+                if not pending and not is_last:
+                    break
+            if parent.cancelled:
+                break
+            if not is_last:
+                logger.info("Hedging slow or unusable engine", extra={"engine": engine.name, "hedge": engines[index + 1].name})
+        return None, None
+    finally:
+        for token in tokens.values():
+            token.cancel("hedge finished")
+        executor.shutdown(wait=False, cancel_futures=True)
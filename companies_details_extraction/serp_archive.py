@@ -0,0 +1,133 @@
+import io
+import json
+import os
+import threading
+import time
+from typing import Dict, Any, Iterator, Optional
+import zstandard
+from companies_details_extraction.cancellation import current_token
+
+# Set SERP_ARCHIVE_PATH to record every fetched results page, SERP_REPLAY_PATH to replay from an archive
+ARCHIVE_PATH = os.environ.get("SERP_ARCHIVE_PATH")
+REPLAY_PATH = os.environ.get("SERP_REPLAY_PATH")
+
+_lock = threading.Lock()
+_settings = {"archive_path": ARCHIVE_PATH, "replay_path": None}
+_replay_index: Dict[str, Dict[str, Any]] = {}
+
+
+def enable_recording(path: str):
+    """Append every fetched results page to the archive at path"""
+    _settings["archive_path"] = path
+
+
+def disable_recording():
+    _settings["archive_path"] = None
+
+
+def recording_enabled() -> bool:
+    return bool(_settings["archive_path"])
+
+
+def archive_page(driver, query: str, engine: str, requested_url: str = None):
+    """
+    Append the page currently loaded in the driver to the archive, if recording is enabled
+    Each page is written as its own zstandard frame, so the file is append-only and
+    stays readable even if a write is interrupted.
+    Args:
+        driver: WebDriver with the results page loaded
+        query: Search query that produced the page
+        engine: Search engine name, e.g. 'bing' or 'duckduckgo'
+        requested_url: URL passed to driver.get (default: the driver's current URL)
+    """
+    path = _settings["archive_path"]
+    if not path or getattr(driver, "replay", False):
+        return
+    try:
+        record = {
+            "query": query,
+            "engine": engine,
+            "url": requested_url or driver.current_url,
+            "final_url": driver.current_url,
+            "timestamp": time.time(),
+            "html": driver.page_source
+        }
+        frame = zstandard.ZstdCompressor(level=10).compress((json.dumps(record) + "\n").encode("utf-8"))
+        with _lock:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(path, "ab") as f:
+                f.write(frame)
+    except Exception as e:
+        print(f"Error archiving page: {e}")
+
+
+def iter_archive(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield every archived page record in the order it was written"""
+    with open(path, "rb") as f:
+        reader = zstandard.ZstdDecompressor().stream_reader(f, read_across_frames=True)
+        for line in io.TextIOWrapper(reader, encoding="utf-8"):
+            if line.strip():
+                yield json.loads(line)
+
+
+def enable_replay(path: str):
+    """Serve pages from the archive at path instead of launching browsers"""
+    index = {}
+    for record in iter_archive(path):
+        # Later captures of the same URL win
+        index[record["url"]] = record
+        index.setdefault(record.get("final_url") or record["url"], record)
+    with _lock:
+        _replay_index.clear()
+        _replay_index.update(index)
+        _settings["replay_path"] = path
+    print(f"📼 Replaying {len(index)} archived pages from {path}")
+
+
+def disable_replay():
+    with _lock:
+        _replay_index.clear()
+        _settings["replay_path"] = None
+
+
+def replay_enabled() -> bool:
+    return bool(_settings["replay_path"])
+
+
+def settle(driver, seconds: float):
+    """Wait for a freshly loaded page to render; replayed pages are ready immediately, cancelled scrapes stop waiting"""
+    if not getattr(driver, "replay", False):
+        current_token().wait(seconds)
+
+
+class ReplayDriver:
+    """Stand-in for a WebDriver that serves archived pages without a browser or network"""
+
+    replay = True
+
+    def __init__(self):
+        self.current_url = ""
+        self.page_source = "<html></html>"
+        self.navigations = 0
+
+    def get(self, url: str):
+        current_token().check()
+        self.navigations += 1
+        self.current_url = url
+        record: Optional[Dict[str, Any]] = _replay_index.get(url)
+        if record is None:
+            print(f"📼 No archived page for {url}")
+            self.page_source = "<html></html>"
+        else:
+            self.page_source = record["html"]
+
+    def execute_script(self, script, *args):
+        # Scrolling and other page scripts have nothing to do on a static page
+        return None
+
+    def quit(self):
+        pass
+
+
+if REPLAY_PATH:
+    enable_replay(REPLAY_PATH)
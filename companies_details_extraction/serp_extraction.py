@@ -0,0 +1,331 @@
+from html.parser import HTMLParser
+from typing import List, Dict, Any
+from urllib.parse import urljoin
+import re
+from companies_details_extraction.scrape_logging import get_logger
+
+logger = get_logger(__name__)
+
+
+# Runs inside the page and collects every Bing result in a single WebDriver call
+BING_RESULTS_SCRIPT = """
+const results = [];
+document.querySelectorAll('li.b_algo').forEach(function (item) {
+    const anchor = item.querySelector('h2 a');
+    if (!anchor) {
+        return;
+    }
+    const snippet = item.querySelector('p');
+    results.push({
+        title: anchor.innerText || '',
+        href: anchor.href || '',
+        snippet: snippet ? (snippet.innerText || '') : ''
+    });
+});
+const nextPage = document.querySelector('a.sb_pagN');
+return {results: results, next_page: nextPage ? nextPage.href : null};
+"""
+
+# Same for DuckDuckGo, covering both the JavaScript results page and the html.duckduckgo.com layout
+DUCKDUCKGO_RESULTS_SCRIPT = """
+const results = [];
+document.querySelectorAll('article[data-testid="result"], div.result').forEach(function (item) {
+    const anchor = item.querySelector('a[data-testid="result-title-a"], a.result__a, h2 a');
+    if (!anchor) {
+        return;
+    }
+    const snippet = item.querySelector('[data-result="snippet"], .result__snippet');
+    results.push({
+        title: anchor.innerText || '',
+        href: anchor.href || '',
+        snippet: snippet ? (snippet.innerText || '') : ''
+    });
+});
+return {results: results, next_page: null};
+"""
+
+# Collects href and text of every anchor matching a CSS selector in a single WebDriver call
+LINKS_SCRIPT = """
+const links = [];
+document.querySelectorAll(arguments[0]).forEach(function (anchor) {
+    links.push({title: anchor.innerText || '', href: anchor.href || '', snippet: ''});
+});
+return links;
+"""
+
+
+def extract_bing_results(driver) -> Dict[str, Any]:
+    """
+    Extract all organic results from the currently loaded Bing results page
+    Args:
+        driver: WebDriver with a Bing results page loaded
+    Returns:
+        Dict with 'results' (list of dicts with title, href and snippet, in rank order)
+        and 'next_page' (href of the next results page or None)
+    """
+    if getattr(driver, "replay", False):
+        return parse_bing_results_html(driver.page_source, driver.current_url)
+
+    try:
+        page = driver.execute_script(BING_RESULTS_SCRIPT) or {}
+    except Exception as e:
+        logger.warning("Could not extract results", extra={"engine": "bing", "error": str(e)})
+        return {"results": [], "next_page": None}
+
+    return {
+        "results": [_clean_result(result) for result in page.get("results") or []],
+        "next_page": page.get("next_page")
+    }
+
+
+def extract_duckduckgo_results(driver) -> Dict[str, Any]:
+    """
+    Extract all organic results from the currently loaded DuckDuckGo results page
+    Args:
+        driver: WebDriver with a DuckDuckGo results page loaded
+    Returns:
+        Dict with 'results' (list of dicts with title, href and snippet, in rank order)
+        and 'next_page' (always None: more results load by scrolling)
+    """
+    if getattr(driver, "replay", False):
+        return parse_duckduckgo_results_html(driver.page_source, driver.current_url)
+
+    try:
+        page = driver.execute_script(DUCKDUCKGO_RESULTS_SCRIPT) or {}
+    except Exception as e:
+        logger.warning("Could not extract results", extra={"engine": "duckduckgo", "error": str(e)})
+        return {"results": [], "next_page": None}
+
+    return {
+        "results": [_clean_result(result) for result in page.get("results") or []],
+        "next_page": None
+    }
+
+
+def extract_links(driver, css_selector: str) -> List[Dict[str, str]]:
+    """
+    Extract all anchors matching a CSS selector from the currently loaded page
+    Args:
+        driver: WebDriver with the page loaded
+        css_selector: CSS selector for the anchors to collect
+    Returns:
+        List of dicts with title, href and snippet (always empty), in document order
+    """
+    if getattr(driver, "replay", False):
+        return parse_links_html(driver.page_source, css_selector, driver.current_url)
+
+    try:
+        links = driver.execute_script(LINKS_SCRIPT, css_selector) or []
+    except Exception as e:
+        logger.warning("Could not extract links", extra={"error": str(e)})
+        return []
+
+    return [_clean_result(link) for link in links]
+
+
+def _clean_result(result: Dict[str, Any]) -> Dict[str, str]:
+    return {
+        "title": (result.get("title") or "").strip(),
+        "href": result.get("href") or "",
+        "snippet": (result.get("snippet") or "").strip()
+    }
+
+
+class _BingResultsParser(HTMLParser):
+    """Offline equivalent of BING_RESULTS_SCRIPT for stored page HTML"""
+
+    def __init__(self, base_url):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.results = []
+        self.next_page = None
+        self._nested_li = 0
+        self._current = None
+        self._in_title = False
+        self._in_h2 = False
+        self._in_snippet = False
+        self._has_snippet = False
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        classes = (attrs.get("class") or "").split()
+        if tag == "li" and "b_algo" in classes:
+            self._finish_result()
+            self._current = {"title": "", "href": "", "snippet": ""}
+            self._has_snippet = False
+            self._nested_li = 0
+        elif tag == "a" and "sb_pagN" in classes and self.next_page is None and attrs.get("href"):
+            self.next_page = urljoin(self.base_url, attrs["href"])
+        elif self._current is not None:
+            if tag == "li":
+                self._nested_li += 1
+            elif tag == "h2":
+                self._in_h2 = True
+            elif tag == "a" and self._in_h2 and not self._current["href"]:
+                self._current["href"] = urljoin(self.base_url, attrs.get("href") or "")
+                self._in_title = True
+            elif tag == "p":
+                # A new paragraph implicitly closes an unterminated snippet paragraph
+                self._has_snippet = self._has_snippet or self._in_snippet
+                self._in_snippet = not self._has_snippet
+
+    def handle_endtag(self, tag):
+        if self._current is not None:
+            if tag == "a":
+                self._in_title = False
+            elif tag == "h2":
+                self._in_h2 = False
+            elif tag == "p" and self._in_snippet:
+                self._in_snippet = False
+                self._has_snippet = True
+            elif tag == "li":
+                if self._nested_li:
+                    self._nested_li -= 1
+                else:
+                    self._finish_result()
+
+    def _finish_result(self):
+        if self._current is not None and self._current["href"]:
+            self.results.append(self._current)
+        self._current = None
+        self._in_title = self._in_h2 = self._in_snippet = False
+
+    def close(self):
+        super().close()
+        self._finish_result()
+
+    def handle_data(self, data):
+        if self._current is None:
+            return
+        if self._in_title:
+            self._current["title"] += data
+        elif self._in_snippet:
+            self._current["snippet"] += data
+
+
+# Elements without an end tag, which must not count towards nesting depth
+VOID_ELEMENTS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+
+class _DuckDuckGoResultsParser(HTMLParser):
+    """Offline equivalent of DUCKDUCKGO_RESULTS_SCRIPT for stored page HTML"""
+
+    def __init__(self, base_url):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.results = []
+        self._depth = 0
+        self._current = None
+        self._result_depth = None
+        self._title_depth = None
+        self._snippet_depth = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        classes = (attrs.get("class") or "").split()
+        if tag not in VOID_ELEMENTS:
+            self._depth += 1
+        if (tag == "article" and attrs.get("data-testid") == "result") or (tag == "div" and "result" in classes):
+            self._finish_result()
+            self._current = {"title": "", "href": "", "snippet": ""}
+            self._result_depth = self._depth
+        elif self._current is not None:
+            is_title = attrs.get("data-testid") == "result-title-a" or "result__a" in classes
+            if tag == "a" and is_title and not self._current["href"]:
+                self._current["href"] = urljoin(self.base_url, attrs.get("href") or "")
+                self._title_depth = self._depth
+            elif self._snippet_depth is None and not self._current["snippet"] and (
+                attrs.get("data-result") == "snippet" or "result__snippet" in classes
+            ):
+                self._snippet_depth = self._depth
+
+    def handle_endtag(self, tag):
+        if tag in VOID_ELEMENTS:
+            return
+        if self._title_depth is not None and self._depth <= self._title_depth:
+            self._title_depth = None
+        if self._snippet_depth is not None and self._depth <= self._snippet_depth:
+            self._snippet_depth = None
+        if self._result_depth is not None and self._depth <= self._result_depth:
+            self._finish_result()
+        self._depth = max(0, self._depth - 1)
+
+    def _finish_result(self):
+        if self._current is not None and self._current["href"]:
+            self.results.append(self._current)
+        self._current = None
+        self._result_depth = self._title_depth = self._snippet_depth = None
+
+    def close(self):
+        super().close()
+        self._finish_result()
+
+    def handle_data(self, data):
+        if self._current is None:
+            return
+        if self._title_depth is not None:
+            self._current["title"] += data
+        elif self._snippet_depth is not None:
+            self._current["snippet"] += data
+
+
+class _AnchorParser(HTMLParser):
+    def __init__(self, base_url):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.anchors = []
+        self._open = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a":
+            anchor = {"title": "", "href": urljoin(self.base_url, dict(attrs).get("href") or ""), "snippet": ""}
+            self.anchors.append(anchor)
+            self._open.append(anchor)
+
+    def handle_endtag(self, tag):
+        if tag == "a" and self._open:
+            self._open.pop()
+
+    def handle_data(self, data):
+        for anchor in self._open:
+            anchor["title"] += data
+
+
+# Supports the selector shapes used by the scrapers: a[href*="x"] with optional :not([href*="y"])
+SELECTOR_PATTERN = re.compile(r'\[href\*="([^"]+)"\]')
+NEGATED_PATTERN = re.compile(r':not\(\[href\*="([^"]+)"\]\)')
+
+
+def parse_bing_results_html(html: str, base_url: str = "") -> Dict[str, Any]:
+    """Parse stored Bing results page HTML into the same structure as extract_bing_results"""
+    parser = _BingResultsParser(base_url)
+    parser.feed(html or "")
+    parser.close()
+    return {
+        "results": [_clean_result(result) for result in parser.results],
+        "next_page": parser.next_page
+    }
+
+
+def parse_duckduckgo_results_html(html: str, base_url: str = "") -> Dict[str, Any]:
+    """Parse stored DuckDuckGo results page HTML into the same structure as extract_duckduckgo_results"""
+    parser = _DuckDuckGoResultsParser(base_url)
+    parser.feed(html or "")
+    parser.close()
+    return {
+        "results": [_clean_result(result) for result in parser.results],
+        "next_page": None
+    }
+
+
+def parse_links_html(html: str, css_selector: str, base_url: str = "") -> List[Dict[str, str]]:
+    """Parse stored page HTML into the same structure as extract_links"""
+    excluded = NEGATED_PATTERN.findall(css_selector)
+    required = SELECTOR_PATTERN.findall(NEGATED_PATTERN.sub("", css_selector))
+    parser = _AnchorParser(base_url)
+    parser.feed(html or "")
+    return [
+        _clean_result(anchor) for anchor in parser.anchors
+        if all(part in anchor["href"] for part in required)
+        and not any(part in anchor["href"] for part in excluded)
+    ]
@@ -0,0 +1,369 @@
+"""
+Multi-session load test for the scrapers, run against a local stub search engine
+
+Simulated recruiter sessions run the code paths of the four app tabs (location & domain
+search, direct company search, batch processing and job search) with the same browser
+priorities as the UI. The session count ramps up in stages; each stage reports latency
+percentiles, throughput, peak browsers, memory and error rate.
+
+The stub serves Bing- and DuckDuckGo-shaped result pages, so real Chrome browsers are
+launched but no traffic leaves the machine:
+    python load_test.py --sessions 1,5,10,20 --duration 120 --stub-latency 0.3
+"""
+import argparse
+import hashlib
+import html
+import json
+import math
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from urllib.parse import parse_qs, quote, urlparse
+
+FIRST_NAMES = ["aarav", "diya", "ishaan", "kavya", "rohan", "priya", "vivaan", "ananya", "arjun", "meera"]
+LAST_NAMES = ["shah", "patel", "mehta", "desai", "joshi", "trivedi", "parikh", "modi", "pandya", "bhatt"]
+HR_TITLES = ["HR Manager", "Talent Acquisition Specialist", "Recruiter", "HR Business Partner", "Head of People"]
+JOB_LINKS = {
+    "linkedin.com": "https://www.linkedin.com/jobs/view/{n}",
+    "indeed.com": "https://in.indeed.com/viewjob?jk={h}",
+    "glassdoor.com/job": "https://www.glassdoor.co.in/job-listing/{slug}-JV_{n}.htm",
+    "internshala.com": "https://internshala.com/internship/detail/{slug}-{n}"
+}
+
+COMPANIES = ["Sapphire Software Solutions", "Tata Consultancy Services", "Infosys", "Zydus Lifesciences", "Adani Ports"]
+LOCATIONS = ["Ahmedabad", "Surat", "Vadodara", "Gandhinagar"]
+DOMAINS = ["IT Services", "Software", "Pharmaceuticals", "Logistics"]
+JOB_TITLES = ["Software Developer", "Data Analyst", "HR Executive", "Sales Manager"]
+
+
+class StubSearchEngine(BaseHTTPRequestHandler):
+    """Deterministic Bing (/search) and DuckDuckGo (/) result pages with configurable latency and blocking"""
+
+    latency = 0.2
+    jitter = 0.1
+    block_rate = 0.0
+    max_pages = 5
+    results_per_page = 10
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        params = parse_qs(parsed.query)
+        query = params.get("q", [""])[0]
+        time.sleep(max(0.0, random.gauss(self.latency, self.jitter)))
+
+        if random.random() < self.block_rate:
+            body = "<html><head><title>Captcha</title></head><body>Our systems have detected unusual traffic.</body></html>"
+        elif parsed.path == "/search":
+            body = self.bing_page(query, int(params.get("first", ["1"])[0]))
+        elif parsed.path == "/":
+            body = self.duckduckgo_page(query)
+        else:
+            self.send_error(404)
+            return
+
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+    @classmethod
+    def results(cls, query, first):
+        digest = lambda index: hashlib.md5(f"{query}|{index}".encode()).hexdigest()
+        quoted = re.findall(r'"([^"]+)"', query)
+        company = quoted[0] if quoted else "Acme"
+        results = []
+        for index in range(first, first + cls.results_per_page):
+            h = digest(index)
+            n = int(h[:8], 16)
+            if "linkedin.com/in" in query:
+                first_name, last_name = FIRST_NAMES[n % 10], LAST_NAMES[(n // 10) % 10]
+                headline = HR_TITLES[n % len(HR_TITLES)]
+                results.append((
+                    f"{first_name.title()} {last_name.title()} - {headline} - {company} | LinkedIn",
+                    f"https://in.linkedin.com/in/{first_name}-{last_name}-{h[:8]}",
+                    f"Ahmedabad, Gujarat, India · {headline} · {company}"
+                ))
+            elif "linkedin.com/company" in query:
+                slug = f"{query.split()[-1].lower()}-company-{h[:6]}"
+                results.append((f"{slug} | LinkedIn", f"https://www.linkedin.com/company/{slug}", "Company page"))
+            else:
+                sites = re.findall(r'site:(\S+?)\)?(?:\s|$)', query) or ["linkedin.com"]
+                site = sites[n % len(sites)]
+                slug = re.sub(r"[^a-z0-9]+", "-", query.lower())[:30].strip("-")
+                link = JOB_LINKS.get(site, "https://" + site + "/{n}").format(n=n, h=h[:16], slug=slug)
+                results.append((f"Opening {n % 1000} at {company}", link, f"Apply now for {company} in Ahmedabad"))
+        return results
+
+    @classmethod
+    def bing_page(cls, query, first):
+        items = "".join(
+            f'<li class="b_algo"><h2><a href="{html.escape(href)}">{html.escape(title)}</a></h2>'
+            f'<div class="b_caption"><p>{html.escape(snippet)}</p></div></li>'
+            for title, href, snippet in cls.results(query, first)
+        )
+        next_link = ""
+        if first + cls.results_per_page <= cls.max_pages * cls.results_per_page:
+            next_link = f'<a class="sb_pagN" href="/search?q={quote(query)}&amp;first={first + cls.results_per_page}">Next</a>'
+        return f"<html><body><ol id=\"b_results\">{items}</ol>{next_link}</body></html>"
+
+    @classmethod
+    def duckduckgo_page(cls, query):
+        items = "".join(
+            f'<article data-testid="result"><h2><a data-testid="result-title-a" href="{html.escape(href)}">{html.escape(title)}</a></h2>'
+            f'<div data-result="snippet"><span>{html.escape(snippet)}</span></div></article>'
+            for title, href, snippet in cls.results(query, 1)
+        )
+        return f"<html><body><section>{items}</section></body></html>"
+
+
+def start_stub(port, latency, jitter, block_rate):
+    StubSearchEngine.latency = latency
+    StubSearchEngine.jitter = jitter
+    StubSearchEngine.block_rate = block_rate
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubSearchEngine)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="stub-engine", daemon=True).start()
+    return server
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))]
+
+
+def process_rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return 0.0
+
+
+class LoadTest:
+    def __init__(self, unique_queries=True):
+        # Imported here so the engine base URLs and limits set in main() are picked up
+        from companies_details_extraction.browser_scheduler import (
+            PRIORITY_BATCH, PRIORITY_INTERACTIVE, PRIORITY_NORMAL, scheduler, scheduling_context
+        )
+        from companies_details_extraction.cancellation import cancellation_scope
+        from companies_details_extraction.company_resolution import cluster_company_names
+        from companies_details_extraction.company_scraper import get_linkedin_company_links, extract_company_name_from_url
+        from companies_details_extraction.driver_manager import get_driver_stats, pool
+        from companies_details_extraction.email_predictor import predict_emails_from_profiles
+        from companies_details_extraction.hr_scraper import get_hr_profile_records
+        from companies_details_extraction.job_search import iter_platform_results
+        self.scrapers = SimpleNamespace(
+            PRIORITY_BATCH=PRIORITY_BATCH, PRIORITY_INTERACTIVE=PRIORITY_INTERACTIVE, PRIORITY_NORMAL=PRIORITY_NORMAL,
+            scheduler=scheduler, scheduling_context=scheduling_context, cancellation_scope=cancellation_scope,
+            cluster_company_names=cluster_company_names, get_linkedin_company_links=get_linkedin_company_links,
+            extract_company_name_from_url=extract_company_name_from_url, get_driver_stats=get_driver_stats,
+            shutdown_drivers=pool.shutdown, predict_emails_from_profiles=predict_emails_from_profiles,
+            get_hr_profile_records=get_hr_profile_records, iter_platform_results=iter_platform_results
+        )
+        self.unique_queries = unique_queries
+        self._lock = threading.Lock()
+
+    def _suffix(self):
+        # A fresh suffix per call keeps coalescing and cached results from hiding browser work
+        return f" {random.randrange(10 ** 6)}" if self.unique_queries else ""
+
+    def scenario_location_search(self, rng):
+        s = self.scrapers
+        with s.scheduling_context(priority=s.PRIORITY_INTERACTIVE):
+            links = s.get_linkedin_company_links(rng.choice(LOCATIONS), rng.choice(DOMAINS) + self._suffix(), 10)
+        names = [s.extract_company_name_from_url(link) for link in links[:2]]
+        complete = links.complete
+        with s.scheduling_context(priority=s.PRIORITY_NORMAL):
+            for company in s.cluster_company_names(names):
+                complete = s.get_hr_profile_records(company, 5).complete and complete
+        return complete
+
+    def scenario_direct_search(self, rng):
+        s = self.scrapers
+        with s.scheduling_context(priority=s.PRIORITY_INTERACTIVE):
+            records = s.get_hr_profile_records(rng.choice(COMPANIES) + self._suffix(), 10)
+        s.predict_emails_from_profiles([record["link"] for record in records], "example.com")
+        return records.complete
+
+    def scenario_batch(self, rng):
+        s = self.scrapers
+        complete = True
+        with s.scheduling_context(priority=s.PRIORITY_BATCH):
+            for company in s.cluster_company_names(rng.sample(COMPANIES, 3)):
+                complete = s.get_hr_profile_records(company + self._suffix(), 5).complete and complete
+        return complete
+
+    def scenario_job_search(self, rng):
+        s = self.scrapers
+        complete = True
+        with s.scheduling_context(priority=s.PRIORITY_NORMAL):
+            for _, _, results in s.iter_platform_results(
+                rng.choice(JOB_TITLES) + self._suffix(), rng.choice(LOCATIONS), (False, True), 10
+            ):
+                complete = complete and results.complete
+        return complete
+
+    SCENARIOS = ["location_search", "direct_search", "batch", "job_search"]
+
+    def run_stage(self, sessions, duration, op_timeout):
+        s = self.scrapers
+        samples = []
+        latencies = defaultdict(list)
+        errors = defaultdict(int)
+        stop_at = time.monotonic() + duration
+        sampling = threading.Event()
+
+        def sampler():
+            while not sampling.is_set():
+                driver_stats = s.get_driver_stats()
+                samples.append({
+                    "active": s.scheduler.get_stats()["active"],
+                    "live_browsers": driver_stats["live_browsers"],
+                    "browser_rss_mb": driver_stats["total_rss_mb"],
+                    "process_rss_mb": process_rss_mb()
+                })
+                sampling.wait(0.5)
+
+        def session(index):
+            rng = random.Random(index)
+            session_id = f"load-{sessions}-{index}"
+            turn = index
+            while time.monotonic() < stop_at:
+                name = self.SCENARIOS[turn % len(self.SCENARIOS)]
+                turn += 1
+                started_at = time.monotonic()
+                try:
+                    with s.scheduling_context(session_id=session_id), s.cancellation_scope(op_timeout):
+                        ok = getattr(self, f"scenario_{name}")(rng)
+                except Exception as e:
+                    print(f"{session_id} {name} failed: {e}")
+                    ok = False
+                with self._lock:
+                    latencies[name].append(time.monotonic() - started_at)
+                    if not ok:
+                        errors[name] += 1
+
+        sampler_thread = threading.Thread(target=sampler, daemon=True)
+        sampler_thread.start()
+        started_at = time.monotonic()
+        threads = [threading.Thread(target=session, args=(index,), daemon=True) for index in range(sessions)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started_at
+        sampling.set()
+        sampler_thread.join()
+
+        return self.summarize(sessions, elapsed, latencies, errors, samples)
+
+    @staticmethod
+    def summarize(sessions, elapsed, latencies, errors, samples):
+        all_latencies = [value for values in latencies.values() for value in values]
+        operations = len(all_latencies)
+
+        def latency_stats(values):
+            return {
+                "count": len(values),
+                "p50": percentile(values, 0.50),
+                "p95": percentile(values, 0.95),
+                "p99": percentile(values, 0.99)
+            }
+
+        return {
+            "sessions": sessions,
+            "elapsed_seconds": round(elapsed, 1),
+            "operations": operations,
+            "throughput_per_min": round(operations * 60 / elapsed, 2) if elapsed else 0,
+            "error_rate": round(sum(errors.values()) / operations, 3) if operations else 0,
+            "latency": latency_stats(all_latencies),
+            "by_scenario": {
+                name: dict(latency_stats(values), errors=errors[name]) for name, values in latencies.items()
+            },
+            "peak_active_browsers": max((sample["active"] for sample in samples), default=0),
+            "peak_live_browsers": max((sample["live_browsers"] for sample in samples), default=0),
+            "peak_browser_rss_mb": max((sample["browser_rss_mb"] for sample in samples), default=0),
+            "peak_process_rss_mb": round(max((sample["process_rss_mb"] for sample in samples), default=0), 1)
+        }
+
+
+def format_seconds(value):
+    return "-" if value is None else f"{value:.1f}s"
+
+
+def print_report(stages):
+    header = f"{'sessions':>8} {'ops':>5} {'ops/min':>8} {'p50':>7} {'p95':>7} {'p99':>7} {'errors':>7} {'browsers':>9} {'chrome MB':>10} {'app MB':>8}"
+    print("\n" + header)
+    print("-" * len(header))
+    for stage in stages:
+        latency = stage["latency"]
+        print(
+            f"{stage['sessions']:>8} {stage['operations']:>5} {stage['throughput_per_min']:>8} "
+            f"{format_seconds(latency['p50']):>7} {format_seconds(latency['p95']):>7} {format_seconds(latency['p99']):>7} "
+            f"{stage['error_rate']:>7.1%} {stage['peak_live_browsers']:>9} {stage['peak_browser_rss_mb']:>10.0f} "
+            f"{stage['peak_process_rss_mb']:>8.0f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ramp simulated sessions against a local stub search engine")
+    parser.add_argument("--sessions", default="1,5,10,20", help="Comma separated session counts, one stage each")
+    parser.add_argument("--duration", type=float, default=120, help="Seconds each stage keeps starting operations")
+    parser.add_argument("--op-timeout", type=float, default=300, help="Deadline for a single operation")
+    parser.add_argument("--max-browsers", type=int, help="Override MAX_BROWSERS")
+    parser.add_argument("--stub-port", type=int, default=8765)
+    parser.add_argument("--stub-latency", type=float, default=0.2, help="Mean stub response time in seconds")
+    parser.add_argument("--stub-jitter", type=float, default=0.1)
+    parser.add_argument("--stub-block-rate", type=float, default=0.0, help="Fraction of stub responses that are challenge pages")
+    parser.add_argument("--allow-cache", action="store_true", help="Repeat queries and serve cached search results")
+    parser.add_argument("--json", help="Write the full report to this file")
+    args = parser.parse_args()
+
+    stub_url = f"http://127.0.0.1:{args.stub_port}"
+    os.environ["BING_BASE_URL"] = stub_url
+    os.environ["DUCKDUCKGO_BASE_URL"] = stub_url
+    if args.max_browsers:
+        os.environ["MAX_BROWSERS"] = str(args.max_browsers)
+    # Keep load test state out of the app's caches
+    os.environ.setdefault("BROWSER_PROFILE_DIR", os.path.join(tempfile.gettempdir(), "hirvana_load_test_profiles"))
+    # Stub yields would otherwise reorder the query templates used in production
+    os.environ.setdefault("QUERY_PLANNER_FILE", os.path.join(tempfile.mkdtemp(prefix="hirvana_load_test_"), "query_planner.json"))
+    if not args.allow_cache:
+        os.environ["RESULT_CACHE"] = "0"
+
+    start_stub(args.stub_port, args.stub_latency, args.stub_jitter, args.stub_block_rate)
+    load_test = LoadTest(unique_queries=not args.allow_cache)
+
+    stages = []
+    for sessions in [int(count) for count in args.sessions.split(",") if count.strip()]:
+        print(f"\n🚦 Stage: {sessions} sessions for {args.duration:.0f}s")
+        stages.append(load_test.run_stage(sessions, args.duration, args.op_timeout))
+        print_report(stages[-1:])
+
+    print_report(stages)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(stages, f, indent=2)
+        print(f"\n📝 Report written to {args.json}")
+    load_test.scrapers.shutdown_drivers()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,12 @@
 import streamlit as st
 import pandas as pd
-from io import StringIO
-from datetime import datetime
-from companies_details_extraction.hr_scraper import get_hr_profiles
+from companies_details_extraction.hr_scraper import get_batched_hr_profile_records, get_hr_profile_records
 from companies_details_extraction.email_predictor import predict_emails_from_profiles
+from companies_details_extraction.domain_resolver import resolve_company_domains
+from companies_details_extraction.company_resolution import cluster_company_names
+from companies_details_extraction.browser_scheduler import PRIORITY_BATCH
+from modules.session_utils import browser_queue
+from modules.result_store import store_results, render_downloads
 
 def render_batch_processing():
     st.subheader("📦 Batch Process Companies")
@@ -21,8 +24,15 @@ def render_batch_processing():
     with col4:
         profiles_per_company = st.number_input("🎯 Profiles per Company", min_value=1, max_value=30, value=5)
     
+    batched = st.checkbox(
+        "⚡ Combine companies into shared queries",
+        value=True,
+        help="Search several companies per query and attribute profiles back to each company; companies the shared query misses get their own query",
+        key="batch_combined"
+    )
+    
     if uploaded_file and st.button("Process Companies", key="batch_process"):
-        process_companies(uploaded_file, batch_designation, country, state, profiles_per_company)
+        process_companies(uploaded_file, batch_designation, country, state, profiles_per_company, batched)
         
     # Show sample CSV format
     st.markdown("""
@@ -36,39 +46,69 @@ def render_batch_processing():
     ```
     """)
 
-def process_companies(uploaded_file, designation, country, state, profiles_per_company):
+def process_companies(uploaded_file, designation, country, state, profiles_per_company, batched=True):
     # Read CSV file
     companies_df = pd.read_csv(uploaded_file)
-    company_list = companies_df.iloc[:, 0].tolist()  # Assume first column contains company names
+    company_list = companies_df.iloc[:, 0].dropna().astype(str).tolist()  # Assume first column contains company names
+    
+    # Scrape each company once, however many spellings of it the file contains
+    clusters = cluster_company_names(company_list)
+    if len(clusters) < len(set(company_list)):
+        st.info(f"🔗 Merged {len(set(company_list))} company names into {len(clusters)} distinct companies")
     
     progress_bar = st.progress(0)
     status_text = st.empty()
     
     # Process companies with progress tracking
-    all_results = {}
-    for idx, company in enumerate(company_list):
-        status_text.text(f"Processing {company}...")
-        profiles = get_hr_profiles(company, profiles_per_company, designation, country, state)
-        all_results[company] = profiles
-        progress_bar.progress((idx + 1) / len(company_list))
+    all_records = {}
+    with browser_queue(PRIORITY_BATCH) as cancel_token:
+        if batched:
+            finished = []
+            
+            def on_result(company, records):
+                for alias in clusters[company]:
+                    all_records[alias] = records
+                finished.append(company)
+                status_text.text(f"Processed {company} ({len(finished)}/{len(clusters)})")
+                progress_bar.progress(len(finished) / len(clusters))
+            
+            status_text.text(f"Searching {len(clusters)} companies...")
+            get_batched_hr_profile_records(list(clusters), profiles_per_company, designation, country, state, on_result=on_result)
+            if cancel_token.cancelled:
+                st.warning(f"⏹️ Batch stopped early ({cancel_token.reason}), showing partial results.")
+        else:
+            for idx, (company, aliases) in enumerate(clusters.items()):
+                if cancel_token.cancelled:
+                    st.warning(f"⏹️ Batch stopped early ({cancel_token.reason}), showing partial results.")
+                    break
+                status_text.text(f"Processing {company}...")
+                records = get_hr_profile_records(company, profiles_per_company, designation, country, state)
+                for alias in aliases:
+                    all_records[alias] = records
+                progress_bar.progress((idx + 1) / len(clusters))
     
-    display_results(company_list, all_results)
+    display_results(company_list, all_records)
 
-def display_results(company_list, all_results):
+def display_results(company_list, all_records):
     # Create results DataFrame
     results_data = []
-    for company, profiles in all_results.items():
-        for profile in profiles:
-            results_data.append([company, profile])
+    for company, records in all_records.items():
+        for record in records:
+            results_data.append([company, record["name"], record["headline"], record["location"], record["link"]])
     
-    results_df = pd.DataFrame(results_data, columns=['Company', 'Profile URL'])
+    results = store_results("batch_profiles", pd.DataFrame(
+        results_data, columns=['Company', 'Name', 'Headline', 'Location', 'Profile URL']
+    ))
     
     # Display results
     st.success(f"✅ Processed {len(company_list)} companies")
     st.dataframe(
-        results_df,
+        results.to_pandas(),
         column_config={
             "Company": st.column_config.TextColumn("Company", width="medium"),
+            "Name": st.column_config.TextColumn("Name", width="medium"),
+            "Headline": st.column_config.TextColumn("Headline", width="large"),
+            "Location": st.column_config.TextColumn("Location", width="medium"),
             "Profile URL": st.column_config.LinkColumn("Profile URL", width="large")
         },
         hide_index=True,
@@ -76,33 +116,30 @@ def display_results(company_list, all_results):
     )
     
     # Download results
-    csv_buffer = StringIO()
-    results_df.to_csv(csv_buffer, index=False)
-    
-    st.download_button(
-        label="📥 Download All Results as CSV",
-        data=csv_buffer.getvalue(),
-        file_name=f"batch_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-        mime="text/csv"
-    )
+    render_downloads(results, "batch_results", key="batch_profiles", label="📥 Download All Results")
     
+    all_results = {company: [record["link"] for record in records] for company, records in all_records.items()}
     display_email_predictions(all_results)
 
 def display_email_predictions(all_results):
     st.markdown("### 📧 Email Predictions")
+    with st.spinner("🌐 Resolving company domains..."):
+        resolved_domains = resolve_company_domains({company: "" for company in all_results})
     for company in all_results.keys():
         with st.expander(f"📧 Email Predictions for {company}"):
-            # Try to determine company domain
-            company_domain = f"{company.lower().replace(' ', '')}.com"
+            company_domain = resolved_domains.get(company, "")
+            if not company_domain:
+                st.warning("Could not determine company domain for email prediction.")
             
             # Manual domain input
             manual_domain = st.text_input(
                 "🔤 Enter company domain",
                 value=company_domain,
+                placeholder="example.com",
                 key=f"batch_domain_{company}"
             )
             
-            if st.button("Generate Predictions", key=f"batch_predict_{company}"):
+            if manual_domain and st.button("Generate Predictions", key=f"batch_predict_{company}"):
                 generate_email_predictions(company, manual_domain, all_results[company])
 
 def generate_email_predictions(company, domain, profiles):
@@ -111,8 +148,9 @@ def generate_email_predictions(company, domain, profiles):
     
     if not email_df.empty:
         st.success(f"✨ Generated predictions for {company}")
+        predictions = store_results(f"batch_email_predictions_{company}", email_df)
         st.dataframe(
-            email_df,
+            predictions.to_pandas(),
             column_config={
                 "Profile URL": st.column_config.LinkColumn("Profile URL", width="large"),
                 "Predicted Email": st.column_config.TextColumn("Predicted Email", width="medium"),
@@ -123,15 +161,7 @@ def generate_email_predictions(company, domain, profiles):
         )
         
         # Download button for email predictions
-        email_csv_buffer = StringIO()
-        email_df.to_csv(email_csv_buffer, index=False)
-        st.download_button(
-            label="📥 Download Email Predictions",
-            data=email_csv_buffer.getvalue(),
-            file_name=f"batch_email_predictions_{company}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-            mime="text/csv",
-            key=f"batch_download_{company}"
-        )
+        render_downloads(predictions, f"batch_email_predictions_{company}", key=f"batch_download_{company}", label="📥 Download Email Predictions")
     else:
         st.warning("Could not generate email predictions for this company.")
     
@@ -1,9 +1,11 @@
 import streamlit as st
 import pandas as pd
-import io
-from datetime import datetime
-from companies_details_extraction.hr_scraper import get_hr_profiles
-from companies_details_extraction.email_predictor import predict_emails_from_profiles, extract_company_domain
+from companies_details_extraction.hr_scraper import get_hr_profile_records
+from companies_details_extraction.email_predictor import predict_emails_from_profiles
+from companies_details_extraction.domain_resolver import resolve_company_domain
+from companies_details_extraction.browser_scheduler import PRIORITY_INTERACTIVE
+from modules.session_utils import browser_queue
+from modules.result_store import store_results, render_downloads
 
 def on_form_change(key):
     def callback():
@@ -57,14 +59,27 @@ def render_direct_company_search():
         on_change=on_form_change("num_profiles")
     )
     
+    keywords = st.text_input(
+        "🔎 Keep only results mentioning (comma separated, optional)",
+        placeholder="recruiter, talent acquisition",
+        key="direct_search_keywords_input"
+    )
+    
     if st.button("Find Profiles", key='direct_search'):
-        handle_direct_search(company_name, direct_designation, country, state, num_profiles)
+        handle_direct_search(company_name, direct_designation, country, state, num_profiles, keywords)
 
-def handle_direct_search(company_name, designation, country, state, num_profiles):
+def handle_direct_search(company_name, designation, country, state, num_profiles, keywords=""):
     if company_name:
-        with st.spinner(f"🔍 Searching for {designation} profiles..."):
-            st.session_state.profiles = get_hr_profiles(company_name, num_profiles, designation=designation, country=country, state=state)
+        designation_keywords = [keyword.strip() for keyword in keywords.split(",") if keyword.strip()]
+        with st.spinner(f"🔍 Searching for {designation} profiles..."), browser_queue(PRIORITY_INTERACTIVE):
+            st.session_state.profile_records = get_hr_profile_records(
+                company_name, num_profiles, designation=designation, country=country, state=state,
+                designation_keywords=designation_keywords or None
+            )
+            st.session_state.profiles = [record["link"] for record in st.session_state.profile_records]
             
+        if not st.session_state.profile_records.complete:
+            st.warning(f"⏹️ Search stopped early ({st.session_state.profile_records.reason}), showing partial results.")
         if st.session_state.profiles:
             display_search_results(company_name, designation)
         else:
@@ -76,14 +91,20 @@ def display_search_results(company_name, designation):
     st.success(f"✨ Found {len(st.session_state.profiles)} {designation} profiles")
     
     # Display profiles DataFrame
-    profiles_df = pd.DataFrame(
-        [[company_name, profile] for profile in st.session_state.profiles],
-        columns=['Company', 'Profile URL']
-    )
+    profiles = store_results("direct_profiles", pd.DataFrame(
+        [
+            [company_name, record["name"], record["headline"], record["location"], record["link"]]
+            for record in st.session_state.profile_records
+        ],
+        columns=['Company', 'Name', 'Headline', 'Location', 'Profile URL']
+    ))
     st.dataframe(
-        profiles_df,
+        profiles.to_pandas(),
         column_config={
             "Company": st.column_config.TextColumn("Company", width="medium"),
+            "Name": st.column_config.TextColumn("Name", width="medium"),
+            "Headline": st.column_config.TextColumn("Headline", width="large"),
+            "Location": st.column_config.TextColumn("Location", width="medium"),
             "Profile URL": st.column_config.LinkColumn("Profile URL", width="large")
         },
         hide_index=True,
@@ -91,16 +112,8 @@ def display_search_results(company_name, designation):
     )
     
     # Download button
-    csv_buffer = io.StringIO()
-    profiles_df.to_csv(csv_buffer, index=False)
-    
     company_name_clean = company_name.replace(" ", "_").lower()
-    st.download_button(
-        label="📥 Download HR Profiles as CSV",
-        data=csv_buffer.getvalue(),
-        file_name=f"hr_profiles_{company_name_clean}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-        mime="text/csv"
-    )
+    render_downloads(profiles, f"hr_profiles_{company_name_clean}", key="direct_profiles", label="📥 Download HR Profiles")
     
     display_email_predictions(company_name)
 
@@ -111,7 +124,7 @@ def display_email_predictions(company_name):
         company_url = ""
         if hasattr(st.session_state, 'companies') and st.session_state.companies is not None:
             company_url = st.session_state.companies.get(company_name, "")
-        company_domain = extract_company_domain(company_url) if company_url else ""
+        company_domain = resolve_company_domain(company_name, company_url)
         
         with st.expander("📧 Email Predictions", expanded=True):
             handle_email_predictions(company_name, company_domain)
@@ -141,8 +154,9 @@ def handle_manual_domain_input(company_name_clean):
 def display_email_results(email_df, company_name_clean):
     if not email_df.empty:
         st.success(f"✨ Generated predictions")
+        predictions = store_results("direct_email_predictions", email_df)
         st.dataframe(
-            email_df,
+            predictions.to_pandas(),
             column_config={
                 "Profile URL": st.column_config.LinkColumn("Profile URL", width="large"),
                 "Predicted Email": st.column_config.TextColumn("Predicted Email", width="medium"),
@@ -153,14 +167,7 @@ def display_email_results(email_df, company_name_clean):
         )
         
         # Download button for email predictions
-        email_csv_buffer = io.StringIO()
-        email_df.to_csv(email_csv_buffer, index=False)
-        st.download_button(
-            label="📥 Download Email Predictions",
-            data=email_csv_buffer.getvalue(),
-            file_name=f"email_predictions_{company_name_clean}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-            mime="text/csv"
-        )
+        render_downloads(predictions, f"email_predictions_{company_name_clean}", key="direct_email_predictions", label="📥 Download Email Predictions")
 
 def display_manual_domain_update(current_domain):
     st.markdown("### 🔄 Update Domain")
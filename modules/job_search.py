@@ -1,8 +1,12 @@
 import streamlit as st
 import pandas as pd
-from io import StringIO
 from datetime import datetime
-from companies_details_extraction.job_search import search_all_platforms
+from companies_details_extraction.job_search import iter_platform_results
+from companies_details_extraction.job_dedup import dedupe_jobs
+from companies_details_extraction.saved_searches import saved_searches
+from companies_details_extraction.browser_scheduler import PRIORITY_NORMAL
+from modules.session_utils import browser_queue
+from modules.result_store import store_results, render_downloads
 
 def render_job_search():
     st.subheader("💼 Job & Internship Search")
@@ -34,68 +38,154 @@ def render_job_search():
         key="job_search_platforms"
     )
     
-    if st.button("🔍 Search", key="job_search_button"):
-        process_job_search(job_title, job_location, search_type, platforms, num_results)
+    combined = st.checkbox(
+        "⚡ Combined query",
+        value=False,
+        help="Search all platforms with a single multi-site query instead of one query per platform",
+        key="job_search_combined"
+    )
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        search_clicked = st.button("🔍 Search", key="job_search_button")
+    with col2:
+        watch_hours = st.selectbox(
+            "Re-run every",
+            [6, 12, 24, 48],
+            index=2,
+            format_func=lambda hours: f"{hours} hours",
+            key="job_search_watch_hours"
+        )
+        if st.button("👁️ Watch this search", key="job_search_watch", help="Save the search and get only new or changed postings on each re-run"):
+            saved_searches.save(job_title, job_location, get_search_types(search_type), platforms, num_results, watch_hours * 3600)
+            st.success("Search saved, it will be checked in the background")
+    
+    if search_clicked:
+        process_job_search(job_title, job_location, search_type, platforms, num_results, combined)
+    
+    render_saved_searches()
 
-def process_job_search(job_title, job_location, search_type, platforms, num_results):
-    with st.spinner("🔍 Searching for opportunities across platforms..."):
-        is_internship = search_type in ["Internships", "Both"]
-        is_job = search_type in ["Jobs", "Both"]
-        
-        all_results = pd.DataFrame()
-        
-        if is_job:
-            job_results = search_all_platforms(job_title, job_location, is_internship=False, limit=num_results)
-            if not job_results.empty:
-                job_results["Type"] = "Job"
-                all_results = pd.concat([all_results, job_results])
-        
-        if is_internship:
-            internship_results = search_all_platforms(job_title, job_location, is_internship=True, limit=num_results)
-            if not internship_results.empty:
-                internship_results["Type"] = "Internship"
-                all_results = pd.concat([all_results, internship_results])
-        
-        display_search_results(all_results, platforms)
+def get_search_types(search_type):
+    search_types = []
+    if search_type in ["Jobs", "Both"]:
+        search_types.append(False)
+    if search_type in ["Internships", "Both"]:
+        search_types.append(True)
+    return search_types
+
+def render_saved_searches():
+    searches = saved_searches.list()
+    if not searches:
+        return
+    
+    st.subheader("👁️ Saved Searches")
+    for search in searches:
+        kinds = " & ".join("Internships" if is_internship else "Jobs" for is_internship in search["search_types"])
+        unread = search["unread"]
+        label = f"{search['job_title']} in {search['location']} ({kinds})" + (f" · {len(unread)} new" if unread else "")
+        with st.expander(label):
+            last_run = datetime.fromtimestamp(search["last_run"]).strftime("%Y-%m-%d %H:%M") if search["last_run"] else "never"
+            st.caption(
+                f"Every {search['interval'] // 3600} hours · last run {last_run} · "
+                f"{search['known']} postings seen" + (" · running now" if search["running"] else "")
+            )
+            if unread:
+                st.dataframe(
+                    pd.DataFrame(unread)[["change", "title", "link", "source", "Type"]],
+                    column_config={
+                        "change": st.column_config.TextColumn("Change", width="small"),
+                        "title": st.column_config.TextColumn("Job Title", width="large"),
+                        "link": st.column_config.LinkColumn("Link", width="medium"),
+                        "source": st.column_config.TextColumn("Platform", width="small")
+                    },
+                    hide_index=True
+                )
+            
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                if st.button("🔄 Check now", key=f"saved_run_{search['id']}", disabled=search["running"]):
+                    with st.spinner("Checking for new postings..."):
+                        with browser_queue(PRIORITY_NORMAL):
+                            saved_searches.run(search["id"])
+                    st.rerun()
+            with col2:
+                if unread and st.button("✅ Mark as read", key=f"saved_read_{search['id']}"):
+                    saved_searches.mark_read(search["id"])
+                    st.rerun()
+            with col3:
+                if st.button("🗑️ Delete", key=f"saved_delete_{search['id']}"):
+                    saved_searches.remove(search["id"])
+                    st.rerun()
+
+def process_job_search(job_title, job_location, search_type, platforms, num_results, combined=False):
+    search_types = get_search_types(search_type)
+    
+    status_text = st.empty()
+    table_placeholder = st.empty()
+    status_text.info("🔍 Searching for opportunities across platforms...")
+    
+    # Fill the table in as each platform finishes instead of waiting for the slowest one
+    frames = []
+    incomplete = []
+    with browser_queue(PRIORITY_NORMAL):
+        for platform, is_internship, results in iter_platform_results(
+            job_title, job_location, search_types, num_results, platforms, combined
+        ):
+            result_type = "Internship" if is_internship else "Job"
+            if not results.complete:
+                incomplete.append(f"{platform} ({result_type})")
+            if results:
+                platform_results = pd.DataFrame(results)
+                platform_results["Type"] = result_type
+                frames.append(platform_results)
+            
+            status_text.info(f"🔍 {platform} ({result_type}) returned {len(results)} results, still searching...")
+            if frames:
+                table_placeholder.dataframe(pd.concat(frames), hide_index=True, height=400)
+    
+    status_text.empty()
+    table_placeholder.empty()
+    if incomplete:
+        st.warning(f"⏹️ Some searches stopped early, results may be partial: {', '.join(incomplete)}")
+    
+    all_results = pd.concat(frames) if frames else pd.DataFrame()
+    display_search_results(all_results, platforms)
 
 def display_search_results(all_results, platforms):
     if platforms and not all_results.empty:
         all_results = all_results[all_results["source"].isin(platforms)]
     
     if not all_results.empty:
+        found = len(all_results)
+        all_results = dedupe_jobs(all_results)
         st.success(f"✨ Found {len(all_results)} opportunities")
+        if len(all_results) < found:
+            st.info(f"🔗 Merged {found - len(all_results)} duplicate postings listed on several platforms or searches")
+        results = store_results("job_results", all_results)
         
         st.dataframe(
-            all_results,
+            results.to_pandas(),
             column_config={
                 "title": st.column_config.TextColumn("Job Title", width="large"),
                 "link": st.column_config.LinkColumn("Link", width="medium"),
                 "description": st.column_config.TextColumn("Description", width="large"),
                 "source": st.column_config.TextColumn("Platform", width="small"),
-                "Type": st.column_config.TextColumn("Type", width="small")
+                "Type": st.column_config.TextColumn("Type", width="small"),
+                "sources": st.column_config.TextColumn("Found On", width="small"),
+                "links": st.column_config.TextColumn("All Links", width="medium"),
+                "duplicates": st.column_config.NumberColumn("Listings", width="small")
             },
             hide_index=True,
             height=400
         )
         
-        download_results(all_results)
+        render_downloads(results, "job_search", key="job_results")
         display_platform_stats(all_results)
     else:
         st.warning("No opportunities found. Try different search terms or locations.")
     
     display_search_tips()
 
-def download_results(results):
-    csv_buffer = StringIO()
-    results.to_csv(csv_buffer, index=False)
-    
-    st.download_button(
-        label="📥 Download Results as CSV",
-        data=csv_buffer.getvalue(),
-        file_name=f"job_search_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-        mime="text/csv"
-    )
-
 def display_platform_stats(results):
     platform_stats = results.groupby("source").size().reset_index(name="count")
     st.subheader("Results by Platform")
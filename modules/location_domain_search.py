@@ -1,10 +1,13 @@
 import streamlit as st
 import pandas as pd
-from io import StringIO
-from datetime import datetime
 from companies_details_extraction.company_scraper import get_linkedin_company_links, extract_company_name_from_url
-from companies_details_extraction.hr_scraper import get_hr_profiles
-from companies_details_extraction.email_predictor import extract_company_domain, predict_emails_from_profiles
+from companies_details_extraction.hr_scraper import get_hr_profile_records
+from companies_details_extraction.email_predictor import predict_emails_from_profiles
+from companies_details_extraction.domain_resolver import resolve_company_domains
+from companies_details_extraction.company_resolution import cluster_company_names
+from companies_details_extraction.browser_scheduler import PRIORITY_INTERACTIVE, PRIORITY_NORMAL
+from modules.session_utils import browser_queue
+from modules.result_store import store_results, get_results, render_downloads
 
 def on_form_change(key):
     def callback():
@@ -57,9 +60,15 @@ def render_location_domain_search():
     )
     
     if st.button("Search Companies"):
-        with st.spinner("🔍 Searching for LinkedIn company links..."):
+        with st.spinner("🔍 Searching for LinkedIn company links..."), browser_queue(PRIORITY_INTERACTIVE):
             company_links = get_linkedin_company_links(location, domain, num_companies)
+            if not company_links.complete:
+                st.warning(f"⏹️ Company search stopped early ({company_links.reason}), showing partial results.")
             st.session_state.companies = {extract_company_name_from_url(link): link for link in company_links}
+            store_results("companies", pd.DataFrame(
+                [[name, url] for name, url in st.session_state.companies.items()],
+                columns=['Company Name', 'LinkedIn URL']
+            ))
             st.session_state.designation = designation
             st.session_state.location = location
             st.session_state.domain = domain
@@ -68,20 +77,15 @@ def render_location_domain_search():
         st.success(f"🎯 Found {len(st.session_state.companies)} companies")
 
         st.subheader("📋 Found Companies")
-        csv_buffer = StringIO()
-        companies_df = pd.DataFrame(
-            [[name, url] for name, url in st.session_state.companies.items()],
-            columns=['Company Name', 'LinkedIn URL']
-        )
-        companies_df.to_csv(csv_buffer, index=False)
-        st.download_button(
-            label="📥 Download Company URLs as CSV",
-            data=csv_buffer.getvalue(),
-            file_name=f"company_urls_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-            mime="text/csv"
-        )
+        companies = get_results("companies")
+        if companies is None:
+            companies = store_results("companies", pd.DataFrame(
+                [[name, url] for name, url in st.session_state.companies.items()],
+                columns=['Company Name', 'LinkedIn URL']
+            ))
+        render_downloads(companies, "company_urls", key="companies", label="📥 Download Company URLs")
         st.dataframe(
-            companies_df,
+            companies.to_pandas(),
             column_config={
                 "Company Name": st.column_config.TextColumn("Company Name", width="medium"),
                 "LinkedIn URL": st.column_config.LinkColumn("LinkedIn URL", width="large")
@@ -135,59 +139,73 @@ def render_location_domain_search():
 def display_hr_profiles(selected_companies, profiles_per_company, designation, country, state):
     results_container = st.container()
 
-    with st.spinner("🔍 Finding HR profiles for selected companies..."):
+    with st.spinner("🔍 Finding HR profiles for selected companies..."), browser_queue(PRIORITY_NORMAL) as cancel_token:
         all_profiles = {}
+        all_records = {}
         progress_bar = st.progress(0)
 
-        for idx, company in enumerate(selected_companies):
-            profiles = get_hr_profiles(company, profiles_per_company, designation, country, state)
-            all_profiles[company] = profiles
-            progress_bar.progress((idx + 1) / len(selected_companies))
+        # Names derived from different URL slugs can be the same company; scrape it once
+        clusters = cluster_company_names(selected_companies)
+        for idx, (company, aliases) in enumerate(clusters.items()):
+            if cancel_token.cancelled:
+                st.warning(f"⏹️ Search stopped early ({cancel_token.reason}), showing partial results.")
+                break
+            records = get_hr_profile_records(company, profiles_per_company, designation, country, state)
+            for alias in aliases:
+                all_records[alias] = records
+                all_profiles[alias] = [record["link"] for record in records]
+            progress_bar.progress((idx + 1) / len(clusters))
 
         st.session_state.profiles = all_profiles
 
         with results_container:
-            display_results_and_predictions(selected_companies, all_profiles)
+            display_results_and_predictions(selected_companies, all_profiles, all_records)
 
-def display_results_and_predictions(selected_companies, all_profiles):
+def display_results_and_predictions(selected_companies, all_profiles, all_records):
     st.success(f"✨ Found HR profiles for {len(selected_companies)} companies")
 
     results_data = []
-    for company, profiles in all_profiles.items():
-        for profile in profiles:
-            results_data.append([company, profile])
+    for company, records in all_records.items():
+        for record in records:
+            results_data.append([company, record["name"], record["headline"], record["location"], record["link"]])
 
     if results_data:
-        results_df = pd.DataFrame(results_data, columns=['Company', 'Profile URL'])
+        results = store_results("location_hr_profiles", pd.DataFrame(
+            results_data, columns=['Company', 'Name', 'Headline', 'Location', 'Profile URL']
+        ))
         st.dataframe(
-            results_df,
+            results.to_pandas(),
             column_config={
                 "Company": st.column_config.TextColumn("Company", width="medium"),
+                "Name": st.column_config.TextColumn("Name", width="medium"),
+                "Headline": st.column_config.TextColumn("Headline", width="large"),
+                "Location": st.column_config.TextColumn("Location", width="medium"),
                 "Profile URL": st.column_config.LinkColumn("Profile URL", width="large")
             },
             hide_index=True,
             height=400
         )
 
-        csv_buffer = StringIO()
-        results_df.to_csv(csv_buffer, index=False)
-        st.download_button(
-            label="📥 Download HR Profiles as CSV",
-            data=csv_buffer.getvalue(),
-            file_name=f"hr_profiles_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-            mime="text/csv"
-        )
+        render_downloads(results, "hr_profiles", key="location_hr_profiles", label="📥 Download HR Profiles")
 
         display_email_predictions(selected_companies, all_profiles)
 
 def display_email_predictions(selected_companies, all_profiles):
     st.markdown("### 📧 Predict Email Formats")
+    resolved_domains = resolve_company_domains(
+        {company: st.session_state.companies.get(company, "") for company in selected_companies}
+    )
     for company in selected_companies:
-        company_url = st.session_state.companies.get(company, "")
-        company_domain = extract_company_domain(company_url)
-
-        if company_domain:
-            with st.expander(f"📧 Email Predictions for {company}"):
+        company_domain = resolved_domains.get(company, "")
+        with st.expander(f"📧 Email Predictions for {company}"):
+            if not company_domain:
+                st.warning("Could not determine company domain for email prediction.")
+                company_domain = st.text_input(
+                    "🔤 Enter company domain manually",
+                    placeholder="example.com",
+                    key=f"location_domain_{company}"
+                )
+            if company_domain:
                 process_email_predictions(company, all_profiles[company], company_domain)
 
 def process_email_predictions(company, profiles, domain):
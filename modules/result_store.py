@@ -0,0 +1,111 @@
+import io
+import os
+import tempfile
+import uuid
+from datetime import datetime
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+import streamlit as st
+
+# Result sets larger than this many rows are spilled to Parquet on disk instead of kept in memory
+SPILL_ROWS = int(os.environ.get("RESULT_STORE_SPILL_ROWS", 5000))
+SPILL_DIR = os.path.join(tempfile.gettempdir(), "hirvana_results")
+
+DOWNLOAD_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+    "JSONL": ("jsonl", "application/x-ndjson")
+}
+
+
+class ResultSet:
+    """
+    Columnar, immutable result table backed by pyarrow
+    Large tables live in a Parquet file and are only read back when viewed or downloaded.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self._table = pa.Table.from_pandas(df.reset_index(drop=True), preserve_index=False)
+        self._path = None
+        self.num_rows = self._table.num_rows
+        self.columns = self._table.column_names
+        if self.num_rows > SPILL_ROWS:
+            self._spill()
+
+    def _spill(self):
+        os.makedirs(SPILL_DIR, exist_ok=True)
+        self._path = os.path.join(SPILL_DIR, f"{uuid.uuid4().hex}.parquet")
+        pq.write_table(self._table, self._path)
+        self._table = None
+
+    @property
+    def table(self) -> pa.Table:
+        return self._table if self._table is not None else pq.read_table(self._path)
+
+    def to_pandas(self) -> pd.DataFrame:
+        return self.table.to_pandas()
+
+    def to_bytes(self, fmt: str) -> bytes:
+        """Encode the result set as CSV, Parquet or JSONL"""
+        buffer = io.BytesIO()
+        if fmt == "csv":
+            pa_csv.write_csv(self.table, buffer)
+        elif fmt == "parquet":
+            pq.write_table(self.table, buffer)
+        elif fmt == "jsonl":
+            self.to_pandas().to_json(buffer, orient="records", lines=True, force_ascii=False)
+        else:
+            raise ValueError(f"Unsupported download format: {fmt}")
+        return buffer.getvalue()
+
+    def __del__(self):
+        if self._path and os.path.exists(self._path):
+            try:
+                os.remove(self._path)
+            except OSError:
+                pass
+
+
+def store_results(key: str, df: pd.DataFrame) -> ResultSet:
+    """Store a result table for the current session, replacing any previous one under the key"""
+    store = st.session_state.setdefault("result_store", {})
+    store[key] = ResultSet(df)
+    return store[key]
+
+
+def get_results(key: str) -> ResultSet:
+    """Return the stored result set for the key, or None"""
+    return st.session_state.get("result_store", {}).get(key)
+
+
+@st.fragment
+def render_downloads(results: ResultSet, file_prefix: str, key: str, label: str = "📥 Download Results"):
+    """
+    Format picker and download button that only encode the data when asked to
+    Runs as a fragment so preparing a download does not rerun the whole page.
+    """
+    col1, col2 = st.columns([1, 2])
+    with col1:
+        format_name = st.selectbox("Format", list(DOWNLOAD_FORMATS), key=f"{key}_download_format", label_visibility="collapsed")
+    extension, mime = DOWNLOAD_FORMATS[format_name]
+    prepared_key = f"{key}_prepared_download"
+
+    with col2:
+        prepared = st.session_state.get(prepared_key)
+        if prepared and prepared["results"] is results and prepared["format"] == format_name:
+            st.download_button(
+                label=label,
+                data=prepared["data"],
+                file_name=f"{file_prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}",
+                mime=mime,
+                key=f"{key}_download"
+            )
+        elif st.button(f"Prepare {format_name} download", key=f"{key}_prepare"):
+            st.session_state[prepared_key] = {
+                "results": results,
+                "format": format_name,
+                "data": results.to_bytes(extension)
+            }
+            st.rerun(scope="fragment")
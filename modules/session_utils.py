@@ -0,0 +1,117 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+import streamlit as st
+from streamlit.runtime import Runtime
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from companies_details_extraction.browser_scheduler import scheduler, scheduling_context
+from companies_details_extraction.cancellation import CancelToken, cancellation_scope
+from companies_details_extraction.driver_manager import get_driver_stats
+from companies_details_extraction.egress_pool import egress
+from companies_details_extraction.scrape_logging import request_scope
+
+# Scrapes started from the UI stop after this many seconds and show what they found
+SCRAPE_TIMEOUT = float(os.environ.get("UI_SCRAPE_TIMEOUT", 600))
+SESSION_CHECK_INTERVAL = 5
+
+# Token of each session's latest script run; cancelled when the run is superseded or the session ends
+_run_tokens = {}
+_run_lock = threading.Lock()
+_watcher = None
+
+
+def get_session_id():
+    """Return the id of the current Streamlit session, or None outside a script run"""
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else None
+
+
+def queue_status_callback(placeholder):
+    """
+    Build an on_wait callback that shows the browser queue position in a placeholder
+    The callback may be invoked from worker threads, so it attaches the script run context first.
+    """
+    ctx = get_script_run_ctx()
+
+    def on_wait(position):
+        if ctx and get_script_run_ctx() is None:
+            add_script_run_ctx(threading.current_thread(), ctx)
+        if position:
+            placeholder.info(f"⏳ All browsers are busy, you are #{position} in the queue...")
+        else:
+            placeholder.empty()
+
+    return on_wait
+
+
+def _watch_sessions():
+    while True:
+        time.sleep(SESSION_CHECK_INTERVAL)
+        if not Runtime.exists():
+            continue
+        runtime = Runtime.instance()
+        with _run_lock:
+            ended = [session_id for session_id in _run_tokens if not runtime.is_active_session(session_id)]
+            tokens = [_run_tokens.pop(session_id) for session_id in ended]
+        for token in tokens:
+            token.cancel("session ended")
+
+
+def start_script_run():
+    """
+    Register the current script run and cancel scrapes still running for the session's previous run
+    A rerun abandons the previous run's output, so its browsers would otherwise work for nobody.
+    Call once at the top of the app script.
+    """
+    global _watcher
+    session_id = get_session_id()
+    if session_id is None:
+        return
+    with _run_lock:
+        previous = _run_tokens.get(session_id)
+        _run_tokens[session_id] = CancelToken()
+        if _watcher is None:
+            _watcher = threading.Thread(target=_watch_sessions, name="session-watcher", daemon=True)
+            _watcher.start()
+    if previous is not None:
+        previous.cancel("superseded by a rerun")
+
+
+@contextmanager
+def browser_queue(priority, timeout=SCRAPE_TIMEOUT):
+    """
+    Scheduling and cancellation context for scrapes started from the current session
+    Yields the CancelToken of the block, which fires at the timeout, on a rerun or when the session ends.
+    Records logged in the block share a fresh request id.
+    """
+    session_id = get_session_id()
+    with _run_lock:
+        run_token = _run_tokens.get(session_id)
+    with scheduling_context(
+        session_id=session_id,
+        priority=priority,
+        on_wait=queue_status_callback(st.empty())
+    ), cancellation_scope(timeout, run_token) as token, request_scope():
+        yield token
+
+
+def render_browser_stats():
+    stats = scheduler.get_stats()
+    driver_stats = get_driver_stats()
+    st.sidebar.metric("🖥️ Browsers in use", f"{stats['active']} / {stats['max_browsers']}")
+    st.sidebar.metric("⏳ Queued requests", stats["queued"])
+    st.sidebar.metric("🧠 Browser memory", f"{driver_stats['total_rss_mb']:.0f} MB")
+    st.sidebar.caption(
+        f"{driver_stats['live_browsers']} live browsers ({driver_stats['idle']} idle), "
+        f"{driver_stats['recycled']} recycled"
+        + (f", {driver_stats['remote']} on remote nodes" if driver_stats["nodes"] else "")
+    )
+    identities = egress.get_stats()
+    if len(identities) > 1:
+        quarantined = sum(identity["status"] == "quarantined" for identity in identities)
+        with st.sidebar.expander(f"🌐 Egress: {len(identities) - quarantined} active, {quarantined} quarantined"):
+            st.dataframe(
+                [{key: identity[key] for key in ("name", "status", "health", "block_rate", "per_minute")} for identity in identities],
+                hide_index=True
+            )